@@ -14,7 +14,7 @@ from pii_data.types.doc.localdoc import LocalSrcDocumentFile
 
 from ..helper.types import TYPE_STR_LIST
 from ..defs import FMT_CONFIG_PLUGIN, FMT_CONFIG_TASKS
-from . import PiiProcessor
+from . import PiiProcessor, PiiCollectionBuilder
 
 
 def print_tasks(langlist: List[str], proc: PiiProcessor, out: TextIO):
@@ -43,11 +43,20 @@ def print_stats(stats: Dict[str, Dict], out: TextIO):
     """
     Print out statistics for the detection process
     """
+    def print_values(values: Dict, indent: str):
+        for k, v in values.items():
+            if isinstance(v, dict):
+                print(f"{indent}{k}", file=out)
+                print_values(v, indent + "   ")
+            elif isinstance(v, float):
+                print(f"{indent}{k:20} :  {v:9.6f}", file=out)
+            else:
+                print(f"{indent}{k:20} :  {v:5}", file=out)
+
     print("\n. Statistics:", file=out)
     for name, vd in stats.items():
         print("..", name, file=out)
-        for k, v in vd.items():
-            print(f"   {k:20} :  {v:5}", file=sys.stderr)
+        print_values(vd, "   ")
 
 
 def piic_format(filename: str, default: str = None) -> str:
@@ -116,7 +125,8 @@ def process_file(infile: str,
         config = None
 
     # Create the object
-    proc = PiiProcessor(skip_plugins=skip_plugins, config=config, debug=debug)
+    proc = PiiProcessor(skip_plugins=skip_plugins, config=config,
+                        task_stats=show_stats, debug=debug)
 
     # Build the task objects
     proc.build_tasks(lang, country, pii=tasks)
@@ -130,12 +140,17 @@ def process_file(infile: str,
         print(". Reading from:", infile, file=sys.stderr)
         print(". Writing to:", outfile, file=sys.stderr)
 
-    # Process the file
-    piic = proc(doc, chunk_context=chunk_context)
-
-    # Dump results
-    with openfile(outfile, "wt") as fout:
-        piic.dump(fout, format=outfmt)
+    # Process the file & dump results
+    if outfmt in ("ndjson", "jsonl"):
+        # Stream entities to the output as they are detected
+        piic = PiiCollectionBuilder(lang=lang, docid=doc.id)
+        piic.add_detectors(proc.get_detectors(lang))
+        with openfile(outfile, "wt") as fout:
+            piic.dump_stream(fout, proc.iter_detect(doc, chunk_context=chunk_context))
+    else:
+        piic = proc(doc, chunk_context=chunk_context)
+        with openfile(outfile, "wt") as fout:
+            piic.dump(fout, format=outfmt)
 
     stats = proc.get_stats()
     if show_stats:
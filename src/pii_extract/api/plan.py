@@ -0,0 +1,143 @@
+"""
+Define the ExecutionPlan class: the immutable, precomputed state used by the
+processor to execute the tasks built for a language
+"""
+
+import json
+import hashlib
+from dataclasses import dataclass
+from itertools import chain
+from types import MappingProxyType
+
+from typing import Dict, List, Tuple, Iterable, Union, Optional, Mapping
+
+from pii_data.types import PiiEntityInfo, PiiDetector
+from pii_data.helper.exception import InvArgException
+
+from ..helper.context import context_keywords, ContextKeywords
+from ..build.task import PiiTaskInfo, BasePiiTask, RegexTaskBundle
+
+
+def task_detector(info: Union[PiiTaskInfo, Dict],
+                  method: str = None) -> PiiDetector:
+    """
+    Build the PiiDetector object for a task
+     :param info: a PiiTaskInfo (or equivalent dict) for the task
+     :param method: task detector method, if not found in `info`
+    """
+    if isinstance(info, PiiTaskInfo):
+        info = info.asdict()
+    kwargs = {k: info.get(k) for k in ("source", "name", "version", "method")}
+    if method:
+        kwargs["method"] = method
+    return PiiDetector(**kwargs)
+
+
+def _pii_info_list(task: BasePiiTask) -> List[PiiEntityInfo]:
+    """
+    Return the list of PII types a task can detect
+    """
+    info = task.pii_info
+    return [info] if isinstance(info, PiiEntityInfo) else list(info)
+
+
+def _fingerprint(lang: str, tasks: Iterable[BasePiiTask]) -> str:
+    """
+    Compute a digest that identifies a list of tasks, by their class, their
+    task & PII info, and their config
+    """
+    data = [lang]
+    for task in tasks:
+        data.append([type(task).__module__ + "." + type(task).__qualname__,
+                     task.task_info.asdict(),
+                     [i.asdict() for i in _pii_info_list(task)],
+                     task.config])
+    data = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=16).hexdigest()
+
+
+@dataclass(frozen=True)
+class ExecutionPlan:
+    """
+    The execution plan for the tasks built for a language:
+      - the deduplicated task list, in execution order
+      - the shared index of context keywords for those tasks
+      - the regex bundle, if requested
+      - the PiiDetector to assign to each entity produced by a task,
+        precomputed (and interned) for each PII type the task can detect
+        (None for a single-type task whose method cannot be obtained)
+      - a fingerprint that identifies the task set
+    """
+    lang: str
+    tasks: Tuple[BasePiiTask, ...]
+    keywords: Optional[ContextKeywords] = None
+    bundle: Optional[RegexTaskBundle] = None
+    detectors: Mapping = None
+    fingerprint: str = None
+
+
+    @classmethod
+    def build(cls, lang: str, tasks: Iterable[BasePiiTask],
+              bundle: bool = False) -> "ExecutionPlan":
+        """
+        Create the plan for a task list
+          :param lang: the language the tasks were built for
+          :param tasks: the built tasks
+          :param bundle: create a regex bundle for the tasks
+        """
+        tasks = tuple(dict.fromkeys(tasks))
+
+        # Index the string context keywords of all the tasks, so that they
+        # are searched for in a single pass over each chunk
+        specs = chain.from_iterable(t.context_specs() for t in tasks)
+        keywords = context_keywords(specs) or None
+
+        # Detectors are shared by all the tasks & PII types that map to them.
+        # Single-type tasks get a single detector, multi-type tasks a dict
+        # indexed by PII info
+        interned = {}
+        detectors = {}
+        for task in tasks:
+            per_info = {}
+            for info in _pii_info_list(task):
+                try:
+                    method = task.get_method(info)
+                except InvArgException:
+                    continue    # will fail if the task ever produces it
+                det = task_detector(task.task_info, method)
+                key = det._id, det.fields.get("method")
+                per_info[info] = interned.setdefault(key, det)
+            if isinstance(task.pii_info, PiiEntityInfo):
+                per_info = next(iter(per_info.values()), None)
+            detectors[task] = per_info
+
+        return cls(lang=lang, tasks=tasks, keywords=keywords,
+                   bundle=RegexTaskBundle(tasks) if bundle else None,
+                   detectors=MappingProxyType(detectors),
+                   fingerprint=_fingerprint(lang, tasks))
+
+
+    def __repr__(self) -> str:
+        return f"<ExecutionPlan {self.lang} #{len(self.tasks)}>"
+
+
+    def detector(self, task: BasePiiTask, info: PiiEntityInfo) -> PiiDetector:
+        """
+        Return the detector for an entity produced by a task in the plan
+        """
+        det = self.detectors[task]
+        if isinstance(det, dict):
+            det = det.get(info)
+        return det or task_detector(task.task_info, task.get_method(info))
+
+
+    def detector_list(self) -> List[PiiDetector]:
+        """
+        Return all the (distinct) detectors the tasks in the plan can produce
+        """
+        out = {}
+        for det in self.detectors.values():
+            for d in det.values() if isinstance(det, dict) else [det]:
+                if d is not None:
+                    out.setdefault(d._id, d)
+        return list(out.values())
@@ -7,21 +7,39 @@ Definition of the main PiiProcessor object: a class that
 """
 
 from pathlib import Path
-from collections import defaultdict
-from itertools import chain
+from collections import defaultdict, deque
+from itertools import chain, islice
+from functools import partial
+from weakref import WeakKeyDictionary
+from concurrent.futures import ThreadPoolExecutor
+import multiprocessing as mp
+import multiprocessing.pool
+import asyncio
 import logging
+from bisect import bisect_right
+from time import perf_counter
 
-from typing import Tuple, List, Dict, Iterable, Union
+from typing import (Tuple, List, Dict, Iterable, Union, Optional, Any,
+                    Awaitable, Callable, TextIO, Mapping)
 
 from pii_data.types import PiiEntityInfo, PiiEntity, PiiDetector, PiiCollection
 from pii_data.types.doc import SrcDocument, DocumentChunk
 from pii_data.helper.config import load_config, TYPE_CONFIG_LIST
 from pii_data.helper.exception import ProcException, InvArgException
+from pii_data.helper.json_encoder import CustomJSONEncoder
 
 from .. import defs
 from ..helper.logger import PiiLogger
-from ..helper.utils import set_pii_stage
-from ..build.task import PiiTaskInfo
+from ..helper.utils import set_pii_stage, clone_entity
+from ..helper.profile import ChunkProfile
+from ..helper.context import ChunkText
+from ..helper.regex_cache import regex_cache_stats
+from ..helper.chunk_cache import ChunkCache, chunk_hash
+from ..helper.overlap import OverlapResolver
+from ..helper.window import window_spans, window_chunk, WINDOW_CONTEXT
+from ..helper.coalesce import ChunkBuffer, SEPARATOR
+from ..build.task import PiiTaskInfo, BasePiiTask, RegexPiiTask, RegexTaskBundle
+from .plan import ExecutionPlan, task_detector
 from ..gather.collection import get_task_collection, TYPE_TASKENUM
 from ..gather.collection.sources import JsonTaskCollector
 
@@ -58,6 +76,91 @@ def load_module_config(configlist: TYPE_CONFIG_LIST) -> Dict:
     return load_config([base] + configlist, fmts)
 
 
+def merge_stats(dest: Dict, src: Dict) -> Dict:
+    """
+    Add the counters in a stats dictionary to another one
+    """
+    for name, values in src.items():
+        section = dest.setdefault(name, defaultdict(int))
+        for k, v in values.items():
+            if isinstance(v, dict):
+                # nested section (e.g. per-task counters)
+                merge_stats(section, {k: v})
+            else:
+                section[k] += v
+    return dest
+
+
+# Upper limits (in seconds) for the buckets in latency histograms
+LATENCY_BUCKETS = (0.0001, 0.001, 0.01, 0.1, 1)
+LATENCY_LABELS = ("<0.1ms", "<1ms", "<10ms", "<100ms", "<1s", ">=1s")
+
+
+def latency_bucket(elapsed: float) -> str:
+    """
+    Return the label of the latency histogram bucket for an elapsed time
+    """
+    return LATENCY_LABELS[bisect_right(LATENCY_BUCKETS, elapsed)]
+
+
+# Processor object in a worker process
+_WORKER = None
+
+# Default maximum number of chunks in a batch for batch-capable tasks
+DEFAULT_BATCH_SIZE = 16
+
+# Maximum number of chunk batches in flight per worker process
+MAX_POOL_BATCHES = 2
+
+
+def _worker_init(init_args: Dict, json_tasks: List, build_args: List[Dict]):
+    """
+    Initialize a worker process: create a processor with the same arguments,
+    and build the same tasks
+    """
+    global _WORKER
+    _WORKER = PiiProcessor(**init_args)
+    for tasks in json_tasks:
+        _WORKER.add_json_tasks(tasks)
+    for args in build_args:
+        _WORKER.build_tasks(**args)
+
+
+def _plain_value(value: Any) -> Any:
+    """
+    Convert the read-only mappings in a value (e.g. the document metadata in
+    a chunk context) into plain dicts, so that it can be pickled
+    """
+    if isinstance(value, Mapping):
+        return {k: _plain_value(v) for k, v in value.items()}
+    elif isinstance(value, list):
+        return [_plain_value(v) for v in value]
+    return value
+
+
+def _pool_chunk(chunk: DocumentChunk) -> DocumentChunk:
+    """
+    Prepare a chunk to be sent to a worker process
+    """
+    if not chunk.context:
+        return chunk
+    return DocumentChunk(id=chunk.id, data=chunk.data,
+                         context=_plain_value(chunk.context))
+
+
+def _worker_detect(chunks: List[DocumentChunk],
+                   default_lang: str) -> Tuple[List[List[Tuple]], Dict]:
+    """
+    Process a batch of chunks in a worker process
+      :return: a tuple (results for each chunk, stats delta for the batch)
+    """
+    if _WORKER._batching:
+        result = _WORKER._detect_batch(chunks, [default_lang]*len(chunks))
+    else:
+        result = list(_WORKER._detect_chunks(chunks, default_lang))
+    return result, _WORKER._pop_stats()
+
+
 # --------------------------------------------------------------------------
 
 
@@ -69,6 +172,7 @@ class PiiCollectionBuilder(PiiCollection):
       - add_detector_fields(), which accepts a PiiTaskInfo object instead of a
         PiiDetector, and builds the PiiDetector
       - add_collection(), which adds all pii in a collection to another
+      - dump_stream(), which writes out a stream of PiiEntity instances
     """
 
     def add_detector_fields(self, pii: PiiEntity,
@@ -80,14 +184,36 @@ class PiiCollectionBuilder(PiiCollection):
            did the detection
          :param method: task detector method, if not found in `info`
         """
-        if isinstance(info, PiiTaskInfo):
-            info = info.asdict()
-        kwargs = {k: info.get(k)
-                  for k in ("source", "name", "version", "method")}
-        if method:
-            kwargs["method"] = method
-        detector = PiiDetector(**kwargs)
-        super().add(pii, detector)
+        super().add(pii, task_detector(info, method))
+
+
+    def dump_stream(self, out: TextIO,
+                    entities: Iterable[Tuple[PiiEntity, PiiDetector]]) -> int:
+        """
+        Write to an output destination, in NDJSON format, the collection
+        header followed by a stream of PII entities, without storing them in
+        the collection. Since the header is written first, all detectors must
+        already be in the collection (e.g. those from
+        PiiProcessor.get_detectors()); an entity with any other detector
+        raises a ProcException.
+         :param out: destination to write to
+         :param entities: an iterable of (PiiEntity, PiiDetector) tuples
+         :return: the number of written entities
+        """
+        encoder = CustomJSONEncoder(ensure_ascii=False)
+        print(encoder.encode(self.get_header()), file=out)
+        known = len(self.get_detectors(asdict=False))
+        num = 0
+        for num, (pii, detector) in enumerate(entities, start=1):
+            idx = self.add_detector(detector)
+            if idx > known:
+                raise ProcException("detector not in the collection header: {}",
+                                    detector)
+            pii.fields["detector"] = idx
+            for k, v in self.defaults.items():
+                pii.fields.setdefault(k, v)
+            print(encoder.encode(pii), file=out)
+        return num
 
 
     def add_collection(self, piic: PiiCollection) -> int:
@@ -108,20 +234,90 @@ class PiiProcessor:
 
     def __init__(self, config: TYPE_CONFIG_LIST = None,
                  skip_plugins: bool = False,
-                 languages: Iterable[str] = None, debug: bool = False):
+                 languages: Iterable[str] = None, regex_bundle: bool = False,
+                 workers: int = None, threads: int = None,
+                 max_concurrency: int = None, batch_size: int = None,
+                 batch_tokens: int = None, task_stats: bool = False,
+                 chunk_cache: int = None,
+                 overlap: Union[str, OverlapResolver] = None,
+                 window_size: int = None, window_overlap: int = None,
+                 coalesce: int = None, debug: bool = False):
         """
         Initialize a PII Processor object
           :param config: a configuration, possibly containing a
             "pii-extract:tasks" section and/or a "pii-extract:plugins" section
           :param skip_plugins: skip loading pii-extract plugins
           :param languages: define all languages that will be used
+          :param regex_bundle: deduplicate identical regex patterns across the
+            regex tasks built for a language, so that tasks sharing the same
+            pattern scan a chunk only once (different patterns are still
+            scanned separately)
+          :param workers: process documents in a pool with this number of
+            worker processes (each one builds its own copy of the tasks)
+          :param threads: execute the tasks for each chunk concurrently, in a
+            pool with this number of threads (regex tasks then match with the
+            GIL released)
+          :param max_concurrency: maximum number of task executions in flight
+            in async mode (adetect), across all documents being processed
+          :param batch_size: process documents in batches of chunks of (at
+            most) this size, calling the find_batch() method of the tasks that
+            define it
+          :param batch_tokens: limit also the size of a batch of chunks by its
+            number of (whitespace-separated) tokens
+          :param task_stats: collect also per-task statistics (execution
+            time, processed chunks, candidates, etc) and latency histograms
+          :param chunk_cache: keep the detection results for this number of
+            chunks in an LRU cache, so that chunks with repeated text are not
+            scanned again
+          :param overlap: resolve overlapping entities in each chunk, with
+            this policy ("longest", "method" or "merge"), or with this
+            OverlapResolver object
+          :param window_size: split chunks larger than this size into
+            overlapping windows, scanned independently (and in parallel, if
+            there is a thread pool)
+          :param window_overlap: size of the overlap between windows
+          :param coalesce: join consecutive chunks smaller than this size
+            into scan buffers (of up to this size), so that tasks are executed
+            once per buffer instead of once per chunk
           :param debug:
         """
         self._debug = debug
         self._config = load_module_config(config)
         self._log = PiiLogger(__name__, debug)
         self._tasks = {}
-        self._stats = {"num": defaultdict(int), "entities": defaultdict(int)}
+        self._plans = {}
+        self._regex_bundle = regex_bundle
+        self._task_stats = task_stats
+        self._chunk_cache = ChunkCache(chunk_cache) if chunk_cache else None
+        self._overlap = OverlapResolver(overlap) if isinstance(overlap, str) \
+            else overlap
+        if window_size:
+            window_spans("", window_size, window_overlap)   # validate
+        self._window = (window_size, window_overlap) if window_size else None
+        self._coalesce = coalesce
+        self._stats = self._new_stats()
+        self._worker_stats = {}
+        self._workers = workers if workers and workers > 1 else None
+        self._pool = None
+        self._executor = ThreadPoolExecutor(threads) \
+            if threads and threads > 1 else None
+        self._max_concurrency = max_concurrency
+        # (a semaphore is bound to an event loop, so there is one per loop)
+        self._asem = WeakKeyDictionary()
+        self._batch_size = batch_size
+        self._batch_tokens = batch_tokens
+        self._batching = bool(batch_size or batch_tokens)
+        # Recorded so that worker processes can replicate this processor
+        self._init_args = dict(config=config, skip_plugins=skip_plugins,
+                               languages=languages, regex_bundle=regex_bundle,
+                               threads=threads, batch_size=batch_size,
+                               batch_tokens=batch_tokens,
+                               task_stats=task_stats, chunk_cache=chunk_cache,
+                               overlap=overlap, window_size=window_size,
+                               window_overlap=window_overlap,
+                               coalesce=coalesce, debug=debug)
+        self._json_tasks = []
+        self._build_args = []
         self._ptc = get_task_collection(load_plugins=not skip_plugins,
                                         languages=languages,
                                         config=self._config, debug=debug)
@@ -138,6 +334,7 @@ class PiiProcessor:
         c = JsonTaskCollector(debug=self._debug)
         c.add_tasks(jsonfile)
         self._ptc.add_collector(c)
+        self._json_tasks.append(jsonfile)
 
 
     def language_list(self) -> Iterable[str]:
@@ -160,6 +357,11 @@ class PiiProcessor:
             tasks valid for "any"
          :return: the number of tasks obtained
         """
+        # Record the call (and discard workers using an older task set)
+        self._build_args.append(dict(lang=lang, country=country, pii=pii,
+                                     add_any=add_any))
+        self._close_pool()
+
         # Sanitize input
         lang = lang.lower() if lang else None
         self._log(". Build tasks: %s", lang)
@@ -170,6 +372,18 @@ class PiiProcessor:
         tasks = self._ptc.build_tasks(lang, self._country, pii=pii,
                                       add_any=add_any)
         self._tasks[lang] = list(tasks)
+
+        # Prepare the execution plan for the tasks
+        plan = self._plans[lang] = ExecutionPlan.build(lang, self._tasks[lang],
+                                                       self._regex_bundle)
+        # (the cache holds results for the previous tasks)
+        if self._chunk_cache is not None:
+            self._chunk_cache.clear()
+        for task in plan.tasks:
+            if plan.keywords:
+                task.context_keywords = plan.keywords
+            if self._executor and isinstance(task, RegexPiiTask):
+                task.concurrent = True
         return len(self._tasks[lang])
 
 
@@ -221,6 +435,17 @@ class PiiProcessor:
           :param piic: collection to add the detected PII instances to
           :param default_lang: language to use, if the chunk does not define one
         """
+        piilist = self._detect_chunk(chunk, default_lang)
+        for pii, detector in piilist:
+            piic.add(pii, detector)
+        return len(piilist)
+
+
+    def _get_plan(self, chunk: DocumentChunk,
+                  default_lang: str = None) -> ExecutionPlan:
+        """
+        Select the execution plan to apply to a chunk, by its language
+        """
         self._log("... Detect chunk=%s (size=%d)", chunk.id,
                   len(chunk.data), level=logging.DEBUG)
         if not self._tasks:
@@ -228,36 +453,690 @@ class PiiProcessor:
 
         # Select the list of tasks to apply, based on the chunk language
         lang = (chunk.context or {}).get("lang") or default_lang
-        if lang:
-            tasks = self._tasks.get(lang, [])
-        else:
+        if not lang:
             if len(self._tasks) > 1:
                 raise InvArgException("must select a language for tasks")
-            tasks = next(iter(self._tasks.values()))
+            lang = next(iter(self._tasks))
+        return self._plans.get(lang) or ExecutionPlan(lang, ())
+
+
+    def _select_tasks(self, chunk: DocumentChunk,
+                      plan: ExecutionPlan) -> List[BasePiiTask]:
+        """
+        Select the tasks in a plan to execute over a chunk
+        """
+        torun = []
+        profile = None
+        for task in plan.tasks:
+
+            # Skip the task if the chunk profile does not meet its requirements
+            if task.requires:
+                if profile is None:
+                    profile = ChunkProfile.build(chunk.data)
+                if not profile.satisfies(task.requires):
+                    self._stats["num"]["skipped"] += 1
+                    continue
+            torun.append(task)
+
+        return torun
+
+
+    def _cache_get(self, chunk: DocumentChunk,
+                   plan: ExecutionPlan) -> Tuple[bytes, Optional[List[Tuple]]]:
+        """
+        Look up a chunk in the chunk cache
+          :return: a tuple (chunk key, cached results); results are None if
+            the chunk is not in the cache
+        """
+        key = self._chunk_cache.key(chunk, plan.fingerprint)
+        piilist = self._chunk_cache.get(key, chunk.id)
+        if piilist is not None:
+            self._count_entities(p[0] for p in piilist)
+        return key, piilist
+
+
+    def _count_entities(self, entities: Iterable[PiiEntity]):
+        """
+        Add a list of produced entities to the stats
+        """
+        for pii in entities:
+            self._stats["num"]["entities"] += 1
+            self._stats["entities"][pii.info.pii.name] += 1
+
+
+    def _cache_put(self, key: bytes, results: List[Tuple],
+                   piilist: List[Tuple]):
+        """
+        Store the results for a chunk in the chunk cache (unless some task
+        exceeded its time budget, since then results are incomplete)
+        """
+        if all(r[0] is not None for r in results):
+            self._chunk_cache.put(key, piilist)
+
+
+    def _new_stats(self) -> Dict:
+        """
+        Create an empty set of processor counters
+        """
+        stats = {"num": defaultdict(int), "entities": defaultdict(int)}
+        if self._task_stats:
+            stats.update(task={}, task_latency={},
+                         chunk_latency=defaultdict(int))
+        return stats
+
 
+    def _record_task(self, task: BasePiiTask, chunk: DocumentChunk,
+                     result: Optional[List[PiiEntity]], elapsed: float,
+                     rejected: int = 0):
+        """
+        Add the execution of a task over a chunk to the per-task statistics
+        """
+        name = task.task_info.name
+        tstats = self._stats["task"].get(name)
+        if tstats is None:
+            tstats = self._stats["task"][name] = defaultdict(int)
+            self._stats["task_latency"][name] = defaultdict(int)
+        tstats["chunks"] += 1
+        tstats["chars"] += len(chunk.data)
+        tstats["time"] += elapsed
+        tstats["entities"] += len(result) if result else 0
+        tstats["rejected"] += rejected
+        self._stats["task_latency"][name][latency_bucket(elapsed)] += 1
+
+
+    def _collect_results(self, chunk: DocumentChunk, plan: ExecutionPlan,
+                         tasks: List[BasePiiTask],
+                         results: List[Tuple[Optional[List[PiiEntity]], float]],
+                         text: ChunkText = None) -> List[Tuple]:
+        """
+        Process the results of the tasks executed over a chunk
+          :param results: a list of (result, elapsed time) tuples, one per task
+          :param text: the derived texts for the chunk, holding the candidates
+            rejected by context validation
+          :return: a list of (PiiEntity, PiiDetector) tuples, sorted by
+            position in the chunk
+        """
         piilist = []
-        processed = set()
-        for task in tasks:
+        for task, (result, elapsed) in zip(tasks, results):
+
+            if self._task_stats:
+                rejected = len(text.rejected.get(task, ())) if text else 0
+                self._record_task(task, chunk, result, elapsed, rejected)
 
-            # See if we have already applied this task to the chunk
-            if task in processed:
+            if result is None:
+                # Task exceeded its time budget: abandon it for this chunk
+                self._log("... task timeout: %s chunk=%s",
+                          task.task_info.name, chunk.id, level=logging.WARNING)
+                tstats = self._stats.setdefault("timeout", defaultdict(int))
+                tstats[task.task_info.name] += 1
                 continue
-            processed.add(task)
 
-            # Execute the task, and process all detected entities
-            for pii in task(chunk):
+            # Process all detected entities
+            detectors = plan.detectors[task]
+            for pii in result:
                 set_pii_stage(pii)
-                piilist.append((pii, task.task_info, task.get_method(pii.info)))
-                self._stats["num"]["entities"] += 1
-                self._stats["entities"][pii.info.pii.name] += 1
+                det = detectors if isinstance(detectors, PiiDetector) \
+                    else plan.detector(task, pii.info)
+                piilist.append((pii, det))
+
+        if self._task_stats:
+            elapsed = sum(r[1] for r in results)
+            self._stats["chunk_latency"][latency_bucket(elapsed)] += 1
+
+        # Sort all entities by position in chunk. The results of each task
+        # are usually already sorted, so the sort just merges those runs
+        piilist.sort(key=lambda p: p[0].pos)
+
+        if self._overlap:
+            piilist = self._overlap(piilist, chunk.data)
+        self._count_entities(p[0] for p in piilist)
+        return piilist
+
+
+    def _detect_chunk(self, chunk: DocumentChunk,
+                      default_lang: str = None) -> List[Tuple]:
+        """
+        Process a document chunk
+          :return: a list of (PiiEntity, PiiDetector) tuples, sorted by
+            position in the chunk
+        """
+        plan = self._get_plan(chunk, default_lang)
+        if self._chunk_cache is not None:
+            key, piilist = self._cache_get(chunk, plan)
+            if piilist is not None:
+                return piilist
+        torun = self._select_tasks(chunk, plan)
+        text = ChunkText(chunk, plan.keywords)
+        results = self._execute(torun, chunk, plan, text)
+        piilist = self._collect_results(chunk, plan, torun, results, text)
+        if self._chunk_cache is not None:
+            self._cache_put(key, results, piilist)
+        return piilist
+
+
+    def _execute(self, tasks: List[BasePiiTask], chunk: DocumentChunk,
+                 plan: ExecutionPlan, text: ChunkText) -> List[Tuple]:
+        """
+        Execute a list of tasks over a chunk: in windows if it is oversized,
+        else in the thread pool (if there is one) or one after the other
+          :param text: the derived texts for the chunk
+          :return: the task results, in the same order as the task list
+        """
+        if self._oversized(chunk):
+            return self._run_windows(tasks, chunk, plan, text)
+        if self._executor:
+            return self._run_threads(tasks, chunk, text, plan.bundle)
+        scan = {}
+        return [self._run_task(t, chunk, text, plan.bundle, scan)
+                for t in tasks]
+
+
+    def _detect_chunks(self, chunks: Iterable[DocumentChunk],
+                       default_lang: str = None) -> Iterable[List[Tuple]]:
+        """
+        Process a sequence of document chunks, one by one or (if the coalesce
+        option is active) joining consecutive small chunks into scan buffers
+          :return: an iterable with the results for each chunk
+        """
+        if not self._coalesce:
+            for chunk in chunks:
+                yield self._detect_chunk(chunk, default_lang)
+            return
 
-        # Add all entities to the collection, sorted by position in chunk
-        for pii in sorted(piilist, key=lambda p: p[0].pos):
-            piic.add_detector_fields(*pii)
+        limit = self._coalesce
+        group, size, gplan = [], 0, None
+        for chunk in chunks:
+            plan = self._get_plan(chunk, default_lang)
+            small = len(chunk.data) < limit
+            if group and (not small or plan is not gplan or
+                          size + len(chunk.data) > limit):
+                yield from self._detect_coalesced(group, gplan, default_lang)
+                group, size = [], 0
+            if not small:
+                yield self._detect_chunk(chunk, default_lang)
+                continue
+            group.append(chunk)
+            size += len(chunk.data) + len(SEPARATOR)
+            gplan = plan
+        if group:
+            yield from self._detect_coalesced(group, gplan, default_lang)
+
+
+    def _detect_coalesced(self, chunks: List[DocumentChunk],
+                          plan: ExecutionPlan,
+                          default_lang: str = None) -> List[List[Tuple]]:
+        """
+        Process a list of consecutive chunks joined in a single scan buffer.
+        Chunks found in the chunk cache are taken from it, and the rest are
+        scanned together (see _scan_coalesced)
+          :return: the list of results for each chunk
+        """
+        if len(chunks) == 1:
+            return [self._detect_chunk(chunks[0], default_lang)]
+
+        # Fetch the chunks already in the cache
+        keys = cached = [None]*len(chunks)
+        if self._chunk_cache is not None:
+            keys, cached = zip(*(self._cache_get(c, plan) for c in chunks))
+
+        scanned = iter(self._scan_coalesced([c for c, r in zip(chunks, cached)
+                                             if r is None], plan))
+        out = []
+        for key, piilist in zip(keys, cached):
+            if piilist is None:
+                results, piilist = next(scanned)
+                if self._chunk_cache is not None:
+                    self._cache_put(key, results, piilist)
+            out.append(piilist)
+        return out
+
+
+    def _scan_coalesced(self, chunks: List[DocumentChunk],
+                        plan: ExecutionPlan) -> List[Tuple[List, List]]:
+        """
+        Process a list of chunks joined in a single scan buffer.
+        Tasks that can be executed over a buffer (see BasePiiTask.coalesce)
+        find their raw candidates over it; they are then split back to their
+        chunks, and context validation is done per chunk. The rest of the
+        tasks are executed over each chunk. Chunks with an entity spanning a
+        chunk separator are processed again on their own.
+          :return: a list with a tuple (task results, detected entities) for
+            each chunk
+        """
+        # The tasks for each chunk are selected by its own profile
+        selected = [self._select_tasks(c, plan) for c in chunks]
 
+        # Tasks that redefine how they are called (or how context is
+        # validated) cannot be split into find + filter
+        needed = set(chain.from_iterable(selected))
+        buffered = [t for t in plan.tasks
+                    if t in needed and t.coalesce and
+                    type(t).__call__ is BasePiiTask.__call__ and
+                    type(t).find_context is BasePiiTask.find_context]
+        if len(chunks) < 2 or not buffered:
+            out = []
+            for c, torun in zip(chunks, selected):
+                text = ChunkText(c, plan.keywords)
+                results = self._execute(torun, c, plan, text)
+                out.append((results,
+                            self._collect_results(c, plan, torun, results, text)))
+            return out
+
+        buf = ChunkBuffer(chunks)
+        if self._executor:
+            raw = list(self._executor.map(self._run_find, buffered,
+                                          [buf.chunk]*len(buffered)))
+        else:
+            raw = [self._run_find(t, buf.chunk) for t in buffered]
+        raw = dict(zip(buffered, raw))
+
+        # Split the candidates into their chunks
+        found = [defaultdict(list) for _ in chunks]
+        redo = set()
+        for task, (result, _) in raw.items():
+            for pii in result or []:
+                n, pos = buf.locate(pii.pos, len(pii))
+                if pos is None:
+                    redo.update(range(n, buf.index(pii.pos + len(pii) - 1) + 1))
+                    continue
+                pii.pos = pos
+                pii.fields["chunkid"] = chunks[n].id
+                found[n][task].append(pii)
+
+        self._stats["num"]["coalesced"] += len(chunks) - len(redo)
+        out = []
+        for n, (chunk, torun) in enumerate(zip(chunks, selected)):
+            text = ChunkText(chunk, plan.keywords)
+            if n in redo:
+                results = self._execute(torun, chunk, plan, text)
+                out.append((results, self._collect_results(chunk, plan, torun,
+                                                           results, text)))
+                continue
+            single = [t for t in torun if t not in raw]
+            results = dict(zip(single, self._execute(single, chunk, plan, text)))
+            for task in torun:
+                if task in results:
+                    continue
+                # (buffer time is evenly distributed across its chunks)
+                result, elapsed = raw[task]
+                elapsed /= len(chunks)
+                if result is not None:
+                    result = found[n][task]
+                    if task.context and result:
+                        start = perf_counter()
+                        result = list(task.filter_context(chunk, result, text))
+                        elapsed += perf_counter() - start
+                results[task] = result, elapsed
+            results = [results[t] for t in torun]
+            out.append((results, self._collect_results(chunk, plan, torun,
+                                                       results, text)))
+        return out
+
+
+    @staticmethod
+    def _run_find(task: BasePiiTask,
+                  chunk: DocumentChunk) -> Tuple[Optional[List[PiiEntity]], float]:
+        """
+        Execute a task over a chunk, without context validation
+          :return: a tuple (list of raw candidates, elapsed time); the list
+            is None if the task exceeded its time budget
+        """
+        start = perf_counter()
+        try:
+            result = list(task.find(chunk))
+        except TimeoutError:
+            result = None
+        return result, perf_counter() - start
+
+
+    @staticmethod
+    def _run_task(task: BasePiiTask, chunk: DocumentChunk, text: ChunkText,
+                  bundle: RegexTaskBundle,
+                  scan: Dict) -> Tuple[Optional[List[PiiEntity]], float]:
+        """
+        Execute a task over a chunk
+          :return: a tuple (list of detected entities, elapsed time); the list
+            is None if the task exceeded its time budget
+        """
+        start = perf_counter()
+        try:
+            if bundle and task in bundle:
+                result = list(bundle(task, chunk, scan, text))
+            elif task.context and type(task).__call__ is BasePiiTask.__call__:
+                result = list(task(chunk, text))
+            else:
+                # (subclasses that redefine __call__ may not accept the text)
+                result = list(task(chunk))
+        except TimeoutError:
+            result = None
+        return result, perf_counter() - start
+
+
+    def _run_threads(self, tasks: List[BasePiiTask], chunk: DocumentChunk,
+                     text: ChunkText,
+                     bundle: RegexTaskBundle) -> List[Tuple]:
+        """
+        Execute a list of tasks over a chunk, using the thread pool. Bundled
+        tasks are executed together in a single thread, since they share
+        their regex scans
+          :return: the task results, in the same order as the task list
+        """
+        scan = {}
+        bundled = [t for t in tasks if bundle and t in bundle]
+
+        def run_bundled():
+            return [self._run_task(t, chunk, text, bundle, scan) for t in bundled]
+
+        futures = {t: self._executor.submit(self._run_task, t, chunk, text,
+                                            None, None)
+                   for t in tasks if not (bundle and t in bundle)}
+        result = dict(zip(bundled, run_bundled())) if bundled else {}
+        result.update((t, f.result()) for t, f in futures.items())
+        return [result[t] for t in tasks]
+
+
+    def _oversized(self, chunk: DocumentChunk) -> bool:
+        """
+        Check if a chunk is to be split into windows
+        """
+        return self._window is not None and len(chunk.data) > self._window[0]
+
+
+    def _windows(self, tasks: List[BasePiiTask],
+                 chunk: DocumentChunk) -> Tuple[List[Tuple], List[DocumentChunk], int]:
+        """
+        Split an oversized chunk into windows
+          :return: a tuple (window spans, window chunks, context margin)
+        """
+        # The window context must hold the context of every task
+        widths = [max(c["width"]) for t in tasks for c in t.context_specs()]
+        margin = max(widths + [WINDOW_CONTEXT])
+
+        spans = window_spans(chunk.data, *self._window)
+        windows = [window_chunk(chunk, start, end, margin)
+                   for start, end, _ in spans]
+        return spans, windows, margin
+
+
+    def _scan_window(self, tasks: List[BasePiiTask], wchunk: DocumentChunk,
+                     plan: ExecutionPlan) -> Tuple[List[Tuple], Dict]:
+        """
+        Execute a list of tasks over a window
+          :return: a tuple (task results, rejected candidates) for the window
+        """
+        text = ChunkText(wchunk, plan.keywords)
+        scan = {}
+        results = [self._run_task(t, wchunk, text, plan.bundle, scan)
+                   for t in tasks]
+        return results, text.rejected
+
+
+    def _run_windows(self, tasks: List[BasePiiTask], chunk: DocumentChunk,
+                     plan: ExecutionPlan, text: ChunkText) -> List[Tuple]:
+        """
+        Execute a list of tasks over an oversized chunk, by splitting it into
+        overlapping windows. Windows are scanned in the thread pool, if
+        available
+          :return: the task results for the whole chunk, in the same order
+            as the task list
+        """
+        spans, windows, margin = self._windows(tasks, chunk)
+        scan = partial(self._scan_window, tasks, plan=plan)
+        wresults = self._executor.map(scan, windows) if self._executor \
+            else map(scan, windows)
+        return self._merge_windows(tasks, chunk, plan, text, spans, margin,
+                                   wresults)
+
+
+    def _merge_windows(self, tasks: List[BasePiiTask], chunk: DocumentChunk,
+                       plan: ExecutionPlan, text: ChunkText, spans: List[Tuple],
+                       margin: int, wresults: Iterable[Tuple]) -> List[Tuple]:
+        """
+        Join the task results for the windows of a chunk. Entities are mapped
+        back to chunk positions, and those in overlap zones are taken only
+        from the window that owns them. The same goes for the candidates
+        rejected by context validation, which are added to the chunk text.
+
+        A window candidate that starts before the end of the last entity
+        taken (for the same task) from the previous window would overlap it,
+        and the matches that follow it may not be those of a scan over the
+        whole chunk; in that case the task is executed again over the window,
+        starting at the end of that entity.
+          :return: the task results for the whole chunk, in the same order
+            as the task list
+        """
+        found = [[] for _ in tasks]
+        elapsed = [0.0]*len(tasks)
+        last = [0]*len(tasks)    # end of the last entity taken, per task
+        for (start, end, limit), (wres, wrejected) in zip(spans, wresults):
+            for n, (result, wtime) in enumerate(wres):
+                task = tasks[n]
+                offset = start
+                rejected = wrejected.get(task, ())
+                if result and any(p.pos + start < last[n] for p in result):
+                    offset = last[n]
+                    wchunk = window_chunk(chunk, offset, end, margin)
+                    wtext = ChunkText(wchunk, plan.keywords)
+                    result, wtime2 = self._run_task(task, wchunk, wtext,
+                                                    None, None)
+                    wtime += wtime2
+                    rejected = wtext.rejected.get(task, ())
+                elapsed[n] += wtime
+                if result is None or found[n] is None:
+                    found[n] = None     # a timeout abandons the whole chunk
+                    continue
+                for pii in result:
+                    if pii.pos < limit - offset:
+                        pii.pos += offset
+                        found[n].append(pii)
+                        last[n] = max(last[n], pii.pos + len(pii))
+                text.rejected[task] += [pos + offset for pos in rejected
+                                        if pos < limit - offset]
+
+        self._stats["num"]["windows"] += len(spans)
+        return list(zip(found, elapsed))
+
+
+    async def _arun_task(self, task: BasePiiTask, chunk: DocumentChunk,
+                         text: ChunkText) -> Tuple[Optional[List[PiiEntity]], float]:
+        """
+        Execute a task over a chunk, in async mode: use the task afind()
+        method if available, else offload the task call to an executor
+          :return: a tuple (list of detected entities, elapsed time)
+        """
+        afind = getattr(task, "afind", None)
+        if afind is None:
+            return await self._arun_executor(self._run_task, task, chunk, text,
+                                             None, None)
+        start = perf_counter()
+        try:
+            result = await afind(chunk)
+        except TimeoutError:
+            return None, perf_counter() - start
+        if task.context:
+            result = task.filter_context(chunk, result, text)
+        return list(result), perf_counter() - start
+
+
+    async def _arun_executor(self, func: Callable, *args) -> Any:
+        """
+        Execute a function in the executor (the thread pool, if defined, else
+        the default executor). The function is submitted only when the
+        coroutine is awaited (e.g. within the concurrency limit)
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+
+    async def _arun_limited(self, job: Awaitable) -> Any:
+        """
+        Run an awaitable within the processor concurrency limit
+        """
+        if not self._max_concurrency:
+            return await job
+        loop = asyncio.get_running_loop()
+        sem = self._asem.get(loop)
+        if sem is None:
+            sem = self._asem[loop] = asyncio.Semaphore(self._max_concurrency)
+        async with sem:
+            return await job
+
+
+    async def _arun_tasks(self, tasks: List[BasePiiTask], chunk: DocumentChunk,
+                          plan: ExecutionPlan, text: ChunkText) -> List[Tuple]:
+        """
+        Execute a list of tasks over a chunk, in async mode. All the tasks are
+        executed concurrently (bundled tasks are executed together in a single
+        job)
+          :return: the task results, in the same order as the task list
+        """
+        bundle = plan.bundle
+
+        scan = {}
+        bundled = [t for t in tasks if bundle and t in bundle]
+        single = [t for t in tasks if not (bundle and t in bundle)]
+
+        def run_bundled():
+            return [self._run_task(t, chunk, text, bundle, scan) for t in bundled]
+
+        jobs = [self._arun_task(t, chunk, text) for t in single]
+        if bundled:
+            jobs.append(self._arun_executor(run_bundled))
+        done = await asyncio.gather(*map(self._arun_limited, jobs))
+
+        result = dict(zip(bundled, done.pop())) if bundled else {}
+        result.update(zip(single, done))
+        return [result[t] for t in tasks]
+
+
+    async def _adetect_chunk(self, chunk: DocumentChunk,
+                             default_lang: str = None) -> List[Tuple]:
+        """
+        Process a document chunk, in async mode
+        """
+        plan = self._get_plan(chunk, default_lang)
+        if self._chunk_cache is not None:
+            key, piilist = self._cache_get(chunk, plan)
+            if piilist is not None:
+                return piilist
+        torun = self._select_tasks(chunk, plan)
+        text = ChunkText(chunk, plan.keywords)
+
+        if self._oversized(chunk):
+            # (each window is a job; they are joined also in the executor,
+            # since some tasks may need to be executed again)
+            spans, windows, margin = self._windows(torun, chunk)
+            jobs = [self._arun_executor(self._scan_window, torun, w, plan)
+                    for w in windows]
+            wresults = await asyncio.gather(*map(self._arun_limited, jobs))
+            job = self._arun_executor(self._merge_windows, torun, chunk, plan,
+                                      text, spans, margin, wresults)
+            results = await self._arun_limited(job)
+        else:
+            results = await self._arun_tasks(torun, chunk, plan, text)
+
+        piilist = self._collect_results(chunk, plan, torun, results, text)
+        if self._chunk_cache is not None:
+            self._cache_put(key, results, piilist)
+        return piilist
+
+
+    async def adetect_chunk(self, chunk: DocumentChunk,
+                            piic: PiiCollectionBuilder,
+                            default_lang: str = None) -> int:
+        """
+        Process a document chunk, in async mode
+          :param chunk: document chunk to analyze
+          :param piic: collection to add the detected PII instances to
+          :param default_lang: language to use, if the chunk does not define one
+        """
+        piilist = await self._adetect_chunk(chunk, default_lang)
+        for pii, detector in piilist:
+            piic.add(pii, detector)
         return len(piilist)
 
 
+    async def adetect(self, doc: SrcDocument,
+                      chunk_context: bool = False) -> PiiCollection:
+        """
+        Process a document, in async mode. Tasks that define an afind()
+        coroutine are awaited; all other tasks are executed in an executor
+        (the thread pool, if defined, else the default executor). Several
+        documents can be processed concurrently in the same event loop
+          :param doc: document to analyze
+          :param chunk_context: when iterating over the document, add contexts
+            to chunks
+        """
+        piicol, lang = self._new_collection(doc)
+        for chunk in doc.iter_full(context=chunk_context):
+            await self.adetect_chunk(chunk, piicol, default_lang=lang)
+        return piicol
+
+
+    def _detect_pool(self, chunks: Iterable[DocumentChunk], lang: str,
+                     batch_size: int = 32) -> Iterable[List[Tuple]]:
+        """
+        Process a sequence of chunks using the worker pool. Chunks are sent in
+        batches (with their context converted to plain dicts, so that they can
+        be pickled), and results are returned in the same order. Only a limited
+        number of batches are in flight at any time, so that pending results
+        do not pile up if they are consumed slower than they are produced
+        """
+        if self._pool is None:
+            ctx = mp.get_context()
+            self._pool = ctx.Pool(self._workers, initializer=_worker_init,
+                                  initargs=(self._init_args, self._json_tasks,
+                                            self._build_args))
+        detect = partial(_worker_detect, default_lang=lang)
+        chunks = map(_pool_chunk, chunks)
+        batches = iter(lambda: list(islice(chunks, batch_size)), [])
+        pending = deque()
+        for batch in batches:
+            pending.append(self._pool.apply_async(detect, (batch,)))
+            if len(pending) < MAX_POOL_BATCHES*self._workers:
+                continue
+            yield from self._pool_result(pending.popleft())
+        while pending:
+            yield from self._pool_result(pending.popleft())
+
+
+    def _pool_result(self, job: mp.pool.AsyncResult) -> List[List[Tuple]]:
+        """
+        Wait for the result of a batch sent to the worker pool, and add its
+        stats to the worker stats
+        """
+        result, stats = job.get()
+        merge_stats(self._worker_stats, stats)
+        return result
+
+
+    def _close_pool(self):
+        """
+        Terminate the worker pool, if there is one
+        """
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+
+    def close(self):
+        """
+        Release the execution resources: worker processes & threads
+        """
+        self._close_pool()
+        if self._executor is not None:
+            self._executor.shutdown()
+
+
+    def __enter__(self) -> "PiiProcessor":
+        return self
+
+
+    def __exit__(self, *args):
+        self.close()
+
+
     def detect(self, doc: SrcDocument,
                chunk_context: bool = False) -> PiiCollection:
         """
@@ -267,6 +1146,227 @@ class PiiProcessor:
           :param chunk_context: when iterating over the document, add contexts
             to chunks
         """
+        piicol, lang = self._new_collection(doc)
+        for piilist in self._iter_results(doc.iter_full(context=chunk_context),
+                                           lang):
+            for pii, detector in piilist:
+                piicol.add(pii, detector)
+        return piicol
+
+
+    def iter_detect(self, doc: SrcDocument,
+                    chunk_context: bool = False) -> Iterable[Tuple[PiiEntity, PiiDetector]]:
+        """
+        Process a document, and produce the detected PII entities as they are
+        found (chunk by chunk, in document order), together with the detector
+        that produced them. Memory use does not depend on document size.
+          :param doc: document to analyze
+          :param chunk_context: when iterating over the document, add contexts
+            to chunks
+        """
+        _, lang = self._new_collection(doc)
+        for piilist in self._iter_results(doc.iter_full(context=chunk_context),
+                                           lang):
+            yield from piilist
+
+
+    def get_detectors(self, lang: str = None) -> List[PiiDetector]:
+        """
+        Return the list of all the detectors that the built tasks can produce
+          :param lang: return only those for the tasks built for this language
+        """
+        plans = [self._plans[lang]] if lang in self._plans \
+            else [] if lang else self._plans.values()
+        out = {}
+        for plan in plans:
+            for det in plan.detector_list():
+                out.setdefault(det._id, det)
+        return list(out.values())
+
+
+    def _iter_results(self, chunks: Iterable[DocumentChunk],
+                      lang: str) -> Iterable[List[Tuple]]:
+        """
+        Process a sequence of document chunks, and produce the results for
+        each one
+        """
+        if self._workers:
+            yield from self._detect_pool(chunks, lang)
+        elif self._batching:
+            for batch in self._batches((0, c) for c in chunks):
+                yield from self._detect_batch([c for _, c in batch],
+                                              [lang]*len(batch))
+        else:
+            yield from self._detect_chunks(chunks, lang)
+
+
+    def redetect(self, doc: SrcDocument, previous: PiiCollection = None,
+                 hashes: Dict[str, str] = None,
+                 chunk_context: bool = False) -> Tuple[PiiCollection, Dict[str, str]]:
+        """
+        Process a new version of a document, reusing the results obtained for
+        a previous version. Tasks are executed only over new or modified
+        chunks; entities in unchanged chunks are carried over from the
+        previous collection, and those in removed chunks are dropped.
+          :param doc: document to analyze
+          :param previous: the PII collection for the previous version
+          :param hashes: the chunk hashes returned for the previous version
+          :param chunk_context: when iterating over the document, add contexts
+            to chunks (must be the same as for the previous version)
+          :return: a tuple (PII collection, chunk hashes for the document)
+
+        Chunk hashes cover the chunk text (plus its context, if added) and
+        the built tasks, so a chunk is also processed again if the tasks
+        change. A first version of a document can be processed by calling
+        this method without the `previous` & `hashes` arguments.
+        """
+        piicol, lang = self._new_collection(doc)
+        if previous is None:
+            hashes = None
+
+        # Previous chunks and their entities
+        old_chunk = {h: cid for cid, h in reversed(list((hashes or {}).items()))}
+        old_pii = defaultdict(list)
+        for pii in previous or []:
+            old_pii[str(pii.fields["chunkid"])].append(pii)
+
+        # Compute the chunk hashes, and find out the chunks that need detection
+        chunks = list(doc.iter_full(context=chunk_context))
+        new_hashes = {}
+        todo = []
+        for chunk in chunks:
+            plan = self._get_plan(chunk, lang)
+            h = new_hashes[str(chunk.id)] = chunk_hash(chunk, plan.fingerprint).hex()
+            if h not in old_chunk:
+                todo.append(chunk)
+
+        # Assemble the results, in document order
+        rstats = self._stats.setdefault("redetect", defaultdict(int))
+        results = self._iter_results(todo, lang)
+        for chunk in chunks:
+            oldid = old_chunk.get(new_hashes[str(chunk.id)])
+            if oldid is None:
+                for pii, detector in next(results):
+                    piicol.add(pii, detector)
+                rstats["detected"] += 1
+                continue
+            reused = [clone_entity(p, chunk.id) for p in old_pii[oldid]]
+            self._count_entities(reused)
+            for old, pii in zip(old_pii[oldid], reused):
+                piicol.add(pii, previous.get_detector(old.fields["detector"]))
+            rstats["reused"] += 1
+
+        return piicol, new_hashes
+
+
+    def detect_batch(self, docs: Iterable[SrcDocument],
+                     chunk_context: bool = False) -> List[PiiCollection]:
+        """
+        Process a list of documents. The chunks in all documents are
+        grouped in batches (limited by the `batch_size` & `batch_tokens`
+        processor options), and tasks that define a find_batch() method are
+        called once per batch
+          :param docs: documents to analyze
+          :param chunk_context: when iterating over the documents, add contexts
+            to chunks
+          :return: a list of PiiCollection objects, one per document
+        """
+        docs = list(docs)
+        cols = [self._new_collection(doc) for doc in docs]
+        chunks = ((n, chunk) for n, doc in enumerate(docs)
+                  for chunk in doc.iter_full(context=chunk_context))
+        for batch in self._batches(chunks):
+            langs = [cols[n][1] for n, _ in batch]
+            result = self._detect_batch([c for _, c in batch], langs)
+            for (n, _), piilist in zip(batch, result):
+                for pii, detector in piilist:
+                    cols[n][0].add(pii, detector)
+        return [c[0] for c in cols]
+
+
+    def _batches(self, chunks: Iterable[Tuple[int, DocumentChunk]]) -> Iterable[List]:
+        """
+        Group a sequence of chunks into batches, according to the batch limits
+        """
+        size = self._batch_size or DEFAULT_BATCH_SIZE
+        budget = self._batch_tokens
+        batch, tokens = [], 0
+        for item in chunks:
+            ntok = len(item[1].data.split()) if budget else 0
+            if batch and (len(batch) >= size or
+                          (budget and tokens + ntok > budget)):
+                yield batch
+                batch, tokens = [], 0
+            batch.append(item)
+            tokens += ntok
+        if batch:
+            yield batch
+
+
+    def _detect_batch(self, chunks: List[DocumentChunk],
+                      langs: List[str]) -> List[List[Tuple]]:
+        """
+        Process a batch of chunks. Tasks that define find_batch() are called
+        once with all the chunks in the batch they apply to; the rest of the
+        tasks are called for each chunk.
+          :return: the list of results for each chunk
+        """
+        plans = [self._get_plan(c, l) for c, l in zip(chunks, langs)]
+
+        # Fetch the chunks already in the cache
+        keys = cached = [None]*len(chunks)
+        if self._chunk_cache is not None:
+            keys, cached = zip(*map(self._cache_get, chunks, plans))
+        selected = [self._select_tasks(c, p) if r is None else []
+                    for c, p, r in zip(chunks, plans, cached)]
+
+        # Execute the batch-capable tasks over all the chunks that need them
+        tchunks = defaultdict(list)
+        for n, torun in enumerate(selected):
+            for task in torun:
+                if hasattr(task, "find_batch"):
+                    tchunks[task].append(n)
+        bresult = {}
+        for task, idx in tchunks.items():
+            start = perf_counter()
+            try:
+                found = task.find_batch([chunks[n] for n in idx])
+            except TimeoutError:
+                found = [None]*len(idx)
+            # (the batch time is evenly distributed across its chunks)
+            elapsed = (perf_counter() - start)/len(idx)
+            bresult.update(((task, n), (r, elapsed)) for n, r in zip(idx, found))
+
+        # Add the rest of the tasks, and process results for each chunk
+        out = []
+        for n, (chunk, plan, torun) in enumerate(zip(chunks, plans, selected)):
+            if cached[n] is not None:
+                out.append(cached[n])
+                continue
+            text = ChunkText(chunk, plan.keywords)
+            others = [t for t in torun if (t, n) not in bresult]
+            result = dict(zip(others, self._execute(others, chunk, plan, text)))
+            for task in torun:
+                if task in result:
+                    continue
+                found, elapsed = bresult[task, n]
+                if found is not None and task.context:
+                    start = perf_counter()
+                    found = list(task.filter_context(chunk, found, text))
+                    elapsed += perf_counter() - start
+                result[task] = (None if found is None else list(found)), elapsed
+            results = [result[t] for t in torun]
+            out.append(self._collect_results(chunk, plan, torun, results, text))
+            if self._chunk_cache is not None:
+                self._cache_put(keys[n], results, out[-1])
+        return out
+
+
+    def _new_collection(self, doc: SrcDocument) -> Tuple[PiiCollectionBuilder, str]:
+        """
+        Start processing a document: find out its language and create the
+        collection for its results
+        """
         if self._tasks is None:
             raise ProcException("no built detector tasks")
         self._log(".. Detect document=%s", doc.id)
@@ -280,11 +1380,7 @@ class PiiProcessor:
         elif not check_language(lang, self._tasks.keys()):
             raise InvArgException("incompatible document language for extraction")
 
-        piicol = PiiCollectionBuilder(lang=lang, docid=doc.id)
-        for chunk in doc.iter_full(context=chunk_context):
-            self.detect_chunk(chunk, piicol, default_lang=lang)
-
-        return piicol
+        return PiiCollectionBuilder(lang=lang, docid=doc.id), lang
 
 
     def __call__(self, doc: SrcDocument, **kwargs) -> PiiCollection:
@@ -296,6 +1392,63 @@ class PiiProcessor:
 
     def get_stats(self) -> Dict:
         """
-        Get statistics over processing calls
+        Get statistics over processing calls. Apart from the processor
+        statistics, it includes the counters kept by the built tasks,
+        aggregated per section, e.g.
+          - prefilter: number of chunks in which regex tasks were skipped by
+            their prefilter ("hit") or had to run the full regex ("miss")
+        If any task exceeded its time budget, a "timeout" section contains
+        the number of abandoned chunks per task name.
+        If the on-disk regex cache is active, its counters are also added.
+        If the chunk cache is active, a "chunk_cache" section has its "hit",
+        "miss" and "evicted" counters.
+        If overlap resolution is active, an "overlap" section has the number
+        of entities "removed" or "merged".
+        If the processor was created with `task_stats`, there are also:
+          - task: counters per task name: processed chunks, scanned chars,
+            execution time (in seconds), raw candidates, candidates rejected
+            by context validation, and emitted entities
+          - task_latency: a histogram of execution times per task name
+          - chunk_latency: a histogram of the total task execution time
+            per chunk
+        When using worker processes, their stats are aggregated.
+        """
+        stats = merge_stats({}, self._stats)
+        tset = set()
+        for task in chain.from_iterable(self._tasks.values()):
+            if task in tset:
+                continue
+            tset.add(task)
+            merge_stats(stats, getattr(task, "stats", {}))
+            tstats = stats.get("task", {}).get(task.task_info.name)
+            if tstats is not None:
+                tstats["rejected"] += task.context_rejected
+        for tstats in stats.get("task", {}).values():
+            tstats["candidates"] = tstats["entities"] + tstats["rejected"]
+        if self._chunk_cache is not None:
+            merge_stats(stats, {"chunk_cache": self._chunk_cache.stats})
+        if self._overlap:
+            merge_stats(stats, {"overlap": self._overlap.stats})
+        merge_stats(stats, self._worker_stats)
+        cache_stats = regex_cache_stats()
+        if cache_stats:
+            stats["regex_cache"] = cache_stats
+        return stats
+
+
+    def _pop_stats(self) -> Dict:
+        """
+        Get the detection stats, and reset all the counters
         """
-        return self._stats
+        stats = self.get_stats()
+        stats.pop("regex_cache", None)
+        self._stats = self._new_stats()
+        if self._chunk_cache is not None:
+            self._chunk_cache.stats.clear()
+        if self._overlap:
+            self._overlap.stats.clear()
+        for task in chain.from_iterable(self._tasks.values()):
+            task.context_rejected = 0
+            for values in getattr(task, "stats", {}).values():
+                values.clear()
+        return stats
@@ -3,6 +3,7 @@ Command-line script to show information about available plugins,
 languages & tasks
 """
 
+import os
 import sys
 import argparse
 from textwrap import TextWrapper
@@ -15,6 +16,7 @@ from .. import VERSION, defs
 from ..gather.collection.sources import PluginTaskCollector
 from ..api import PiiProcessor
 from ..api.file import print_tasks
+from ..helper.regex_cache import RegexCache, CACHE_ENV, get_regex_cache
 
 
 def print_plugins(args: argparse.Namespace, out: TextIO, debug: bool = False):
@@ -83,6 +85,32 @@ def task_info(args: argparse.Namespace, out: TextIO):
     print_tasks(args.lang or [], proc, out)
 
 
+def regex_cache(args: argparse.Namespace, out: TextIO):
+    """
+    Manage the on-disk cache of compiled regex patterns
+    """
+    # (use the same folder that detection uses, unless told otherwise)
+    cache = RegexCache(args.cache_dir) if args.cache_dir else \
+        get_regex_cache() or RegexCache()
+    if args.action == "clear":
+        num = cache.clear()
+        print(f". Removed {num} cached patterns from {cache.path}", file=out)
+    elif args.action == "warm":
+        # Build all the tasks, with the cache activated
+        os.environ[CACHE_ENV] = str(cache.path)
+        config = load_config(args.config) if args.config else None
+        proc = PiiProcessor(config=config, skip_plugins=args.skip_plugins,
+                            languages=args.lang, debug=args.debug)
+        for lang in args.lang or proc.language_list():
+            proc.build_tasks(lang, args.country)
+        stats = proc.get_stats().get("regex_cache", {})
+        print(f". Regex cache at {cache.path}: {cache.size()} patterns",
+              f"({stats.get('miss', 0)} added)", file=out)
+    else:
+        print(f". Regex cache at {cache.path}: {cache.size()} patterns",
+              file=out)
+
+
 def parse_args(args: List[str]) -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description=f"Show information about usable PII tasks (version {VERSION})")
@@ -125,6 +153,13 @@ def parse_args(args: List[str]) -> argparse.Namespace:
     s2.add_argument("--plugins", metavar="PLUGIN_NAME", nargs="+",
                     help="specific plugins to load")
 
+    s3 = subp.add_parser("regex-cache", parents=[opt_com1, opt_com2, opt_com3],
+                         help="Manage the on-disk cache of compiled regex patterns")
+    s3.add_argument("action", choices=("info", "warm", "clear"),
+                    help="show cache size, fill it by building all tasks, or empty it")
+    s3.add_argument("--cache-dir",
+                    help="cache location (default: from the environment, or the user cache folder)")
+
     parsed = parser.parse_args(args)
     if not parsed.cmd:
         parser.print_usage()
@@ -142,6 +177,8 @@ def main(args: List[str] = None):
             print_plugins(args, sys.stdout)
         elif args.cmd == "list-languages":
             print_languages(args, sys.stdout)
+        elif args.cmd == "regex-cache":
+            regex_cache(args, sys.stdout)
         else:
             task_info(args, sys.stdout)
     except Exception as e:
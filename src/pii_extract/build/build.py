@@ -81,4 +81,9 @@ def build_task(taskd: Dict, config: Dict = None,
     else:
         raise InvArgException("invalid pii task type for {}: {}",
                               taskd["piid"].get("pii"), tclass)
+
+    # Add the chunk features required by the task, if any
+    requires = odef.get("requires")
+    if requires:
+        proc.requires = requires
     return proc
@@ -2,3 +2,4 @@ from .base import PiiTaskInfo, BasePiiTask, dbg_msg, dbg_task, dbg_item  # noqa:
 from .multi import BaseMultiPiiTask     # noqa: F401
 from .callable import CallablePiiTask   # noqa: F401
 from .regex import RegexPiiTask         # noqa: F401
+from .bundle import RegexTaskBundle     # noqa: F401
@@ -2,9 +2,10 @@
 Define the base classes for Pii Tasks
 """
 import sys
+import threading
 from dataclasses import dataclass, fields
 
-from typing import Iterable, Dict, Any, List
+from typing import Iterable, Dict, Any, List, Union
 
 from pii_data.helper.misc import filter_dict
 from pii_data.helper.exception import InvArgException
@@ -12,8 +13,8 @@ from pii_data.types import PiiEntityInfo, PiiEntity
 from pii_data.types.doc import DocumentChunk
 
 from ...helper.exception import PiiUnimplemented
-from ...helper.normalizer import normalize
-from ...helper.context import context_spec, context_check
+from ...helper.context import (context_spec, context_check, ContextText,
+                               ChunkText)
 
 
 def dbg_msg(msg: str, *args, out=None):
@@ -78,8 +79,33 @@ class PiiTaskInfo:
 class BasePiiTask:
     """
     Base class for a Pii Detector Task
+
+    Subclasses can optionally define an `afind(chunk)` coroutine, an async
+    version of find(). The processor will use it in async mode (adetect);
+    otherwise the task is executed in an executor.
+
+    They can also define a `find_batch(chunks)` method, which receives a list
+    of chunks and returns a list with the results for each one of them. The
+    processor will use it when processing documents in batches.
     """
 
+    # Chunk features required by the task (see helper.profile)
+    requires = None
+
+    # Shared index of context keywords (set by the processor)
+    context_keywords = None
+
+    # If the task can find its candidates over a buffer of coalesced chunks
+    coalesce = False
+
+    # Number of candidates rejected by context validation (when validating
+    # without a ChunkText from the caller, which otherwise records them)
+    context_rejected = 0
+
+    # Lock for updating the task counters, since a task may be executed in
+    # several threads at once (each task instance has its own)
+    _lock = threading.Lock()
+
     def __init__(self, task: Dict, pii: Dict, config: Dict = None,
                  debug: bool = False):
         """
@@ -101,6 +127,7 @@ class BasePiiTask:
                     if k not in ("method", "extra", "context")}
 
         # Store options
+        self._lock = threading.Lock()
         self.config = config
         self.debug = debug
         self.task_info = PiiTaskInfo(**task)
@@ -153,7 +180,15 @@ class BasePiiTask:
         return defaults
 
 
-    def check_context(self, text: str, pii: PiiEntity, prefix: int = 0) -> bool:
+    def context_specs(self) -> List[Dict]:
+        """
+        Return the list of context specifications used by the task
+        """
+        return [self.context] if self.context else []
+
+
+    def check_context(self, text: Union[str, ContextText], pii: PiiEntity,
+                      prefix: int = 0) -> bool:
         """
         Check that a pii candidate has the required context around it
         """
@@ -162,33 +197,46 @@ class BasePiiTask:
                              debug=self.debug)
 
 
-    def find_context(self, chunk: DocumentChunk) -> Iterable[PiiEntity]:
+    def find_context(self, chunk: DocumentChunk,
+                     text: ChunkText = None) -> Iterable[PiiEntity]:
         """
         Wrap over the standard find() method and filter out the occcurences
         that do not match the desired context around them
+          :param chunk: the document chunk
+          :param text: the derived texts for the chunk, if already available
         """
-        ndoc = None
-        for pii in self.find(chunk):
+        return self.filter_context(chunk, self.find(chunk), text)
 
-            # Extract the text to search the context in
-            if ndoc is None:
 
-                # Enlarge with the neighboring chunks, if they are available
-                if chunk.context:
-                    bf = chunk.context.get("before", "")
-                    fulltext = bf + chunk.data + chunk.context.get("after", "")
-                    prefix = len(bf)
-                else:
-                    fulltext = chunk.data
-                    prefix = 0
+    def filter_context(self, chunk: DocumentChunk,
+                       candidates: Iterable[PiiEntity],
+                       text: ChunkText = None) -> Iterable[PiiEntity]:
+        """
+        Filter out the PII candidates found in a chunk that do not match the
+        desired context around them. Rejected candidates are recorded in the
+        ChunkText, if given, else counted in the task
+        """
+        ndoc = None
+        own = text is None
+        for pii in candidates:
 
-                # Normalize (lowercase) the text for the context
-                lang = pii.info.lang
-                ndoc = normalize(fulltext, lang, lowercase=True)
+            # Fetch the (normalized & extended) text to search the context in
+            if ndoc is None:
+                if own:
+                    text = ChunkText(chunk, self.context_keywords)
+                ndoc = text.context(pii.info.lang)
+                # (subclasses that redefine check_context() get a string)
+                if type(self).check_context is not BasePiiTask.check_context:
+                    ndoc = ndoc.raw
 
             # Check if the context is there
-            if self.check_context(ndoc, pii, prefix):
+            if self.check_context(ndoc, pii, text.prefix):
                 yield pii
+            elif not own:
+                text.rejected[self].append(pii.pos)
+            else:
+                with self._lock:
+                    self.context_rejected += 1
 
 
     def find(self, chunk: DocumentChunk) -> Iterable[PiiEntity]:
@@ -198,12 +246,19 @@ class BasePiiTask:
         raise PiiUnimplemented("missing implementation for Pii Task")
 
 
-    def __call__(self, chunk: DocumentChunk) -> Iterable[PiiEntity]:
+    def __call__(self, chunk: DocumentChunk,
+                 text: ChunkText = None) -> Iterable[PiiEntity]:
         """
         Perform Pii extraction on a document chunk
+          :param chunk: the document chunk
+          :param text: the derived texts for the chunk, shared across tasks
         """
-        mth = self.find_context if self.context else self.find
-        return mth(chunk)
+        if not self.context:
+            return self.find(chunk)
+        # (subclasses that redefine find_context() may not accept the text)
+        if text is None or type(self).find_context is not BasePiiTask.find_context:
+            return self.find_context(chunk)
+        return self.find_context(chunk, text)
 
 
     def __repr__(self) -> str:
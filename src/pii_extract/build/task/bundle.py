@@ -0,0 +1,91 @@
+"""
+Define the RegexTaskBundle class: an execution helper that deduplicates
+identical regex patterns across the regex tasks built for a language. Tasks
+with the same pattern (and flags & timeout) share a single scan of each chunk,
+and the matches are distributed to all of them. Different patterns are not
+combined: each one still scans the chunk on its own
+"""
+
+from typing import Dict, List, Iterable, Tuple
+
+from pii_data.types import PiiEntity
+from pii_data.types.doc import DocumentChunk
+
+from ...helper.context import ChunkText
+from .base import BasePiiTask
+from .regex import RegexPiiTask
+
+
+TYPE_SCAN = Dict[Tuple[str, int, float], List]
+
+
+class RegexTaskBundle:
+    """
+    A bundle of RegexPiiTask objects, grouped by identical pattern.
+    Tasks compiled from the same pattern (e.g. the same regex used for
+    several countries, or with different contexts) share a single scan of
+    each chunk; tasks with a unique pattern are left out of the bundle. The
+    PiiEntity objects produced for each task are the same as if the task had
+    been called on its own.
+
+    Note: the bundle only takes plain RegexPiiTask objects; subclasses that
+    redefine find() are executed on their own.
+    """
+
+    def __init__(self, tasks: Iterable[BasePiiTask]):
+        """
+          :param tasks: the task list to bundle (non-regex tasks are ignored)
+        """
+        self._owner = {}
+        groups = {}
+        for task in tasks:
+            if type(task) is RegexPiiTask:
+                key = task.regex.pattern, task.regex.flags, task.timeout
+                groups.setdefault(key, set()).add(task)
+
+        # Only patterns shared by more than one task will gain from bundling
+        for key, tlist in groups.items():
+            if len(tlist) > 1:
+                self._owner.update((t, key) for t in tlist)
+        self._num = sum(len(t) > 1 for t in groups.values())
+
+
+    def __repr__(self) -> str:
+        return f"<RegexTaskBundle #{len(self._owner)}/{self._num}>"
+
+
+    def __len__(self) -> int:
+        """
+        Return the number of bundled tasks
+        """
+        return len(self._owner)
+
+
+    def __contains__(self, task: BasePiiTask) -> bool:
+        return task in self._owner
+
+
+    def __call__(self, task: RegexPiiTask, chunk: DocumentChunk,
+                 scan: TYPE_SCAN, text: ChunkText = None) -> Iterable[PiiEntity]:
+        """
+        Execute a bundled task over a document chunk
+          :param task: the task to execute
+          :param chunk: the document chunk
+          :param scan: a dictionary that holds the regex matches for the
+            chunk; it must be a fresh one for each new chunk
+          :param text: the derived texts for the chunk, if available
+        """
+        key = self._owner[task]
+        matches = scan.get(key)
+        if matches is None:
+            try:
+                matches = scan[key] = list(task.scan(chunk.data))
+            except TimeoutError:
+                # all the tasks in the group will also time out
+                scan[key] = TimeoutError
+                raise
+        elif matches is TimeoutError:
+            raise TimeoutError("regex timeout (shared scan)")
+
+        pii = task.find_matches(chunk, matches)
+        return task.filter_context(chunk, pii, text) if task.context else pii
@@ -7,7 +7,7 @@ from typing import Union, Dict, List, Iterable
 from pii_data.types import PiiEnum, PiiEntityInfo, PiiEntity
 
 from ...helper.exception import InvArgException
-from ...helper.context import context_spec, context_check
+from ...helper.context import context_spec, context_check, ContextText
 from .base import PiiTaskInfo, BasePiiTask
 
 TYPE_KEY = Union[PiiEnum, PiiEntityInfo]
@@ -114,7 +114,15 @@ class BaseMultiPiiTask(BasePiiTask):
             raise InvArgException("no PII info in multitask for {}", key)
 
 
-    def check_context(self, text: str, pii: PiiEntity, prefix: int = 0) -> bool:
+    def context_specs(self) -> List[Dict]:
+        """
+        Return the list of context specifications used by the task
+        """
+        return list(self.context.values())
+
+
+    def check_context(self, text: Union[str, ContextText], pii: PiiEntity,
+                      prefix: int = 0) -> bool:
         """
         Check that a pii candidate has the required context around it
         Modify the base class context check by enabling multiple contexts, one
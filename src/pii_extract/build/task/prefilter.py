@@ -0,0 +1,329 @@
+"""
+Derive a cheap necessary condition from a regex pattern: literal strings
+and/or character classes that must appear in any text the regex can match.
+It is used to skip chunks in which the full regex cannot produce any match.
+
+It also checks if a regex produces the same matches when run over a buffer
+of chunks joined by a separator, as when run over each chunk on its own.
+
+The pattern is analysed with the parser of the standard "re" module. Any
+pattern it cannot parse (or that uses "regex"-only syntax the standard parser
+would misinterpret) produces no prefilter, and is not considered safe across
+separators.
+"""
+
+import re
+import warnings
+
+import regex
+
+from typing import List, Union, Tuple, Optional
+
+try:
+    import re._parser as sre_parse
+    import re._constants as sre_const
+except ImportError:     # Python < 3.11
+    import sre_parse
+    import sre_constants as sre_const
+
+
+# Patterns that use "regex"-only syntax that the standard parser would
+# accept with a different meaning: POSIX classes & fuzzy matching
+_UNSUPPORTED = regex.compile(r"""
+   \[:  |
+   \{ [^}]*? (?<![\w]) [deis] \s* (?: <=? | >=? | = | [,}] )
+""", flags=regex.X)
+
+_CATEGORY = {
+    sre_const.CATEGORY_DIGIT: r"\d",
+    sre_const.CATEGORY_WORD: r"\w",
+    sre_const.CATEGORY_SPACE: r"\s",
+}
+_CATEGORY_NOT = {
+    sre_const.CATEGORY_NOT_DIGIT: r"\D",
+    sre_const.CATEGORY_NOT_WORD: r"\W",
+    sre_const.CATEGORY_NOT_SPACE: r"\S",
+}
+
+# Maximum number of atoms in a prefilter, and of alternatives in an atom
+MAX_ATOMS = 3
+MAX_ALT = 4
+
+_REPEAT = (sre_const.MAX_REPEAT, sre_const.MIN_REPEAT,
+           getattr(sre_const, "POSSESSIVE_REPEAT", None))
+
+# An atom is a literal string, a character class, or a tuple of atoms (any
+# of which must be present)
+TYPE_ATOM = Union[str, regex.Pattern, Tuple]
+
+
+def _charclass(items: List) -> Optional[regex.Pattern]:
+    """
+    Rebuild a character class from its parsed representation. Return None
+    for classes we do not want to use (negated or unrecognized elements)
+    """
+    out = []
+    for op, av in items:
+        if op is sre_const.LITERAL:
+            out.append(regex.escape(chr(av)))
+        elif op is sre_const.RANGE:
+            out.append(regex.escape(chr(av[0])) + "-" + regex.escape(chr(av[1])))
+        elif op is sre_const.CATEGORY and av in _CATEGORY:
+            out.append(_CATEGORY[av])
+        else:
+            return None
+    return regex.compile("[" + "".join(out) + "]")
+
+
+def _atom_best(atoms: List[TYPE_ATOM]) -> Optional[TYPE_ATOM]:
+    """
+    Select the most selective element of a list of required atoms
+    """
+    literals = [a for a in atoms if isinstance(a, str)]
+    if literals:
+        return max(literals, key=len)
+    return atoms[0] if atoms else None
+
+
+def _seq_atoms(seq: List) -> List[TYPE_ATOM]:
+    """
+    Extract the list of required atoms from a parsed regex sequence
+    """
+    atoms = []
+    run = []
+
+    def flush():
+        if run:
+            atoms.append("".join(run))
+            run.clear()
+
+    for op, av in seq:
+
+        if op is sre_const.LITERAL:
+            run.append(chr(av))
+            continue
+
+        flush()
+        if op is sre_const.IN:
+            cls = _charclass(av)
+            if cls:
+                atoms.append(cls)
+        elif op in _REPEAT:
+            if av[0] > 0:
+                atoms += _seq_atoms(av[2])
+        elif op is sre_const.SUBPATTERN:
+            if not av[1] & sre_const.SRE_FLAG_IGNORECASE:
+                atoms += _seq_atoms(av[-1])
+        elif op is getattr(sre_const, "ATOMIC_GROUP", None):
+            atoms += _seq_atoms(av)
+        elif op is sre_const.BRANCH:
+            alts = [_atom_best(_seq_atoms(a)) for a in av[1]]
+            if alts and all(alts):
+                atoms.append(tuple(dict.fromkeys(alts)))
+
+    flush()
+    return atoms
+
+
+def _check(atom: TYPE_ATOM, text: str) -> bool:
+    """
+    Check if a required atom is present in a text
+    """
+    if isinstance(atom, str):
+        return atom in text
+    elif isinstance(atom, tuple):
+        return any(_check(a, text) for a in atom)
+    else:
+        return atom.search(text) is not None
+
+
+def _atom_repr(atom: TYPE_ATOM) -> str:
+    if isinstance(atom, tuple):
+        return "(" + "|".join(map(_atom_repr, atom)) + ")"
+    return atom if isinstance(atom, str) else atom.pattern
+
+
+# --------------------------------------------------------------------------
+
+
+class RegexPrefilter:
+    """
+    A necessary condition for a regex to match a text: a list of atoms
+    (literals or character classes) that must all be present in the text
+    """
+
+    def __init__(self, atoms: List[TYPE_ATOM]):
+        self.atoms = atoms
+
+
+    def __repr__(self) -> str:
+        return "<RegexPrefilter " + " ".join(map(_atom_repr, self.atoms)) + ">"
+
+
+    def __call__(self, text: str) -> bool:
+        """
+        Check the condition over a text
+          :return: False if the regex cannot match the text
+        """
+        return all(_check(a, text) for a in self.atoms)
+
+
+def regex_prefilter(pattern: str,
+                    flags: int = re.X) -> Optional[RegexPrefilter]:
+    """
+    Analyse a regex pattern and produce a prefilter for it
+      :param pattern: the regex pattern
+      :param flags: flags for the pattern (only the VERBOSE flag is used)
+      :return: a prefilter object, or None if no condition could be found
+    """
+    if _UNSUPPORTED.search(pattern):
+        return None
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            parsed = sre_parse.parse(pattern, flags & re.X)
+    except Exception:
+        return None
+    if parsed.state.flags & (re.IGNORECASE | re.ASCII):
+        return None
+
+    atoms = _seq_atoms(list(parsed))
+
+    # Keep the longest literal, then the distinct classes, then the short
+    # alternatives (each alternative costs one more scan)
+    literals = [a for a in atoms if isinstance(a, str)]
+    classes = [a for a in atoms if isinstance(a, regex.Pattern)]
+    alts = [a for a in atoms if isinstance(a, tuple) and len(a) <= MAX_ALT]
+    keep = [max(literals, key=len)] if literals else []
+    keep += list(dict.fromkeys(classes + alts))
+    return RegexPrefilter(keep[:MAX_ATOMS]) if keep else None
+
+
+# --------------------------------------------------------------------------
+
+
+def _char_match(op, av, char: str) -> bool:
+    """
+    Check if a single-character regex element can match a given character.
+    Unrecognized elements are assumed to match
+    """
+    c = ord(char)
+    if op is sre_const.LITERAL:
+        return av == c
+    elif op is sre_const.NOT_LITERAL:
+        return av != c
+    elif op is not sre_const.IN:
+        return True
+    negate = found = False
+    for iop, iav in av:
+        if iop is sre_const.NEGATE:
+            negate = True
+        elif iop is sre_const.LITERAL:
+            found |= iav == c
+        elif iop is sre_const.RANGE:
+            found |= iav[0] <= c <= iav[1]
+        elif iop is sre_const.CATEGORY and iav in _CATEGORY:
+            found |= re.match(_CATEGORY[iav], char) is not None
+        elif iop is sre_const.CATEGORY and iav in _CATEGORY_NOT:
+            found |= re.match(_CATEGORY_NOT[iav], char) is not None
+        else:
+            return True
+    return found != negate
+
+
+def _seq_consumes(seq: List, chars: str) -> bool:
+    """
+    Check if a parsed regex sequence may consume any of a set of characters
+    """
+    for op, av in seq:
+        if op in (sre_const.LITERAL, sre_const.NOT_LITERAL, sre_const.IN,
+                  sre_const.ANY):
+            if any(_char_match(op, av, c) for c in chars):
+                return True
+        elif op is sre_const.AT:
+            continue
+        elif op in _REPEAT:
+            if _seq_consumes(av[2], chars):
+                return True
+        elif op is sre_const.SUBPATTERN:
+            if _seq_consumes(av[-1], chars):
+                return True
+        elif op in (sre_const.ASSERT, sre_const.ASSERT_NOT):
+            if _seq_consumes(av[1], chars):
+                return True
+        elif op is getattr(sre_const, "ATOMIC_GROUP", None):
+            if _seq_consumes(av, chars):
+                return True
+        elif op is sre_const.BRANCH:
+            if any(_seq_consumes(a, chars) for a in av[1]):
+                return True
+        else:
+            return True
+    return False
+
+
+def _seq_separable(seq: List, separator: str, multiline: bool) -> bool:
+    """
+    Check that the zero-width elements of a parsed regex sequence evaluate
+    the same at a chunk edge as next to a separator
+    """
+    for op, av in seq:
+        if op is sre_const.AT:
+            if av in (sre_const.AT_BOUNDARY, sre_const.AT_NON_BOUNDARY):
+                # the separator edges must be non-word characters
+                if re.match(r"\w", separator[0]) or re.match(r"\w", separator[-1]):
+                    return False
+            elif av in (sre_const.AT_BEGINNING, sre_const.AT_END):
+                # only line anchors, and with a separator made of lines
+                if not (multiline and separator[0] == separator[-1] == "\n"):
+                    return False
+            else:
+                return False
+        elif op in (sre_const.ASSERT, sre_const.ASSERT_NOT):
+            # lookarounds must not be able to look into the separator
+            if _seq_consumes(av[1], set(separator)) or \
+               not _seq_separable(av[1], separator, multiline):
+                return False
+        elif op in _REPEAT:
+            if not _seq_separable(av[2], separator, multiline):
+                return False
+        elif op is sre_const.SUBPATTERN:
+            add, rem = av[1:3]
+            ml = (multiline or bool(add & re.M)) and not rem & re.M
+            if not _seq_separable(av[-1], separator, ml):
+                return False
+        elif op is getattr(sre_const, "ATOMIC_GROUP", None):
+            if not _seq_separable(av, separator, multiline):
+                return False
+        elif op is sre_const.BRANCH:
+            if not all(_seq_separable(a, separator, multiline) for a in av[1]):
+                return False
+        elif op not in (sre_const.LITERAL, sre_const.NOT_LITERAL,
+                        sre_const.IN, sre_const.ANY):
+            return False
+    return True
+
+
+def regex_separable(pattern: str, separator: str, flags: int = re.X) -> bool:
+    """
+    Check if a regex can be run over a buffer of chunks joined by a
+    separator: it must not use anchors or lookarounds that could behave
+    differently next to the separator than at the edge of a chunk.
+    Matches that overlap a separator are not excluded; they must be detected
+    by the caller.
+      :param pattern: the regex pattern
+      :param separator: the separator between chunks
+      :param flags: flags for the pattern (only the VERBOSE & MULTILINE flags
+        are used)
+      :return: True if the regex is known to be safe
+    """
+    if _UNSUPPORTED.search(pattern):
+        return False
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            parsed = sre_parse.parse(pattern, flags & (re.X | re.M))
+    except Exception:
+        return False
+    multiline = bool(parsed.state.flags & re.M)
+    return _seq_separable(list(parsed), separator, multiline)
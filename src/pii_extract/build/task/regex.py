@@ -2,6 +2,8 @@
 Define the RegexPiiTask subclass
 """
 
+from collections import defaultdict
+
 import regex
 
 from typing import Iterable
@@ -10,7 +12,13 @@ from pii_data.types import PiiEntity
 from pii_data.types.doc import DocumentChunk
 from pii_data.helper.exception import BuildException
 
+from ...helper.regex_cache import compile_regex
+from ...helper.coalesce import SEPARATOR
 from .base import BasePiiTask
+from .prefilter import regex_prefilter, regex_separable
+
+# Flags used to compile all regex tasks
+REGEX_FLAGS = regex.X | regex.VERSION0
 
 
 class RegexPiiTask(BasePiiTask):
@@ -20,6 +28,18 @@ class RegexPiiTask(BasePiiTask):
     backwards-compatible mode).
     Since it inherits from BasePiiTask, it will automatically apply context
     validation after regex matching, if a suitable context argument is added
+
+    The pattern is analysed to extract a prefilter: a cheap necessary
+    condition (required literals or character classes) that allows skipping
+    chunks in which the regex cannot match. It can be deactivated in the
+    task config with the `prefilter` field.
+
+    A `timeout` field in the task config sets a time budget (in seconds) for
+    the regex matching in each chunk. If it is exceeded, a TimeoutError is
+    raised while iterating over the results.
+
+    Tasks whose pattern behaves the same next to a chunk separator as at a
+    chunk edge can also be executed over a buffer of coalesced chunks.
     """
 
     def __init__(self, pattern: str, **kwargs):
@@ -28,22 +48,61 @@ class RegexPiiTask(BasePiiTask):
         """
         super().__init__(**kwargs)
         try:
-            self.regex = regex.compile(pattern, flags=regex.X | regex.VERSION0)
+            self.regex = compile_regex(pattern, REGEX_FLAGS)
         except Exception as e:
             raise BuildException("cannot compile regex for PII {}: {}: {}",
                                  self.task_info.name, e, pattern) from e
+        do_prefilter = self.config.get("prefilter", True) if self.config else True
+        self.prefilter = regex_prefilter(pattern, REGEX_FLAGS) if do_prefilter else None
+        self.stats = {"prefilter": defaultdict(int)}
+        # (a subclass redefining find() may not be safe over a buffer)
+        self.coalesce = type(self).find is RegexPiiTask.find and \
+            regex_separable(pattern, SEPARATOR, REGEX_FLAGS)
 
+        timeout = self.config.get("timeout") if self.config else None
+        if timeout is not None and (isinstance(timeout, bool) or
+                                    not isinstance(timeout, (int, float)) or
+                                    timeout <= 0):
+            raise BuildException("invalid regex timeout for PII {}: {}",
+                                 self.task_info.name, timeout)
+        self.timeout = timeout
+        # Release the GIL while matching (set when running tasks in threads)
+        self.concurrent = False
 
-    def find(self, chunk: DocumentChunk) -> Iterable[PiiEntity]:
+
+    def scan(self, text: str) -> Iterable[regex.Match]:
         """
-        Iterate over the regex and produce Pii objects
+        Check the prefilter over a text and, if it passes, iterate over the
+        regex matches (within the task time budget, if defined)
+        """
+        if self.prefilter:
+            passed = self.prefilter(text)
+            with self._lock:
+                self.stats["prefilter"]["miss" if passed else "hit"] += 1
+            if not passed:
+                return iter(())
+        return self.regex.finditer(text, timeout=self.timeout,
+                                   concurrent=self.concurrent)
+
+
+    def find_matches(self, chunk: DocumentChunk,
+                     matches: Iterable[regex.Match]) -> Iterable[PiiEntity]:
+        """
+        Produce Pii objects from a sequence of regex matches over the chunk
         """
         defaults = self.get_pii_defaults()
         if self.debug:
             self.dbg_task("Rgx")
-        for cc in self.regex.finditer(chunk.data):
+        for cc in matches:
             g = cc.lastindex or 0
             if self.debug:
                 self.dbg_item(cc.group(g))
             yield PiiEntity(self.pii_info, cc.group(g), chunk.id, cc.start(g),
                             **defaults)
+
+
+    def find(self, chunk: DocumentChunk) -> Iterable[PiiEntity]:
+        """
+        Iterate over the regex and produce Pii objects
+        """
+        return self.find_matches(chunk, self.scan(chunk.data))
@@ -2,16 +2,67 @@
 Base class to create TaskCollector objects
 """
 
-from typing import Dict, List, Iterable
+from typing import Dict, List, Iterable, Callable, Set
 
 from pii_data.helper.exception import UnimplementedException
 from pii_data.helper.logger import PiiLogger
 
 from pii_extract.helper.types import TYPE_STR_LIST
-from pii_extract.helper.utils import union_sets, taskd_field
+from pii_extract.helper.utils import union_sets, taskd_field, field_set
 
 
 
+# --------------------------------------------------------------------------
+
+class DeferredTasks:
+    """
+    A source of task descriptors that is loaded only when needed. It has a
+    manifest declaring what it covers, as a dict with (optional) fields:
+      - lang: the language(s) of the tasks
+      - country: the country(es) of the tasks
+      - pii: the PII type(s) of the tasks (PiiEnum names)
+    A missing field means the source can cover any value of it.
+    """
+
+    def __init__(self, name: str, manifest: Dict,
+                 loader: Callable[[], Iterable[Dict]]):
+        """
+          :param name: name of the source
+          :param manifest: the source manifest
+          :param loader: a callable that loads the source and returns its
+            (normalized) raw task descriptors
+        """
+        self.name = name
+        self.manifest = {f: field_set(manifest.get(f))
+                         for f in ("lang", "country", "pii")}
+        self._loader = loader
+
+
+    def __repr__(self) -> str:
+        return f"<DeferredTasks {self.name}>"
+
+
+    def covers(self, lang: Set[str] = None, country: Set[str] = None,
+               pii: Set[str] = None) -> bool:
+        """
+        Check if the source may contain tasks for a filter
+          :param lang: languages to select (if empty, all)
+          :param country: countries to select (if empty, all)
+          :param pii: PII type names to select (if empty, all)
+        """
+        for value, declared in zip((lang, country, pii), self.manifest.values()):
+            if value and declared and not (set(value) & declared):
+                return False
+        return True
+
+
+    def load(self) -> Iterable[Dict]:
+        """
+        Load the source, and return its task descriptors
+        """
+        return self._loader()
+
+
 # --------------------------------------------------------------------------
 
 class BaseTaskCollector:
@@ -23,7 +74,8 @@ class BaseTaskCollector:
     given language)
     They can also reimplement language_list(), country_list() and/or
     gather_tasks(), if they can be made more efficient than the base class
-    implementations.
+    implementations, and deferred_tasks(), to deliver sources of tasks that
+    are loaded only if needed.
     """
 
     def __init__(self, languages: Iterable[str] = None, debug: bool = False):
@@ -99,6 +151,14 @@ class BaseTaskCollector:
         yield from self.gather_tasks_lang_country(lang, None)
 
 
+    def deferred_tasks(self) -> List[DeferredTasks]:
+        """
+        Return the task sources that are not included in gather_tasks(), and
+        are to be loaded only when the tasks they declare are needed
+        """
+        return []
+
+
     def _gather_tasks(self, lang: TYPE_STR_LIST) -> Iterable[Dict]:
         """
         Deliver an iterable of finalized task descriptors, to be implemented
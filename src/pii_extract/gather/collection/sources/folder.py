@@ -1,12 +1,17 @@
 """
 Build lists of PiiTask descriptors by traversing folders
+
+Optionally, the task descriptors found in each module can be stored in a
+static manifest, so that later gatherings read them from there instead of
+importing all the modules (modules are then imported only when their tasks
+are built)
 """
 
 import importlib
 from pathlib import Path
 from itertools import chain
 
-from typing import Dict, List, Iterable
+from typing import Dict, List, Iterable, Union
 
 from pii_data.types import PiiEnum
 from pii_data.helper.exception import ConfigException
@@ -17,6 +22,7 @@ from pii_extract.gather.parser.defs import FIELD_CLASS
 from pii_extract.gather.parser.parser import piienum
 from .base import BaseTaskCollector
 from .utils import RawTaskDefaults
+from .manifest import FolderManifest, folder_manifest_file, get_manifest_cache
 
 # For folder defs: name of the Python list holding pii tasks inside a module
 _LISTNAME = "PII_TASKS"
@@ -64,7 +70,8 @@ class FolderTaskCollector(BaseTaskCollector):
 
     def __init__(self, pkg: str, basedir: Path, source: str,
                  version: str = None, pii_filter: List[PiiEnum] = None,
-                 languages: Iterable[str] = None, debug: bool = False):
+                 languages: Iterable[str] = None, debug: bool = False,
+                 manifest: Union[bool, str] = None):
         """
           :param pkg: basename for the package
           :param basedir: base directory where the task implementations are
@@ -73,6 +80,9 @@ class FolderTaskCollector(BaseTaskCollector):
           :param pii_filter: collect only tasks for these PII types
           :param languages: currently unused
           :param debug: print out debug information
+          :param manifest: use a static manifest of the task modules. It can
+            be a filename, True (use a file in the manifest cache folder),
+            False, or None (use it if the manifest cache is active)
         """
         super().__init__(languages=languages, debug=debug)
         self._pkg = pkg
@@ -94,6 +104,16 @@ class FolderTaskCollector(BaseTaskCollector):
                                       e) from e
                 self._log(".. PII filter: %s", sorted(pii_filter))
 
+        # Static manifest for the task modules
+        if manifest is None:
+            manifest = get_manifest_cache() is not None
+        if manifest is True:
+            manifest = folder_manifest_file(pkg, self.basedir)
+        self._manifest = FolderManifest(manifest, self.basedir, self._defaults) \
+            if manifest else None
+        if self._manifest:
+            self._log(".. Folder manifest: %s", self._manifest.path)
+
 
 
     @property
@@ -111,7 +131,7 @@ class FolderTaskCollector(BaseTaskCollector):
         self._log("... path = %s", path)
 
         # Get the list of Python files in the module
-        modlist = (m.stem for m in Path(path).iterdir()
+        modlist = (m for m in Path(path).iterdir()
                    if m.suffix == ".py" and not m.stem.startswith(('_', '.')))
 
         #print("** GATHER:", pkg, name, path, lang, country)
@@ -124,18 +144,25 @@ class FolderTaskCollector(BaseTaskCollector):
         defaults.update(self._defaults)
         reformat = RawTaskDefaults(defaults, normalize=True)
 
-        # Get all the tasks defined in those files
-        num = 0
-        for mname in sorted(modlist):
+        def load(mname: str) -> List[Dict]:
             mod = importlib.import_module("." + mname, pkg)
             task_list = getattr(mod, _LISTNAME, None)
             if not task_list:
-                continue
-
-            #for task in build_task_descriptors(task_list, defaults):
+                return []
             if isinstance(task_list, dict):
                 task_list = [task_list]
-            for task in reformat(task_list):
+            return list(reformat(task_list))
+
+        # Get all the tasks defined in those files
+        num = 0
+        for modpath in sorted(modlist):
+            if self._manifest:
+                task_list = self._manifest.module_tasks(
+                    modpath, lambda: load(modpath.stem))
+            else:
+                task_list = load(modpath.stem)
+
+            for task in task_list:
                 pii = set(piienum(p.get("type")) for p in task["pii"])
                 if self._pii_filter and not (pii & self._pii_filter):
                     continue
@@ -149,6 +176,8 @@ class FolderTaskCollector(BaseTaskCollector):
 
         if num == 0:
             self._log("... NO PII TASKS for %s", pkg)
+        if self._manifest:
+            self._manifest.save()
 
 
     def language_list(self) -> List[str]:
@@ -0,0 +1,313 @@
+"""
+A persistent on-disk cache of the task descriptors delivered by plugins
+(a "manifest"), so that a warm start does not need to load & instantiate the
+plugins to fetch their task descriptors.
+
+The manifest is stored as a JSON file, keyed by the installed plugins (their
+entry point names, values & distribution versions, and the modification
+time & size of their entry point modules), the configuration, the
+language restriction, and the versions of this package and of Python. Task
+implementation objects (classes & callables) are stored by their import
+path, and imported again when the tasks are parsed. A plugin whose task
+descriptors contain objects that cannot be stored that way is not cached.
+
+The cache is not active by default. It is activated through the
+PII_EXTRACT_MANIFEST_CACHE environment variable (see the diskcache module).
+
+The module also defines the static manifest for a FolderTaskCollector package:
+the task descriptors of each task module, stored together with the module
+modification time & size, so that only the modules that change need to be
+imported to gather their tasks.
+"""
+
+import sys
+import json
+import hashlib
+import importlib
+from pathlib import Path
+from functools import partial
+from collections import defaultdict
+
+from typing import Dict, List, Iterable, Callable, Any, Optional
+
+from pii_data.types import PiiEnum
+
+from pii_extract import VERSION
+from pii_extract.build import is_pii_class
+from pii_extract.helper.diskcache import (DiskCache, get_disk_cache,
+                                          default_cache_dir, atomic_write)
+from pii_extract.gather.parser.defs import FIELD_CLASS, FIELD_IMP
+
+
+# Environment variable used to activate the cache
+MANIFEST_ENV = "PII_EXTRACT_MANIFEST_CACHE"
+
+# Suffix for cache files
+MANIFEST_SUFFIX = ".json"
+
+# Format version for folder manifests
+FOLDER_MANIFEST_VERSION = 1
+
+# Markers for non-JSON values
+_ENUM = "__piienum__"
+_IMPORT = "__import__"
+
+
+class Uncacheable(Exception):
+    """
+    A value in a task descriptor that cannot be stored in the manifest
+    """
+    pass
+
+
+def import_path(obj: Any) -> str:
+    """
+    Return the import path for an object, if it can be imported back
+    """
+    path = f"{getattr(obj, '__module__', '')}.{getattr(obj, '__qualname__', '')}"
+    try:
+        modname, name = path.rsplit(".", 1)
+        if getattr(importlib.import_module(modname), name) is obj:
+            return path
+    except Exception:
+        pass
+    raise Uncacheable(f"cannot store object: {obj!r}")
+
+
+def encode_value(value: Any) -> Any:
+    """
+    Convert a value in a raw task descriptor into a JSON-compatible value
+    """
+    if isinstance(value, PiiEnum):
+        return {_ENUM: value.name}
+    elif value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    elif isinstance(value, dict):
+        if not all(isinstance(k, str) for k in value):
+            raise Uncacheable("non-string dict keys")
+        return {k: encode_value(v) for k, v in value.items()}
+    elif isinstance(value, (list, tuple)):
+        return [encode_value(v) for v in value]
+    elif callable(value):
+        return {_IMPORT: import_path(value)}
+    raise Uncacheable(f"cannot store value: {value!r}")
+
+
+def decode_value(value: Any) -> Any:
+    """
+    Convert back a value in a stored task descriptor. Objects are returned
+    as their import path
+    """
+    if isinstance(value, dict):
+        if _ENUM in value:
+            return PiiEnum[value[_ENUM]]
+        elif _IMPORT in value:
+            return value[_IMPORT]
+        return {k: decode_value(v) for k, v in value.items()}
+    elif isinstance(value, list):
+        return [decode_value(v) for v in value]
+    return value
+
+
+def encode_taskd(taskd: Dict) -> Dict:
+    """
+    Convert a (normalized) raw task descriptor into a JSON-compatible dict.
+    Since objects are stored as strings, the task class is made explicit
+    """
+    out = encode_value(taskd)
+    obj = taskd.get(FIELD_IMP)
+    if not out.get(FIELD_CLASS) and not isinstance(obj, str):
+        out[FIELD_CLASS] = "piitask" if is_pii_class(obj) else "callable"
+    return out
+
+
+# --------------------------------------------------------------------------
+
+class ManifestCache(DiskCache):
+    """
+    A folder-based cache of plugin task descriptors
+    """
+
+    folder = "manifest"
+    suffix = MANIFEST_SUFFIX
+
+    @staticmethod
+    def key(plugins: Iterable[Dict], config: Dict = None,
+            languages: Iterable[str] = None) -> str:
+        """
+        Compute the key for a manifest
+          :param plugins: the installed plugins, as dicts with their entry
+            point name & value, their distribution version and the signature
+            of their module file
+          :param config: the configuration plugins are created with
+          :param languages: the language restriction for the plugins
+        """
+        data = [VERSION, list(sys.version_info[:2]), list(plugins), config,
+                sorted(languages) if languages else None]
+        data = json.dumps(data, sort_keys=True, default=str)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+    def _file(self, key: str) -> Path:
+        return self.path / (key + MANIFEST_SUFFIX)
+
+
+    def load(self, key: str) -> Optional[List[Dict]]:
+        """
+        Load a manifest
+          :return: the list of stored plugins (with their task descriptors),
+            or None if there is no manifest for that key
+        """
+        try:
+            with open(self._file(key), encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("key") == key:
+                self.stats["hit"] += 1
+                for plugin in data["plugins"]:
+                    plugin["tasks"] = decode_value(plugin["tasks"])
+                return data["plugins"]
+        except FileNotFoundError:
+            pass
+        except Exception:
+            self.stats["error"] += 1
+        self.stats["miss"] += 1
+        return None
+
+
+    def store(self, key: str, plugins: List[Dict]) -> bool:
+        """
+        Save a manifest (atomically, since several processes may be storing
+        it at the same time)
+          :param key: the manifest key
+          :param plugins: a list of dicts with plugin information and their
+            (normalized) task descriptors, in a "tasks" field
+          :return: True if the manifest could be stored
+        """
+        try:
+            plugins = [{**p, "tasks": [encode_taskd(t) for t in p["tasks"]]}
+                       for p in plugins]
+        except Uncacheable:
+            self.stats["uncacheable"] += 1
+            return False
+        return self._write(self._file(key),
+                            partial(json.dump, {"key": key, "plugins": plugins}))
+
+
+# --------------------------------------------------------------------------
+
+class FolderManifest:
+    """
+    The static manifest for a folder of task modules
+    """
+
+    def __init__(self, path: str, basedir: Path, defaults: Dict = None):
+        """
+          :param path: manifest file
+          :param basedir: base directory for the task modules
+          :param defaults: the task defaults used by the collector; a stored
+            manifest built with different defaults is discarded
+        """
+        self.path = Path(path)
+        self.basedir = Path(basedir)
+        self.stats = defaultdict(int)
+        self._defaults = encode_value(defaults or {})
+        self._modules = self._read()
+        self._dirty = False
+
+
+    def __repr__(self) -> str:
+        return f"<FolderManifest {self.path}>"
+
+
+    def _read(self) -> Dict:
+        """
+        Read the module entries in the manifest file, if it is valid
+        """
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == FOLDER_MANIFEST_VERSION and \
+               data.get("defaults") == self._defaults:
+                return data["modules"]
+        except FileNotFoundError:
+            pass
+        except Exception:
+            self.stats["error"] += 1
+        return {}
+
+
+    def module_tasks(self, modpath: Path,
+                     loader: Callable[[], List[Dict]]) -> List[Dict]:
+        """
+        Return the task descriptors for a task module, from the manifest if
+        the module has not changed since it was stored
+          :param modpath: the module file
+          :param loader: a function that imports the module and returns its
+            (normalized) task descriptors
+          :return: the list of task descriptors. Those read from the manifest
+            contain import paths instead of task objects
+        """
+        name = modpath.relative_to(self.basedir).as_posix()
+        stat = modpath.stat()
+        sig = [stat.st_mtime_ns, stat.st_size]
+
+        entry = self._modules.get(name)
+        if entry and entry["sig"] == sig and entry["tasks"] is not None:
+            self.stats["hit"] += 1
+            return decode_value(entry["tasks"])
+
+        # A new or modified module (or one that cannot be stored): import it
+        self.stats["miss"] += 1
+        tasks = loader()
+        if entry and entry["sig"] == sig:
+            return tasks
+        try:
+            stored = [encode_taskd(t) for t in tasks]
+        except Uncacheable:
+            self.stats["uncacheable"] += 1
+            stored = None
+        self._modules[name] = {"sig": sig, "tasks": stored}
+        self._dirty = True
+        return tasks
+
+
+    def save(self) -> bool:
+        """
+        Write the manifest, if it has changed (removing the entries for
+        modules that no longer exist)
+          :return: True if the manifest was written
+        """
+        if not self._dirty:
+            return False
+        modules = {k: v for k, v in self._modules.items()
+                   if (self.basedir / k).is_file()}
+        data = {"version": FOLDER_MANIFEST_VERSION, "defaults": self._defaults,
+                "modules": modules}
+        try:
+            atomic_write(self.path, partial(json.dump, data))
+        except OSError:
+            self.stats["error"] += 1
+            return False
+        self._dirty = False
+        return True
+
+
+def folder_manifest_file(pkg: str, basedir: Path) -> Path:
+    """
+    Return the default manifest file for a folder of task modules, in the
+    manifest cache folder
+    """
+    cache = get_manifest_cache()
+    path = cache.path if cache else default_cache_dir(ManifestCache.folder)
+    key = json.dumps([VERSION, pkg, str(Path(basedir).resolve())])
+    key = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    return path / f"folder-{key}{MANIFEST_SUFFIX}"
+
+
+# --------------------------------------------------------------------------
+
+def get_manifest_cache() -> Optional[ManifestCache]:
+    """
+    Return the active manifest cache, as defined by the environment
+    """
+    return get_disk_cache(ManifestCache, MANIFEST_ENV)
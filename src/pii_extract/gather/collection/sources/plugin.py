@@ -11,20 +11,58 @@ A plugin must have
        descriptors, with an optional "lang" argument to restrict to a specific
        language
      - optional class attributes `source`, `version` and `description`
+     - an optional `pii_manifest` class attribute, a dict declaring the
+       languages, countries and PII types covered by the plugin tasks (see
+       DeferredTasks). It can also be given in the plugin config. Plugins
+       with a manifest are instantiated only when their tasks are needed
+
+If the manifest cache is active (see the manifest module), the task
+descriptors of the plugins are stored in it, and in later instantiations
+they are read from it, without loading nor instantiating the plugins
 """
 
 from sys import version_info
+from pathlib import Path
 from importlib.metadata import entry_points
+from importlib.util import find_spec
 
-from typing import Dict, List, Iterable
+from typing import Dict, List, Iterable, Optional
 
 from pii_data.helper.exception import ProcException
 
-from pii_extract.defs import FMT_CONFIG_PLUGIN
+from pii_extract.defs import FMT_CONFIG_PLUGIN, LANG_ANY
 from pii_extract.helper.types import TYPE_STR_LIST
 from .utils import RawTaskDefaults
-from .base import BaseTaskCollector
+from .base import BaseTaskCollector, DeferredTasks
 from .defs import PII_EXTRACT_PLUGIN_ID
+from .manifest import get_manifest_cache
+
+
+def _module_sig(entry) -> Optional[List[int]]:
+    """
+    Return the modification time & size of the module file for an entry
+    point, so that plugin code changes without a version bump (e.g. in an
+    editable install) are detected
+    """
+    value = getattr(entry, "value", None)
+    if not isinstance(value, str):
+        return None
+    try:
+        spec = find_spec(value.split(":")[0].strip())
+        stat = Path(spec.origin).stat()
+    except Exception:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _entry_id(entry) -> Dict:
+    """
+    Identify an installed plugin entry point, for the manifest key
+    """
+    dist = getattr(entry, "dist", None)
+    return {"name": entry.name, "value": getattr(entry, "value", None),
+            "version": getattr(dist, "version", None),
+            "sig": _module_sig(entry)}
 
 
 # --------------------------------------------------------------------------
@@ -43,6 +81,9 @@ class PluginTaskCollector(BaseTaskCollector):
         super().__init__(languages=languages, debug=debug)
         self._tasks = None
         self._plugins = []
+        self._manifest = None   # manifest cache & key, to store tasks
+        self._cached = False    # plugins & tasks read from the manifest
+        self._deferred = []     # plugins to be instantiated when needed
 
         # Fetch all available plugins
         if version_info.minor < 10:
@@ -68,41 +109,108 @@ class PluginTaskCollector(BaseTaskCollector):
         # Get custom cfg for plugins (for backwards compat, use also the base cfg)
         custom_cfg = plugin_cfg.get("plugins") or plugin_cfg
 
-        # Instantiate all plugins
+        # Select the plugins to activate
+        plugin_list = [e for e in plugin_list
+                       if custom_cfg.get(e.name, {}).get("load", True)]
+
+        # Try to fetch the plugin descriptors & tasks from the manifest cache
+        cache = get_manifest_cache()
+        if cache:
+            key = cache.key(map(_entry_id, plugin_list), config, self._lang)
+            stored = cache.load(key)
+            if stored is not None:
+                self._log(". plugin manifest: %s", key)
+                self._tasks = [t for p in stored for t in p.pop("tasks")]
+                self._plugins = [{**p, "object": None} for p in stored]
+                self._cached = True
+                return
+            self._manifest = cache, key
+
+        # Instantiate all plugins (or defer the ones with a manifest)
         for entry in plugin_list:
 
             # See if we have custom options to instantiate this plugin
             cfg = custom_cfg.get(entry.name, {})
-            if not cfg.get("load", True):
-                continue        # plugin is not to be activated
             options = cfg.get("options", {})
             if self._lang:
                 options["languages"] = self._lang
 
-            # Get the class for the plugin loader
-            LoaderClass = entry.load()
-            self._log(". load plugin: %s", entry.name)
+            # See if the plugin declares a manifest (when storing the manifest
+            # cache, all plugins are needed)
+            manifest = cfg.get("manifest")
+            if not manifest and not self._manifest:
+                manifest = getattr(entry.load(), "pii_manifest", None)
+            if manifest and not self._manifest:
+                self._defer(entry, manifest, config, options, debug)
+                continue
+
+            self._plugins.append(self._load(entry, config, options, debug))
+
 
-            # Instantiate it
-            try:
-                plugin = LoaderClass(config=config, **options, debug=debug)
-            except Exception as e:
-                raise ProcException("cannot instantiate plugin '{}': {}",
-                                    entry.name, e) from e
+    def _load(self, entry, config: Dict, options: Dict, debug: bool) -> Dict:
+        """
+        Load & instantiate a plugin
+          :return: the plugin descriptor
+        """
+        # Get the class for the plugin loader
+        LoaderClass = entry.load()
+        self._log(". load plugin: %s", entry.name)
 
-            # Create the plugin descriptor
-            desc = {
-                'name': entry.name,
-                'source': getattr(plugin, "source", entry.name),
-                'version': getattr(plugin, "version", None),
-                'description': getattr(plugin, "description", None),
-                'object': plugin
-            }
+        # Instantiate it
+        try:
+            plugin = LoaderClass(config=config, **options, debug=debug)
+        except Exception as e:
+            raise ProcException("cannot instantiate plugin '{}': {}",
+                                entry.name, e) from e
 
-            # Add to the list of loaded plugins
-            self._plugins.append(desc)
-            self._log(". loaded plugin: %s version=%s source=%s",
-                      desc["name"], desc["version"], desc["source"])
+        # Create the plugin descriptor
+        desc = {
+            'name': entry.name,
+            'source': getattr(plugin, "source", entry.name),
+            'version': getattr(plugin, "version", None),
+            'description': getattr(plugin, "description", None),
+            'object': plugin
+        }
+        self._log(". loaded plugin: %s version=%s source=%s",
+                  desc["name"], desc["version"], desc["source"])
+        return desc
+
+
+    def _defer(self, entry, manifest: Dict, config: Dict, options: Dict,
+               debug: bool):
+        """
+        Prepare a plugin with a manifest, to be loaded only when needed
+        """
+        # A provisional descriptor, completed when the plugin is loaded
+        dist = getattr(entry, "dist", None)
+        desc = {
+            'name': entry.name,
+            'source': entry.name,
+            'version': getattr(dist, "version", None),
+            'description': None,
+            'object': None,
+            'deferred': True
+        }
+        self._plugins.append(desc)
+
+        def loader() -> Iterable[Dict]:
+            desc.update(self._load(entry, config, options, debug))
+            reformat = RawTaskDefaults(normalize=True)
+            return list(reformat(desc["object"].get_plugin_tasks()))
+
+        deferred = DeferredTasks(entry.name, manifest, loader)
+        if self._lang and not deferred.covers(self._lang | {LANG_ANY}):
+            self._log(". skip plugin: %s", entry.name)
+            return
+        self._deferred.append(deferred)
+        self._log(". deferred plugin: %s", entry.name)
+
+
+    def deferred_tasks(self) -> List[DeferredTasks]:
+        """
+        Return the plugins with a manifest, not yet instantiated
+        """
+        return self._deferred
 
 
     def __repr__(self) -> str:
@@ -111,7 +219,9 @@ class PluginTaskCollector(BaseTaskCollector):
 
     def list_plugins(self) -> List[Dict]:
         """
-        Return the list of loaded plugins
+        Return the list of activated plugins. Plugins with a manifest are
+        marked as `deferred`, and their `object` field is None until they
+        are instantiated
         """
         return self._plugins
 
@@ -120,19 +230,28 @@ class PluginTaskCollector(BaseTaskCollector):
         """
         Return all tasks
         """
-        if lang is None and self._tasks:
+        if self._cached or (lang is None and self._tasks):
             return iter(self._tasks)
 
         # Build the list of tasks
         tasks = []
+        manifest = []
         reformat = RawTaskDefaults(normalize=True)
         for plugin in self._plugins:
+            if plugin.get("deferred"):
+                continue    # (their tasks are delivered by deferred_tasks())
             self._log(". gather plugin tasks for: %s", plugin["name"])
-            raw_tasks = plugin["object"].get_plugin_tasks(lang)
-            tasks += list(reformat(raw_tasks))
+            raw_tasks = list(reformat(plugin["object"].get_plugin_tasks(lang)))
+            tasks += raw_tasks
+            manifest.append({k: v for k, v in plugin.items() if k != "object"})
+            manifest[-1]["tasks"] = raw_tasks
 
-        # Store it for repeated calls
+        # Store it for repeated calls (and in the manifest cache)
         if lang is None:
             self._tasks = tasks
+            if self._manifest:
+                cache, key = self._manifest
+                cache.store(key, manifest)
+                self._manifest = None
 
         return iter(tasks)
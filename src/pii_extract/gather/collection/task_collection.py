@@ -2,16 +2,18 @@
 Build collections of task definitions
 """
 
-from typing import Dict, List, Iterable, Union
+from collections import defaultdict
+
+from typing import Dict, List, Iterable, Union, Set, Tuple
 
 from pii_data.helper.logger import PiiLogger
 
 from ...defs import LANG_ANY, COUNTRY_ANY, FMT_CONFIG_TASKCFG
-from ...helper.utils import field_set, taskd_field, union_sets
+from ...helper.utils import field_set
 from ...build.task import BasePiiTask
 from ...build import build_task
-from ..parser import parse_task_descriptor
-from .sources.base import BaseTaskCollector
+from ..parser import LazyTaskDescriptor
+from .sources.base import BaseTaskCollector, DeferredTasks
 from .utils import ensure_enum_list, filter_piid, TYPE_TASKENUM
 
 
@@ -25,10 +27,22 @@ def is_lang_any(piid: Union[List, Dict]) -> bool:
         return any(t["lang"] == LANG_ANY for t in piid)
 
 
+def _piid_list(piid: Union[List, Dict]) -> List[Dict]:
+    """
+    Return a (possibly multiple) PII definition as a list
+    """
+    return [piid] if isinstance(piid, dict) else piid
+
+
 class PiiTaskCollection:
     """
     An object holding a set of task definitions, which can then be
-    instantiated into task objects
+    instantiated into task objects.
+
+    Task descriptors are stored as LazyTaskDescriptor objects, and parsed
+    into full task definitions (importing their implementation objects) only
+    when they are selected. Hence errors in task implementations are raised
+    when selecting or building tasks.
     """
 
     def __init__(self, task_config: Dict = None, debug: bool = False):
@@ -39,10 +53,16 @@ class PiiTaskCollection:
         self._log = PiiLogger(__name__, debug)
         self._debug = debug
         self._taskcfg = task_config
-        self._lang = None       # languages with collected tasks
-        self._countries = None  # countries with collected tasks
         self._built = {}        # all built tasks
         self.task_def = []      # list of task definitions collected
+                                # (possibly not yet parsed)
+        # Inverted indexes from lang, country & PII type to the PII
+        # descriptors in the task definitions, as (taskdef, item) positions
+        self._index = {"lang": defaultdict(set), "country": defaultdict(set),
+                       "pii": defaultdict(set)}
+        self._no_country = set()    # PII descriptors without country
+        self._indexed = 0           # number of task definitions indexed
+        self._deferred = []         # task sources to be loaded when needed
 
 
     def __repr__(self) -> str:
@@ -70,36 +90,109 @@ class PiiTaskCollection:
         Fetch all raw tasks descriptors gathered by a task collector,
         convert them to task definitions and add them to the object list
         """
-        # Reset list of languages/countries so that they will be computed again
-        self._lang = self._countries = None
-
         # Append all tasks gathered by the collector
         self._log(". gather-tasks from: %s", tc)
         num = 0
         for num, taskd in enumerate(tc.gather_tasks(), start=1):
-            self.task_def.append(parse_task_descriptor(taskd))
+            self.task_def.append(LazyTaskDescriptor(taskd))
         self._log(". gather-tasks from: %s: tasks=%d", tc, num)
+
+        # Keep the sources whose tasks are to be gathered only when needed
+        deferred = getattr(tc, "deferred_tasks", None)
+        if deferred:
+            self._deferred += deferred()
         return num
 
 
+    def _load_deferred(self, lang: Set[str] = None, country: Set[str] = None,
+                       pii: Set = None):
+        """
+        Load the deferred task sources that may contain tasks for a filter
+        """
+        names = {p.name for p in pii} if pii else None
+        for src in [d for d in self._deferred if d.covers(lang, country, names)]:
+            self._add_deferred(src)
+
+
+    def _add_deferred(self, src: DeferredTasks):
+        """
+        Load a deferred task source, and add its task definitions
+        """
+        self._deferred.remove(src)
+        self._log(". gather-tasks from: %s", src)
+        for taskd in src.load():
+            self.task_def.append(LazyTaskDescriptor(taskd))
+
+
+    def _piid(self, n: int) -> Union[List, Dict]:
+        """
+        Return the PII descriptor(s) for a task definition
+        """
+        taskd = self.task_def[n]
+        return taskd.piid if isinstance(taskd, LazyTaskDescriptor) \
+            else taskd["piid"]
+
+
+    def _taskdef(self, n: int) -> Dict:
+        """
+        Return a task definition, parsing it if not done yet
+        """
+        taskd = self.task_def[n]
+        if isinstance(taskd, LazyTaskDescriptor):
+            taskd = self.task_def[n] = taskd.parse()
+        return taskd
+
+
+    def _update_index(self):
+        """
+        Add to the indexes the task definitions not yet indexed
+        """
+        for n in range(self._indexed, len(self.task_def)):
+            for i, piid in enumerate(_piid_list(self._piid(n))):
+                for field, index in self._index.items():
+                    values = field_set(piid.get(field))
+                    for v in values:
+                        index[v].add((n, i))
+                    if field == "country" and not values:
+                        self._no_country.add((n, i))
+        self._indexed = len(self.task_def)
+
+
+    def _field_list(self, field: str) -> List[str]:
+        """
+        Return all the values of a field in the task definitions, including
+        the ones declared by deferred task sources (sources that do not
+        declare the field need to be loaded)
+        """
+        for src in [d for d in self._deferred if not d.manifest[field]]:
+            self._add_deferred(src)
+        self._update_index()
+        values = set(self._index[field])
+        for src in self._deferred:
+            values |= src.manifest[field]
+        return sorted(values)
+
+
+    def _lookup(self, field: str, values: Set) -> Set[Tuple[int, int]]:
+        """
+        Find the PII descriptors that have any of a set of values in a field
+        """
+        index = self._index[field]
+        return set().union(*(index[v] for v in values if v in index))
+
+
     def language_list(self) -> List[str]:
         """
         Return all languages that have task definitions
         """
-        if self._lang is None:
-            self._lang = union_sets(taskd_field(t["piid"], "lang")
-                                    for t in self.task_def)
-        return self._lang
+        return self._field_list("lang")
 
 
     def country_list(self) -> List[str]:
         """
         Return all countries that have task descriptors
         """
-        if self._countries is None:
-            self._countries = union_sets(taskd_field(t["piid"], "country")
-                                         for t in self.task_def)
-        return self._countries
+        return self._field_list("country")
 
 
     def taskdef_list(self, lang: Iterable[str] = None,
@@ -131,22 +224,45 @@ class PiiTaskCollection:
                 country.add(COUNTRY_ANY)
         pii = set(ensure_enum_list(pii)) if pii is not None else None
 
-        # Traverse the list of task definitions and apply the filters
-        for taskd in self.task_def:
-
-            # If no lang/country filter, we're done
-            if not lang and not country and not pii:
-                yield taskd
-                continue
-
-            # Filter by language and/or country and/or PII
-            piid = filter_piid(taskd["piid"], lang, country, pii)
-            if not piid:
+        # Load the deferred task sources that can contribute
+        if self._deferred:
+            self._load_deferred(lang, country, pii)
+
+        # If no lang/country/PII filter, we're done
+        if not lang and not country and not pii:
+            for n in range(len(self.task_def)):
+                yield self._taskdef(n)
+            return
+
+        # Intersect the index entries for each filter. PII descriptors without
+        # country agree with any country filter
+        self._update_index()
+        found = None
+        for field, values in (("pii", pii), ("lang", lang), ("country", country)):
+            if not values:
                 continue
-            elif isinstance(piid, dict) or len(piid) == len(taskd["piid"]):
+            items = self._lookup(field, values)
+            if field == "country":
+                items |= self._no_country
+            found = items if found is None else found & items
+            if not found:
+                return
+
+        # Deliver the selected task definitions, in collection order
+        selected = defaultdict(list)
+        for n, i in sorted(found):
+            selected[n].append(i)
+        for n, items in selected.items():
+            piid = self._piid(n)
+            taskd = self._taskdef(n)
+            if isinstance(piid, dict) or len(items) == len(piid):
                 yield taskd
             else:
-                yield {"obj": taskd["obj"], "info": taskd["info"], "piid": piid}
+                # (the parsed descriptor may have more PII items, since they
+                # can also be demultiplexed by subtype, so filter it again)
+                piid = filter_piid(taskd["piid"], lang, country, pii)
+                yield {"obj": taskd["obj"], "info": taskd["info"],
+                       "piid": piid}
 
 
     def build_tasks(self, lang: str = None, country: Iterable[str] = None,
@@ -1 +1,2 @@
 from .parser import parse_task_descriptor               # noqa: F401
+from .parser import LazyTaskDescriptor                  # noqa: F401
@@ -13,12 +13,14 @@ from pii_data.types import PiiEnum
 from pii_data.helper.exception import InvArgException
 
 from ...build import is_pii_class
+from ...helper.profile import parse_requires
 from ...build.task import BasePiiTask, PiiTaskInfo
 from .defs import FIELD_CLASS, FIELD_IMP
 from .utils import InvPiiTask
 
 
 TYPE_TASKD_LIST = Iterable[Dict]
+TYPE_PIID = Union[Dict, List[Dict]]
 
 
 # --------------------------------------------------------------------------
@@ -95,6 +97,15 @@ def _parse_taskdict(raw_taskd: Dict,
     if "kwargs" in raw_taskd:
         task["kwargs"] = raw_taskd["kwargs"]
 
+    # Chunk features required by the task (may also be a class attribute)
+    requires = raw_taskd.get("requires") or \
+        getattr(task[FIELD_IMP], "pii_requires", None)
+    if requires:
+        try:
+            task["requires"] = parse_requires(requires)
+        except InvArgException as e:
+            raise InvPiiTask("invalid requires field: {}", e) from e
+
     # Add source, version from defaults, if not there yet
     if defaults:
         for f in ("source", "version"):
@@ -248,3 +259,68 @@ def parse_task_descriptor(taskd: Dict, defaults: Dict = None) -> Dict:
         raise InvPiiTask("task descriptor error: missing field {}", e) from e
     except Exception as e:
         raise InvPiiTask("task descriptor error: {}", e) from e
+
+
+# --------------------------------------------------------------------------
+
+
+def _pii_metadata(taskd: Dict, defaults: Dict = None) -> TYPE_PIID:
+    """
+    Extract from a raw task descriptor the fields in its PII descriptors
+    needed to select the task (type, lang & country), without loading the
+    task implementation
+    """
+    piilist = taskd.get("pii")
+    if not isinstance(piilist, (list, tuple)):
+        raise InvPiiTask("task descriptor error: invalid pii field")
+
+    pii_data = []
+    for piid in piilist:
+        if not isinstance(piid, dict):
+            raise InvPiiTask("pii descriptor is not a dict")
+        out = {f: piid[f] for f in ("lang", "country") if piid.get(f)}
+        out["pii"] = piienum(piid.get("type"))
+        if defaults:
+            for f in ("lang", "country"):
+                if f in defaults and f not in out:
+                    out[f] = defaults[f]
+        if "lang" not in out:
+            raise InvPiiTask("invalid PII info set for {}: missing lang",
+                             out["pii"].name)
+        pii_data.append(out)
+
+    for field in ("lang", "country"):
+        pii_data = _demux_field(pii_data, field)
+    return pii_data[0] if len(pii_data) == 1 else pii_data
+
+
+class LazyTaskDescriptor:
+    """
+    A raw task descriptor that is fully parsed (importing its implementation
+    object, if needed) only when used. It keeps the PII information needed
+    to select it (PII type, lang & country) in its `piid` attribute.
+    """
+
+    __slots__ = ("raw", "defaults", "piid")
+
+    def __init__(self, taskd: Dict, defaults: Dict = None):
+        """
+          :param taskd: the raw task descriptor (normalized)
+          :param defaults: default values to add
+        """
+        if not isinstance(taskd, dict):
+            raise InvPiiTask("task descriptor is not a dict")
+        self.raw = taskd
+        self.defaults = defaults
+        self.piid = _pii_metadata(taskd, defaults)
+
+
+    def __repr__(self) -> str:
+        return f"<LazyTaskDescriptor {self.raw.get(FIELD_IMP)!r:.40}>"
+
+
+    def parse(self) -> Dict:
+        """
+        Parse the descriptor into a full task definition
+        """
+        return parse_task_descriptor(self.raw, self.defaults)
@@ -0,0 +1,111 @@
+"""
+An in-memory LRU cache of chunk detection results, so that chunks with
+repeated text (e.g. mail footers, disclaimers, boilerplate headers) are
+scanned only once.
+
+Chunks are identified by a hash of their text (plus the neighbouring context,
+if present, since it can change context validation) and a tag for the
+execution plan used. The detected entities are stored relative to the chunk,
+and are replayed on a hit with the id of the new chunk.
+"""
+
+import hashlib
+from collections import OrderedDict, defaultdict
+
+from typing import List, Tuple, Optional
+
+from pii_data.types import PiiEntity, PiiDetector
+from pii_data.types.doc import DocumentChunk
+from pii_data.helper.exception import InvArgException
+
+from .utils import clone_entity
+
+
+TYPE_RESULT = List[Tuple[PiiEntity, PiiDetector]]
+
+
+def chunk_hash(chunk: DocumentChunk, tag: str) -> bytes:
+    """
+    Compute a hash for a chunk, covering its text and its neighbouring
+    context (if present)
+      :param chunk: the chunk
+      :param tag: an additional string to add to the hash (e.g. to identify
+        the execution plan the chunk is processed with)
+    """
+    h = hashlib.blake2b(digest_size=16)
+    ctx = chunk.context or {}
+    for text in (tag or "", chunk.data, ctx.get("before", ""),
+                 ctx.get("after", "")):
+        data = text.encode("utf-8", "surrogatepass")
+        h.update(len(data).to_bytes(8, "little"))
+        h.update(data)
+    return h.digest()
+
+
+class ChunkCache:
+    """
+    A bounded LRU cache of detection results per chunk
+    """
+
+    def __init__(self, maxsize: int):
+        """
+          :param maxsize: maximum number of chunks to keep in the cache
+        """
+        if isinstance(maxsize, bool) or not isinstance(maxsize, int) or maxsize <= 0:
+            raise InvArgException("invalid chunk cache size: {}", maxsize)
+        self.maxsize = maxsize
+        self.stats = defaultdict(int)
+        self._data = OrderedDict()
+
+
+    def __repr__(self) -> str:
+        return f"<ChunkCache {len(self._data)}/{self.maxsize}>"
+
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+    @staticmethod
+    def key(chunk: DocumentChunk, tag: str) -> bytes:
+        """
+        Compute the cache key for a chunk
+          :param chunk: the chunk
+          :param tag: an identifier for the execution plan used
+        """
+        return chunk_hash(chunk, tag)
+
+
+    def get(self, key: bytes, chunkid: str) -> Optional[TYPE_RESULT]:
+        """
+        Fetch the results for a chunk
+          :param key: the chunk key
+          :param chunkid: the id of the chunk being processed
+          :return: the list of (PiiEntity, PiiDetector) tuples for the chunk,
+            or None if not in the cache
+        """
+        entry = self._data.get(key)
+        if entry is None:
+            self.stats["miss"] += 1
+            return None
+        self._data.move_to_end(key)
+        self.stats["hit"] += 1
+        return [(clone_entity(pii, chunkid), det) for pii, det in entry]
+
+
+    def put(self, key: bytes, result: TYPE_RESULT):
+        """
+        Store the results for a chunk
+        """
+        self._data[key] = [(clone_entity(pii), det) for pii, det in result]
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.stats["evicted"] += 1
+
+
+    def clear(self):
+        """
+        Remove all cached results
+        """
+        self._data.clear()
@@ -0,0 +1,90 @@
+"""
+Join consecutive small chunks into a single scan buffer, so that tasks are
+executed once over all of them, and map the entities found in the buffer
+back to their original chunks.
+
+Chunks are joined with a separator that PII patterns are not expected to
+match across (a NUL character between newlines). An entity that does span
+a separator is not assigned to any chunk; the processor then scans the
+affected chunks on their own. Only tasks whose matches do not depend on what
+lies beyond the chunk edges (e.g. regex tasks without anchors) can be
+executed over a buffer.
+"""
+
+from bisect import bisect_right
+
+from typing import List, Tuple, Dict, Optional
+
+from pii_data.types.doc import DocumentChunk
+
+
+# Separator between chunks in a buffer
+SEPARATOR = "\n\x00\n"
+
+
+class ChunkBuffer:
+    """
+    A scan buffer built from a list of chunks, with its offset-to-chunk map
+    """
+
+    def __init__(self, chunks: List[DocumentChunk]):
+        """
+          :param chunks: the chunks to join
+        """
+        self.chunks = chunks
+        self.starts = []
+        pos = 0
+        for chunk in chunks:
+            self.starts.append(pos)
+            pos += len(chunk.data) + len(SEPARATOR)
+        self.chunk = DocumentChunk(id=chunks[0].id,
+                                   data=SEPARATOR.join(c.data for c in chunks),
+                                   context=self._context(chunks))
+
+
+    @staticmethod
+    def _context(chunks: List[DocumentChunk]) -> Optional[Dict]:
+        """
+        Build the context for the buffer: the text before the first chunk,
+        the text after the last one, and the fields shared by all chunks
+        """
+        contexts = [c.context or {} for c in chunks]
+        out = {k: v for k, v in contexts[0].items()
+               if k not in ("before", "after") and
+               all(k in c and c[k] == v for c in contexts[1:])}
+        if "before" in contexts[0]:
+            out["before"] = contexts[0]["before"]
+        if "after" in contexts[-1]:
+            out["after"] = contexts[-1]["after"]
+        return out or None
+
+
+    def __repr__(self) -> str:
+        return f"<ChunkBuffer #{len(self.chunks)}>"
+
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+
+    def index(self, pos: int) -> int:
+        """
+        Return the index of the chunk (or the separator after it) that
+        contains a buffer position
+        """
+        return bisect_right(self.starts, pos) - 1
+
+
+    def locate(self, pos: int, length: int) -> Tuple[int, Optional[int]]:
+        """
+        Map a span in the buffer to its chunk
+          :param pos: start position of the span in the buffer
+          :param length: span length
+          :return: a tuple (chunk index, position in the chunk). The position
+            is None if the span is not fully contained in the chunk
+        """
+        n = self.index(pos)
+        offset = pos - self.starts[n]
+        if offset + length > len(self.chunks[n].data):
+            return n, None
+        return n, offset
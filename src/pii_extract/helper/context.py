@@ -2,13 +2,19 @@
 Context processing
 """
 
+import re
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+
 import regex
 
-from typing import Tuple, List, Dict, Union
+from typing import Tuple, List, Dict, Union, Iterable
 
+from pii_data.types.doc import DocumentChunk
 from pii_data.helper.exception import InvArgException, BuildException
 
 from .normalizer import normalize
+from .regex_cache import compile_regex
 
 
 # Default width around a Pii value where context is searched for
@@ -17,6 +23,9 @@ DEFAULT_CONTEXT_WIDTH = 64
 # Normalization options used when processing context prototypes
 CONTEXT_NORM_OPTIONS = dict(whitespace=True, lowercase=True)
 
+# Non-whitespace runs (the same tokens that str.split() produces)
+_TOKEN = re.compile(r"\S+")
+
 
 def _norm(ctx: str, lang: str, escape: bool = False) -> str:
     """
@@ -68,11 +77,11 @@ def context_spec(spec: Union[str, List, Dict], lang=str) -> Dict:
         value = [_norm(v, lang) for v in value]
     elif ctype == "word":
         out["regex"] = True
-        value = [regex.compile(r"\b" + _norm(v, lang, True) + r"\b") for v in value]
+        value = [compile_regex(r"\b" + _norm(v, lang, True) + r"\b") for v in value]
     elif ctype == "regex":
         out["regex"] = True
         try:
-            value = [regex.compile(v, flags=regex.X) for v in value]
+            value = [compile_regex(v, regex.X) for v in value]
         except Exception as e:
             raise BuildException("cannot compile context regex: {}: {}",
                                  e, value) from e
@@ -95,11 +104,277 @@ def context_spec(spec: Union[str, List, Dict], lang=str) -> Dict:
     return out
 
 
-def context_check(text: str, context_spec: Dict, pii_pos: Tuple[int],
-                  debug: bool = False) -> bool:
+class ContextKeywords:
+    """
+    An index over the union of the string-type context keywords of a set of
+    tasks. It finds all keyword occurrences in a text in a single pass,
+    and keeps their positions in sorted arrays, so that checking whether a
+    keyword appears within a text window becomes a bisection.
+
+    The scan uses a single "regex" alternation in overlapped mode (longest
+    keywords first): at each text position it finds the longest matching
+    keyword, and all the other keywords that match at that position are
+    prefixes of that one.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        """
+          :param keywords: the (already normalized) keywords to index
+        """
+        self.keywords = frozenset(k for k in keywords if k)
+        kwlist = sorted(self.keywords, key=lambda k: (-len(k), k))
+        self._regex = regex.compile("|".join(map(regex.escape, kwlist))) \
+            if kwlist else None
+        # All the keywords that are prefixes of a given keyword
+        self._prefixes = {k: [p for p in kwlist if k.startswith(p)]
+                          for k in kwlist}
+
+
+    def __repr__(self) -> str:
+        return f"<ContextKeywords #{len(self.keywords)}>"
+
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+
+    def covers(self, keywords: Iterable[str]) -> bool:
+        """
+        Check if a list of keywords are all in the index
+        """
+        return self.keywords.issuperset(keywords)
+
+
+    def scan(self, text: str) -> Dict[str, List[int]]:
+        """
+        Find all keyword occurrences in a text. The index holds no state, so
+        it can be shared by tasks running in several threads (results are
+        cached by each ContextText)
+          :return: a dict keyword -> sorted list of start positions
+        """
+        hits = defaultdict(list)
+        if self._regex:
+            for m in self._regex.finditer(text, overlapped=True):
+                for k in self._prefixes[m.group()]:
+                    hits[k].append(m.start())
+        return hits
+
+
+class ContextText:
+    """
+    A whitespace-normalized view of a text, together with a map from raw text
+    positions to normalized positions. It is built once per text, and then
+    allows extracting the normalized context around any raw position by
+    slicing, instead of normalizing the full text prefix/suffix each time.
+
+    If a ContextKeywords index is added, string contexts covered by it are
+    checked through the keyword positions found in the normalized text.
+    """
+
+    def __init__(self, text: str, keywords: ContextKeywords = None):
+        """
+          :param text: the raw text
+          :param keywords: an optional index of context keywords
+        """
+        self.raw = text
+        self.keywords = keywords
+        self._hits = None
+        self._start = []     # start of each token, in the raw text
+        self._end = []       # end of each token, in the raw text
+        self._nstart = []    # start of each token, in the normalized text
+        pos = 0
+        for m in _TOKEN.finditer(text):
+            self._start.append(m.start())
+            self._end.append(m.end())
+            self._nstart.append(pos)
+            pos += m.end() - m.start() + 1
+        self.text = " ".join(text.split())
+
+
+    def __repr__(self) -> str:
+        return f"<ContextText #{len(self.raw)}/{len(self.text)}>"
+
+
+    def position(self, pos: int) -> int:
+        """
+        Map a raw text position to a position in the normalized text. Raw
+        positions within a whitespace run map to the space that replaces it
+        """
+        k = bisect_right(self._start, pos) - 1
+        if k < 0:
+            return 0
+        if pos < self._end[k]:
+            return self._nstart[k] + pos - self._start[k]
+        return self._nstart[k] + self._end[k] - self._start[k]
+
+
+    def before_span(self, pos: int, width: int) -> Tuple[int, int]:
+        """
+        Return the span in the normalized text for the last `width`
+        characters of the normalized text that precedes a raw position
+        """
+        end = self.position(pos)
+        if end and self.text[end - 1] == " ":
+            end -= 1
+        return max(end - width, 0), end
+
+
+    def after_span(self, pos: int, width: int) -> Tuple[int, int]:
+        """
+        Return the span in the normalized text for the first `width`
+        characters of the normalized text that follows a raw position
+        """
+        start = self.position(pos)
+        if start < len(self.text) and self.text[start] == " ":
+            start += 1
+        return start, min(start + width, len(self.text))
+
+
+    def before(self, pos: int, width: int) -> str:
+        """
+        Return the last `width` characters of the normalized text that
+        precedes a raw position, i.e. ``normalize(raw[:pos])[-width:]``
+        """
+        start, end = self.before_span(pos, width)
+        return self.text[start:end]
+
+
+    def after(self, pos: int, width: int) -> str:
+        """
+        Return the first `width` characters of the normalized text that
+        follows a raw position, i.e. ``normalize(raw[pos:])[:width]``
+        """
+        start, end = self.after_span(pos, width)
+        return self.text[start:end]
+
+
+    def find_keyword(self, keywords: Iterable[str],
+                     spans: List[Tuple[int, int]]) -> bool:
+        """
+        Check if any of a list of keywords appears fully within any of a list
+        of spans of the normalized text. All keywords must be in the index
+        """
+        if self._hits is None:
+            self._hits = self.keywords.scan(self.text)
+        for k in keywords:
+            pos = self._hits.get(k)
+            if not pos:
+                continue
+            for start, end in spans:
+                i = bisect_left(pos, start)
+                if i < len(pos) and pos[i] + len(k) <= end:
+                    return True
+        return False
+
+
+class ChunkText:
+    """
+    A per-chunk cache of the derived texts used for context validation: the
+    chunk text extended with its neighbouring context, its lowercased version
+    and its whitespace-normalized view. They are computed on first use, and
+    can be shared by all the tasks that process the chunk.
+
+    It also records the positions of the candidates rejected by context
+    validation in the chunk, for each task.
+    """
+
+    def __init__(self, chunk: DocumentChunk, keywords: ContextKeywords = None):
+        """
+          :param chunk: the document chunk
+          :param keywords: an optional index of context keywords
+        """
+        self.chunk = chunk
+        self.keywords = keywords
+        self._full = None
+        self._prefix = 0
+        self._context = {}
+        self.rejected = defaultdict(list)
+
+
+    def __repr__(self) -> str:
+        return f"<ChunkText {self.chunk.id}>"
+
+
+    def _extend(self):
+        """
+        Enlarge the chunk text with the neighbouring chunks, if available
+        """
+        chunk = self.chunk
+        if chunk.context:
+            bf = chunk.context.get("before", "")
+            self._full = bf + chunk.data + chunk.context.get("after", "")
+            self._prefix = len(bf)
+        else:
+            self._full = chunk.data
+
+
+    @property
+    def full(self) -> str:
+        """
+        The chunk text, extended with the neighbouring chunks
+        """
+        if self._full is None:
+            self._extend()
+        return self._full
+
+
+    @property
+    def prefix(self) -> int:
+        """
+        The position of the chunk data within the extended text
+        """
+        if self._full is None:
+            self._extend()
+        return self._prefix
+
+
+    def context(self, lang: str = None) -> ContextText:
+        """
+        The lowercased & whitespace-normalized view of the extended text
+        """
+        ctx = self._context.get(lang)
+        if ctx is None:
+            lower = normalize(self.full, lang, lowercase=True)
+            ctx = self._context[lang] = ContextText(lower, self.keywords)
+        return ctx
+
+
+def _context_keywords(text: ContextText, context_spec: Dict,
+                      pii_pos: Tuple[int]) -> bool:
+    """
+    Check a string context by using the keyword index in the text
+    """
+    width = context_spec["width"]
+    values = context_spec["value"]
+    spans = []
+    if width[0]:
+        spans.append(text.before_span(pii_pos[0], width[0]))
+    if width[1]:
+        spans.append(text.after_span(pii_pos[1], width[1]))
+    if text.find_keyword(values, spans):
+        return True
+
+    # A keyword may also span the junction between the before & after parts
+    if len(spans) < 2 or spans[0][0] == spans[0][1]:
+        return False
+    spaced = [c for c in values if " " in c]
+    if not spaced:
+        return False
+    n = max(map(len, spaced))
+    (s0, e0), (s1, e1) = spans
+    junction = text.text[max(s0, e0 - n):e0] + " " + text.text[s1:min(e1, s1 + n)]
+    return any(c in junction for c in spaced)
+
+
+def context_check(text: Union[str, ContextText], context_spec: Dict,
+                  pii_pos: Tuple[int], debug: bool = False) -> bool:
     """
     Try to locate any of a list of context candidate elements in a chunk of a
     text string (around a center given by the position of a PII element)
+      :param text: the text, either as a raw string or as a ContextText
+        object (preferred when checking many candidates over the same text)
+      :param context_spec: the context specification
+      :param pii_pos: start & end positions of the PII element in the text
     """
     # Sanitize positions
     width = context_spec["width"]
@@ -107,20 +382,21 @@ def context_check(text: str, context_spec: Dict, pii_pos: Tuple[int],
         pii_pos = (pii_pos, pii_pos)
     elif len(pii_pos) == 1:
         pii_pos.append(pii_pos[0])
+    if isinstance(text, str):
+        text = ContextText(text)
+
+    # String contexts can use the keyword index, if available
+    if (not debug and not context_spec["regex"] and text.keywords
+            and text.keywords.covers(context_spec["value"])):
+        return _context_keywords(text, context_spec, pii_pos)
 
     # Extract context before and/or after the entity
-    if width[0]:
-        src1 = normalize(text[:pii_pos[0]], whitespace=True)
-        start = max(len(src1) - width[0], 0)
-        src = src1[start:]
-    else:
-        src = ""
+    src = text.before(pii_pos[0], width[0]) if width[0] else ""
 
     if width[1]:
-        src2 = normalize(text[pii_pos[1]:], whitespace=True)
         if src:
             src += " "
-        src += src2[:width[1]]
+        src += text.after(pii_pos[1], width[1])
 
     if debug:
         print(f"... context (rgx={context_spec['regex']}): [{src}]")
@@ -130,3 +406,12 @@ def context_check(text: str, context_spec: Dict, pii_pos: Tuple[int],
         return any(c.search(src) for c in context_spec["value"])
     else:
         return any(c in src for c in context_spec["value"])
+
+
+def context_keywords(specs: Iterable[Dict]) -> ContextKeywords:
+    """
+    Build a keyword index with all the string-type keywords in a list of
+    context specifications
+    """
+    return ContextKeywords(c for spec in specs if not spec["regex"]
+                           for c in spec["value"])
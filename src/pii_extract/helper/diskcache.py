@@ -0,0 +1,137 @@
+"""
+Common support for the persistent on-disk caches: cache location, activation
+through an environment variable, and atomic file writes.
+
+A cache is not active by default. It is activated through its environment
+variable, which can contain:
+  - a directory name, to be used as the cache location
+  - "1" or "on", to use the default location (under the user cache directory)
+"""
+
+import os
+import tempfile
+from pathlib import Path
+from collections import defaultdict
+
+from typing import Callable, IO, Optional, Type, TypeVar
+
+
+def default_cache_dir(name: str) -> Path:
+    """
+    Return the default location for a cache
+      :param name: the cache folder name, under the pii-extract user cache
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "pii-extract" / name
+
+
+def atomic_write(name: Path, writer: Callable[[IO], None],
+                 binary: bool = False):
+    """
+    Write a file atomically (through a temporary file in the same folder,
+    since several processes may be writing it at the same time)
+      :param name: the file to write
+      :param writer: a function that writes the contents to an open file
+      :param binary: open the file in binary mode
+    Raises OSError if the file cannot be written
+    """
+    name.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmpname = tempfile.mkstemp(dir=name.parent, suffix=".tmp")
+    try:
+        if binary:
+            with os.fdopen(fd, "wb") as f:
+                writer(f)
+        else:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                writer(f)
+        os.replace(tmpname, name)
+    except BaseException:
+        try:
+            os.unlink(tmpname)
+        except OSError:
+            pass
+        raise
+
+
+class DiskCache:
+    """
+    Base class for a folder-based cache, with one file per entry
+    """
+
+    # Name of the default cache folder
+    folder = None
+
+    # Suffix for cache files
+    suffix = None
+
+    def __init__(self, path: str = None):
+        """
+          :param path: cache folder (if not given, use the default location)
+        """
+        self.path = Path(path) if path else default_cache_dir(self.folder)
+        self.stats = defaultdict(int)
+
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {self.path}>"
+
+
+    def _write(self, name: Path, writer: Callable[[IO], None],
+               binary: bool = False) -> bool:
+        """
+        Write a cache file atomically
+          :return: True if the file could be written
+        """
+        try:
+            atomic_write(name, writer, binary)
+            return True
+        except OSError:
+            # a read-only cache is still usable
+            self.stats["error"] += 1
+            return False
+
+
+    def size(self) -> int:
+        """
+        Return the number of entries in the cache
+        """
+        if not self.path.is_dir():
+            return 0
+        return sum(1 for _ in self.path.glob("*" + self.suffix))
+
+
+    def clear(self) -> int:
+        """
+        Remove all cache entries
+          :return: the number of removed entries
+        """
+        num = 0
+        if self.path.is_dir():
+            for name in self.path.glob("*" + self.suffix):
+                name.unlink()
+                num += 1
+        return num
+
+
+# --------------------------------------------------------------------------
+
+TYPE_CACHE = TypeVar("TYPE_CACHE", bound=DiskCache)
+
+_CACHE = {}
+
+
+def get_disk_cache(cls: Type[TYPE_CACHE], envvar: str) -> Optional[TYPE_CACHE]:
+    """
+    Return the cache activated by an environment variable (or None if it is
+    not active). There is a single cache object per location
+      :param cls: the cache class
+      :param envvar: the environment variable that activates the cache
+    """
+    value = os.environ.get(envvar, "").strip()
+    if value.lower() in ("", "0", "off"):
+        return None
+    path = None if value.lower() in ("1", "on") else value
+    cache = _CACHE.get((cls, path))
+    if cache is None:
+        cache = _CACHE[cls, path] = cls(path)
+    return cache
@@ -0,0 +1,265 @@
+"""
+Resolution of overlapping PII entities detected in a chunk (e.g. a phone
+number pattern matching inside a government id, or two tasks detecting the
+same name).
+
+The resolver works over the list of (PiiEntity, PiiDetector) tuples for a
+chunk, sorted by position. A sweep over the list finds the groups of
+(transitively) overlapping entities, and only those groups are processed,
+according to the selected policy:
+  - longest: keep the longest entities
+  - method: keep the entities with the strongest detection method
+  - merge: merge overlapping entities of the same PII type into a single
+    entity spanning all of them (overlapping entities of different types are
+    all kept)
+"""
+
+from collections import defaultdict
+
+from typing import Dict, List, Tuple, Callable, Iterable
+
+from pii_data.types import PiiEntity, PiiDetector
+from pii_data.helper.exception import InvArgException
+
+
+TYPE_RESULT = List[Tuple[PiiEntity, PiiDetector]]
+
+POLICIES = ("longest", "method", "merge")
+
+# Strength of the elements in a detector method (see doc/regex.md)
+METHOD_STRENGTH = {
+    "weak-regex": 1,
+    "soft-regex": 2,
+    "regex": 3,
+    "strong-regex": 4,
+    "strong regex": 4,
+    "context": 1,
+    "checksum": 2
+}
+
+
+def method_strength(method: str, strength: Dict[str, int] = None) -> int:
+    """
+    Compute the strength of a detector method, as the sum of the strengths
+    of its (comma-separated) elements. Unknown elements count as 1
+    """
+    if not method:
+        return 0
+    if strength is None:
+        strength = METHOD_STRENGTH
+    return sum(strength.get(m.strip(), 1) for m in method.split(","))
+
+
+def _end(pii: PiiEntity) -> int:
+    return pii.pos + len(pii)
+
+
+def _overlap_groups(piilist: TYPE_RESULT) -> Iterable[Tuple[int, int]]:
+    """
+    Find the groups of overlapping entities in a list sorted by position
+      :return: an iterable of (start, end) index ranges for the groups
+    """
+    start = 0
+    maxend = None
+    for n, (pii, _) in enumerate(piilist):
+        if maxend is not None and pii.pos >= maxend:
+            if n - start > 1:
+                yield start, n
+            start = n
+            maxend = None
+        end = _end(pii)
+        if maxend is None or end > maxend:
+            maxend = end
+    if len(piilist) - start > 1:
+        yield start, len(piilist)
+
+
+class _IndexSet:
+    """
+    A set of integers in [0, n), with logarithmic-time insertion, rank and
+    selection (a Fenwick tree of membership counts)
+    """
+
+    def __init__(self, n: int):
+        self._n = n
+        self._tree = [0]*(n + 1)
+        self._top = 1 << (n.bit_length() - 1) if n else 0
+        self.size = 0
+
+
+    def add(self, i: int):
+        """
+        Add an element to the set (it must not be already there)
+        """
+        self.size += 1
+        i += 1
+        while i <= self._n:
+            self._tree[i] += 1
+            i += i & -i
+
+
+    def contains(self, i: int) -> bool:
+        """
+        Check if an element is in the set
+        """
+        return self.rank(i + 1) > self.rank(i)
+
+
+    def rank(self, i: int) -> int:
+        """
+        Return the number of elements in the set smaller than a value
+        """
+        r = 0
+        while i > 0:
+            r += self._tree[i]
+            i &= i - 1
+        return r
+
+
+    def nth(self, k: int) -> int:
+        """
+        Return the k-th smallest element in the set (starting at k=1)
+        """
+        pos = 0
+        step = self._top
+        while step:
+            nxt = pos + step
+            if nxt <= self._n and self._tree[nxt] < k:
+                pos = nxt
+                k -= self._tree[nxt]
+            step >>= 1
+        return pos
+
+
+def _select(group: TYPE_RESULT, key: Callable) -> TYPE_RESULT:
+    """
+    Select a non-overlapping subset of a group of entities, by taking them in
+    decreasing key order (ties are resolved by position).
+
+    Since the group is sorted by position and the kept entities do not
+    overlap, a candidate overlaps a kept entity iff it overlaps the kept
+    entity just before it or the one just after it (in group order). They
+    are found in an index set, so the selection is O(n log n)
+    """
+    order = sorted(range(len(group)), key=lambda i: (key(group[i]), -i),
+                   reverse=True)
+    kept = _IndexSet(len(group))
+    for i in order:
+        pii = group[i][0]
+        r = kept.rank(i)
+        if r and _end(group[kept.nth(r)][0]) > pii.pos:
+            continue
+        if r < kept.size and group[kept.nth(r + 1)][0].pos < _end(pii):
+            continue
+        kept.add(i)
+    return [item for i, item in enumerate(group) if kept.contains(i)]
+
+
+def _merge(group: TYPE_RESULT, text: str) -> TYPE_RESULT:
+    """
+    Merge the overlapping entities of the same PII type in a group. The merged
+    entity keeps the fields & detector of the longest entity
+    """
+    bytype = defaultdict(list)
+    for item in group:
+        bytype[item[0].info.pii].append(item)
+
+    out = []
+    for items in bytype.values():
+        for start, end in _runs(items):
+            run = items[start:end]
+            if len(run) == 1:
+                out.append(run[0])
+                continue
+            base, det = max(run, key=lambda p: len(p[0]))
+            base.pos = min(p[0].pos for p in run)
+            base.fields["value"] = text[base.pos:max(_end(p[0]) for p in run)]
+            out.append((base, det))
+    out.sort(key=lambda p: p[0].pos)
+    return out
+
+
+def _runs(items: TYPE_RESULT) -> Iterable[Tuple[int, int]]:
+    """
+    Produce the runs of overlapping entities in a list sorted by position
+    (including single-entity runs)
+    """
+    start = 0
+    maxend = _end(items[0][0])
+    for n in range(1, len(items)):
+        pii = items[n][0]
+        if pii.pos >= maxend:
+            yield start, n
+            start = n
+        maxend = max(maxend, _end(pii))
+    yield start, len(items)
+
+
+class OverlapResolver:
+    """
+    Resolve overlaps between the entities detected in a chunk
+    """
+
+    def __init__(self, policy: str = "longest", strength: Dict[str, int] = None):
+        """
+          :param policy: the resolution policy: "longest", "method", "merge"
+          :param strength: strength values for method elements, to override
+            the default ones
+        """
+        if policy not in POLICIES:
+            raise InvArgException("invalid overlap policy: {}", policy)
+        self.policy = policy
+        self.strength = dict(METHOD_STRENGTH, **(strength or {}))
+        self.stats = defaultdict(int)
+        self._cache = {}
+
+
+    def __repr__(self) -> str:
+        return f"<OverlapResolver {self.policy}>"
+
+
+    def _strength(self, detector: PiiDetector) -> int:
+        """
+        Return the method strength for a detector
+        """
+        method = detector.fields.get("method") if detector else None
+        value = self._cache.get(method)
+        if value is None:
+            value = self._cache[method] = method_strength(method, self.strength)
+        return value
+
+
+    def __call__(self, piilist: TYPE_RESULT, text: str) -> TYPE_RESULT:
+        """
+        Resolve the overlaps in a list of entities detected in a chunk
+          :param piilist: list of (PiiEntity, PiiDetector) tuples, sorted by
+            position
+          :param text: the chunk text (used for the values of merged entities)
+          :return: the resolved list, also sorted by position
+        """
+        groups = list(_overlap_groups(piilist))
+        if not groups:
+            return piilist
+
+        if self.policy == "longest":
+            def key(p):
+                return len(p[0]), self._strength(p[1])
+        elif self.policy == "method":
+            def key(p):
+                return self._strength(p[1]), len(p[0])
+
+        out = []
+        last = 0
+        for start, end in groups:
+            out += piilist[last:start]
+            group = piilist[start:end]
+            if self.policy == "merge":
+                resolved = _merge(group, text)
+                self.stats["merged"] += len(group) - len(resolved)
+            else:
+                resolved = _select(group, key)
+                self.stats["removed"] += len(group) - len(resolved)
+            out += resolved
+            last = end
+        out += piilist[last:]
+        return out
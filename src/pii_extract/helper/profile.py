@@ -0,0 +1,91 @@
+"""
+A compact character profile for a text chunk, and the requirements that
+tasks can declare against it, so that tasks that cannot possibly produce
+any result for a chunk are not executed
+"""
+
+from dataclasses import dataclass
+
+import regex
+
+from typing import Dict, Union, List
+
+from pii_data.helper.exception import InvArgException
+
+
+_DIGIT_RUN = regex.compile(r"\d+")
+
+# Features that can be required, with their value type:
+#  - bool features require the chunk to have the feature
+#  - int features require a minimum value in the chunk
+FEATURES = {
+    "digits": bool,     # the chunk contains digits
+    "digit_run": int,   # the longest run of consecutive digits
+    "at": bool,         # the chunk contains a "@"
+    "plus": bool,       # the chunk contains a "+"
+    "ascii": bool,      # the chunk is pure ASCII
+    "length": int       # the chunk length
+}
+
+TYPE_REQUIRES = Union[Dict, List[str], str]
+
+
+def parse_requires(spec: TYPE_REQUIRES) -> Dict:
+    """
+    Validate & normalize a task requirements specification. It can be
+      - a dictionary of feature: value
+      - a list (or a single string) of boolean feature names
+    """
+    if not spec:
+        return None
+    if isinstance(spec, str):
+        spec = [spec]
+    if isinstance(spec, (list, tuple)):
+        spec = {f: True for f in spec}
+    if not isinstance(spec, dict):
+        raise InvArgException("invalid requires spec: {}", spec)
+
+    out = {}
+    for name, value in spec.items():
+        ftype = FEATURES.get(name)
+        if ftype is None:
+            raise InvArgException("unknown required feature: {}", name)
+        if ftype is bool and not isinstance(value, bool):
+            raise InvArgException("required feature {} must be a boolean", name)
+        elif ftype is int and (isinstance(value, bool) or not isinstance(value, int)):
+            raise InvArgException("required feature {} must be an integer", name)
+        if value:
+            out[name] = value
+    return out or None
+
+
+@dataclass(frozen=True)
+class ChunkProfile:
+    """
+    The character profile of a text chunk
+    """
+    length: int
+    digits: bool
+    digit_run: int
+    at: bool
+    plus: bool
+    ascii: bool
+
+
+    @classmethod
+    def build(cls, text: str) -> "ChunkProfile":
+        """
+        Compute the profile for a text
+        """
+        run = max(map(len, _DIGIT_RUN.findall(text)), default=0)
+        return cls(length=len(text), digits=run > 0, digit_run=run,
+                   at="@" in text, plus="+" in text, ascii=text.isascii())
+
+
+    def satisfies(self, requires: Dict) -> bool:
+        """
+        Check if the profile satisfies a (normalized) requirements dict
+        """
+        # (this works also for boolean features, since False < True)
+        return all(getattr(self, name) >= value
+                   for name, value in requires.items())
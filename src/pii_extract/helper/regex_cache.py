@@ -0,0 +1,110 @@
+"""
+A persistent on-disk cache for compiled regex patterns.
+
+Compiled patterns from the "regex" package can be pickled together with
+their compiled code, and unpickling them is much faster than compiling them
+again. The cache stores one file per pattern, keyed by the pattern text, the
+compilation flags and the versions of the "regex" package and of Python.
+
+The cache is not active by default. It is activated through the
+PII_EXTRACT_REGEX_CACHE environment variable (see the diskcache module).
+Note that it will load pickled files from that location, so it should be
+writable only by trusted users.
+"""
+
+import sys
+import pickle
+import hashlib
+from pathlib import Path
+from functools import partial
+
+import regex
+
+from typing import Dict, Optional
+
+from .diskcache import DiskCache, get_disk_cache
+
+
+# Environment variable used to activate the cache
+CACHE_ENV = "PII_EXTRACT_REGEX_CACHE"
+
+# Suffix for cache files
+CACHE_SUFFIX = ".pkl"
+
+
+class RegexCache(DiskCache):
+    """
+    A folder-based cache of compiled regex patterns
+    """
+
+    folder = "regex"
+    suffix = CACHE_SUFFIX
+
+    def __init__(self, path: str = None):
+        """
+          :param path: cache folder (if not given, use the default location)
+        """
+        super().__init__(path)
+        self._version = f"{regex.__version__}:{sys.version_info[:2]}"
+
+
+    def _file(self, pattern: str, flags: int) -> Path:
+        """
+        Return the cache file for a pattern
+        """
+        key = "\0".join((self._version, str(flags), pattern))
+        name = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return self.path / (name + CACHE_SUFFIX)
+
+
+    def compile(self, pattern: str, flags: int = 0) -> regex.Pattern:
+        """
+        Compile a regex pattern, using the cached version if available
+        """
+        name = self._file(pattern, flags)
+        try:
+            with open(name, "rb") as f:
+                compiled = pickle.load(f)
+            if compiled.pattern == pattern and compiled.flags & flags == flags:
+                self.stats["hit"] += 1
+                return compiled
+        except FileNotFoundError:
+            pass
+        except Exception:
+            self.stats["error"] += 1
+
+        # Not available (or invalid): compile & store it
+        self.stats["miss"] += 1
+        compiled = regex.compile(pattern, flags=flags)
+        self._write(name, partial(pickle.dump, compiled,
+                                  protocol=pickle.HIGHEST_PROTOCOL),
+                    binary=True)
+        return compiled
+
+
+# --------------------------------------------------------------------------
+
+
+def get_regex_cache() -> Optional[RegexCache]:
+    """
+    Return the active regex cache, as defined by the environment
+    """
+    return get_disk_cache(RegexCache, CACHE_ENV)
+
+
+def compile_regex(pattern: str, flags: int = 0) -> regex.Pattern:
+    """
+    Compile a regex pattern, going through the on-disk cache if active
+    """
+    cache = get_regex_cache()
+    if cache:
+        return cache.compile(pattern, flags)
+    return regex.compile(pattern, flags=flags)
+
+
+def regex_cache_stats() -> Dict:
+    """
+    Return the counters for the active cache (or an empty dict)
+    """
+    cache = get_regex_cache()
+    return dict(cache.stats) if cache else {}
@@ -3,6 +3,8 @@ Utilities for managing field values, and for setting the "process" field in
 a PiiEntity object
 """
 
+from copy import deepcopy
+
 from typing import Dict, Union, Set, List, Iterable
 
 from pii_data.types import PiiEntity
@@ -56,3 +58,18 @@ def set_pii_stage(pii: PiiEntity, allow_duplicates: bool = False, **data) -> boo
 
     pii.add_process_stage(defs.STAGE, **data)
     return True
+
+
+def clone_entity(pii: PiiEntity, chunkid: str = None) -> PiiEntity:
+    """
+    Create an independent copy of a PiiEntity object, optionally moving it
+    to another chunk. The detector index (which belongs to the collection
+    the entity was in) is not copied
+    """
+    new = PiiEntity(pii.info, pii.fields["value"], pii.fields["chunkid"],
+                    pii.pos)
+    new.fields = {k: deepcopy(v) for k, v in pii.fields.items()
+                  if k != "detector"}
+    if chunkid is not None:
+        new.fields["chunkid"] = chunkid
+    return new
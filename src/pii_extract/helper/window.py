@@ -0,0 +1,113 @@
+"""
+Split oversized chunks into overlapping windows, so that they can be scanned
+independently (and in parallel).
+
+Window boundaries are moved back to a whitespace character (if there is one
+close enough), so that windows do not start or end in the middle of a word.
+Each window "owns" the entities that start before the beginning of the next
+window; entities starting in the overlap zone are left to the next window,
+which contains them entirely (provided they are not longer than the
+overlap). Hence each entity is reported once, by exactly one window.
+
+Each window gets as context the surrounding text, with a margin wide enough
+for the context validation of the tasks (measured over whitespace-normalized
+text, as context validation is).
+"""
+
+from typing import List, Tuple
+
+from pii_data.types.doc import DocumentChunk
+from pii_data.helper.exception import InvArgException
+
+
+# Default size of the overlap between consecutive windows
+DEFAULT_WINDOW_OVERLAP = 256
+
+# Minimum size of the text around each window added as its context
+WINDOW_CONTEXT = 256
+
+
+def _cut(text: str, pos: int, low: int) -> int:
+    """
+    Find a cut point in a text: the position just after the last whitespace
+    in [low, pos), or `pos` if there is none
+    """
+    for n in range(pos - 1, low - 1, -1):
+        if text[n].isspace():
+            return n + 1
+    return pos
+
+
+def _margin_start(text: str, pos: int, width: int) -> int:
+    """
+    Find the start of the text preceding a position that contains at least
+    `width` characters once whitespace runs are collapsed
+    """
+    n = 0
+    while pos > 0 and n < width:
+        pos -= 1
+        if not (text[pos].isspace() and text[pos - 1:pos].isspace()):
+            n += 1
+    return pos
+
+
+def _margin_end(text: str, pos: int, width: int) -> int:
+    """
+    Find the end of the text following a position that contains at least
+    `width` characters once whitespace runs are collapsed
+    """
+    n = 0
+    while pos < len(text) and n < width:
+        if not (text[pos].isspace() and text[pos + 1:pos + 2].isspace()):
+            n += 1
+        pos += 1
+    return pos
+
+
+def window_spans(text: str, size: int,
+                 overlap: int = None) -> List[Tuple[int, int, int]]:
+    """
+    Compute the windows to split a text into
+      :param text: the text to split
+      :param size: the maximum window size
+      :param overlap: the size of the overlap between consecutive windows
+        (it must be less than half the window size)
+      :return: a list of (start, end, limit) tuples: each window covers
+        text[start:end], and owns the entities that start before `limit`
+    """
+    if overlap is None:
+        overlap = min(DEFAULT_WINDOW_OVERLAP, size // 4)
+    if size <= 0 or overlap < 0 or 2*overlap >= size:
+        raise InvArgException("invalid window size/overlap: {}/{}",
+                              size, overlap)
+    length = len(text)
+    out = []
+    start = 0
+    while start + size < length:
+        end = _cut(text, start + size, start + size - overlap//2)
+        limit = _cut(text, end - overlap, max(start + 1, end - overlap - overlap//2))
+        out.append((start, end, limit))
+        start = limit
+    out.append((start, length, length))
+    return out
+
+
+def window_chunk(chunk: DocumentChunk, start: int, end: int,
+                 margin: int = WINDOW_CONTEXT) -> DocumentChunk:
+    """
+    Create the chunk for a window. It keeps the chunk id (so that entity
+    positions are only offset), and gets as context the surrounding text
+      :param margin: the minimum size of the context on each side
+    """
+    data = chunk.data
+    context = dict(chunk.context or {})
+    low = _margin_start(data, start, margin)
+    high = _margin_end(data, end, margin)
+    before = data[low:start]
+    after = data[end:high]
+    if low == 0:
+        before = context.get("before", "") + before
+    if high == len(data):
+        after += context.get("after", "")
+    context.update(before=before, after=after)
+    return DocumentChunk(id=chunk.id, data=data[start:end], context=context)
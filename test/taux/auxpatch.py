@@ -60,17 +60,31 @@ class PluginMock:
         return iter(data)
 
 
-def patch_entry_points(monkeypatch, num: int = 1):
+class PluginManifestMock(PluginMock):
+
+    pii_manifest = {"lang": ["en", "any"],
+                    "pii": ["PHONE_NUMBER", "GOV_ID", "CREDIT_CARD"]}
+    instances = 0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        PluginManifestMock.instances += 1
+
+
+def patch_entry_points(monkeypatch, num: int = 1, manifest: bool = False):
     """
     Monkey-patch the the importlib.metadata.entry_points() call to return
     our plugin entry point list
+      :param manifest: use a plugin class that declares a manifest
     """
     plist = []
     for i in range(num):
         mock_entry = Mock()
         mock_entry.name = f"piisa-detectors-mock-plugin-{i+1}"
-        mock_entry.load = Mock(return_value=PluginMock)
+        mock_entry.load = Mock(return_value=PluginManifestMock if manifest
+                               else PluginMock)
         plist.append(mock_entry)
+    PluginManifestMock.instances = 0
 
     def side_effect(key=None, group=None):
         if key == PII_EXTRACT_PLUGIN_ID or group == PII_EXTRACT_PLUGIN_ID:
@@ -0,0 +1,88 @@
+"""
+Test the in-memory chunk cache
+"""
+
+import pytest
+
+from pii_data.types import PiiEnum, PiiEntity, PiiEntityInfo, PiiDetector
+from pii_data.types.doc import DocumentChunk
+from pii_data.helper.exception import InvArgException
+
+import pii_extract.helper.chunk_cache as mod
+
+
+INFO = PiiEntityInfo(PiiEnum.PHONE_NUMBER, "en")
+DETECTOR = PiiDetector("unit-test", "phone", "0.1")
+
+
+def _result(chunkid: str):
+    pii = PiiEntity(INFO, "+34983453999", chunkid, 12, country="es")
+    pii.add_process_stage("detection")
+    return [(pii, DETECTOR)]
+
+
+def test100_key():
+    """
+    Test chunk keys
+    """
+    c1 = DocumentChunk(id=0, data="some text")
+    c2 = DocumentChunk(id=1, data="some text")
+    c3 = DocumentChunk(id=0, data="some text", context={"before": "x"})
+    key = mod.ChunkCache.key
+    assert key(c1, "en") == key(c2, "en")
+    assert key(c1, "en") != key(c1, "es")
+    assert key(c1, "en") != key(c3, "en")
+    assert len(key(c1, "en")) == 16
+
+
+def test110_get_put():
+    """
+    Test storing & replaying results
+    """
+    cache = mod.ChunkCache(10)
+    assert cache.get(b"k1", "7") is None
+
+    result = _result("0")
+    cache.put(b"k1", result)
+    got = cache.get(b"k1", "7")
+    assert len(got) == 1
+    pii, det = got[0]
+    assert det is DETECTOR
+    assert pii.fields["chunkid"] == "7"
+    assert pii.asdict() == dict(result[0][0].asdict(), chunkid="7")
+
+    # Replayed entities are independent from the cached ones
+    pii.add_process_stage("decision")
+    result[0][0].add_field("detector", 1)
+    pii2 = cache.get(b"k1", "8")[0][0]
+    assert pii2.fields["process"] == {"stage": "detection"}
+    assert "detector" not in pii2.fields
+
+    assert dict(cache.stats) == {"miss": 1, "hit": 2}
+
+
+def test120_lru():
+    """
+    Test eviction of least recently used entries
+    """
+    cache = mod.ChunkCache(2)
+    cache.put(b"k1", [])
+    cache.put(b"k2", [])
+    assert cache.get(b"k1", "0") == []
+    cache.put(b"k3", [])
+    assert len(cache) == 2
+    assert cache.get(b"k2", "0") is None
+    assert cache.get(b"k1", "0") == []
+    assert cache.stats["evicted"] == 1
+
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test130_invalid():
+    """
+    Test an invalid cache size
+    """
+    for size in (0, -1, "10", True):
+        with pytest.raises(InvArgException):
+            mod.ChunkCache(size)
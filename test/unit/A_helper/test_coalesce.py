@@ -0,0 +1,47 @@
+"""
+Test the chunk buffer used to coalesce small chunks
+"""
+
+from pii_data.types.doc import DocumentChunk
+
+import pii_extract.helper.coalesce as mod
+
+
+def test100_buffer():
+    """
+    Test building a buffer
+    """
+    chunks = [DocumentChunk(n, t) for n, t in enumerate(["ab", "", "cdef"])]
+    buf = mod.ChunkBuffer(chunks)
+    assert len(buf) == 3
+    assert buf.chunk.data == "ab" + mod.SEPARATOR*2 + "cdef"
+    assert buf.chunk.id == "0"
+    assert buf.starts == [0, 5, 8]
+
+
+def test110_locate():
+    """
+    Test mapping buffer positions to chunks
+    """
+    chunks = [DocumentChunk(n, t) for n, t in enumerate(["ab", "", "cdef"])]
+    buf = mod.ChunkBuffer(chunks)
+    assert buf.locate(0, 2) == (0, 0)
+    assert buf.locate(1, 1) == (0, 1)
+    assert buf.locate(9, 3) == (2, 1)
+    # Spans crossing a separator
+    assert buf.locate(1, 2) == (0, None)
+    assert buf.locate(3, 6) == (0, None)
+    assert buf.index(9) == 2
+
+
+def test120_context():
+    """
+    Test the context of a buffer
+    """
+    chunks = [DocumentChunk(0, "ab", {"lang": "en", "before": "x", "after": "y"}),
+              DocumentChunk(1, "cd", {"lang": "en", "before": "z", "after": "w"})]
+    buf = mod.ChunkBuffer(chunks)
+    assert buf.chunk.context == {"lang": "en", "before": "x", "after": "w"}
+
+    buf = mod.ChunkBuffer([DocumentChunk(0, "ab"), DocumentChunk(1, "cd")])
+    assert buf.chunk.context is None
@@ -3,6 +3,8 @@ Test the context checking function
 """
 import pytest
 
+from pii_data.types.doc import DocumentChunk
+
 import pii_extract.helper.context as mod
 from pii_extract.helper.exception import InvArgException
 
@@ -95,3 +97,80 @@ def test20_context_error():
     for context in TEST_ERROR:
         with pytest.raises(InvArgException):
             mod.context_spec(context)
+
+
+def test30_context_text():
+    """
+    Check the normalized context text view
+    """
+    raw = "  the special\n\n number  is   34512 "
+    text = mod.ContextText(raw)
+    assert text.text == "the special number is 34512"
+    for pos in range(len(raw) + 1):
+        for width in (1, 5, 64):
+            exp = mod.normalize(raw[:pos], whitespace=True)[-width:]
+            assert text.before(pos, width) == exp
+            exp = mod.normalize(raw[pos:], whitespace=True)[:width]
+            assert text.after(pos, width) == exp
+
+
+def test40_context_check_text():
+    """
+    Check contexts over a ContextText object
+    """
+    for (text, context) in TEST_TRUE:
+        spec = mod.context_spec(context)
+        assert mod.context_check(mod.ContextText(text), spec, 20) is True
+    for (text, context) in TEST_FALSE:
+        spec = mod.context_spec(context)
+        assert mod.context_check(mod.ContextText(text), spec, 20) is False
+
+
+def test50_context_keywords():
+    """
+    Check the context keyword index
+    """
+    index = mod.ContextKeywords(["phone", "phone number", "number", "one"])
+    hits = index.scan("my phone number is one")
+    assert hits == {"phone number": [3], "phone": [3], "one": [5, 19],
+                    "number": [9]}
+    assert index.covers(["phone", "one"])
+    assert not index.covers(["phone", "mobile"])
+
+
+def test60_context_check_keywords():
+    """
+    Check contexts using a keyword index
+    """
+    specs = [mod.context_spec(c) for (_, c) in TEST_TRUE + TEST_FALSE]
+    index = mod.context_keywords(specs)
+    for (text, context) in TEST_TRUE:
+        spec = mod.context_spec(context)
+        assert mod.context_check(mod.ContextText(text, index), spec, 20) is True
+    for (text, context) in TEST_FALSE:
+        spec = mod.context_spec(context)
+        assert mod.context_check(mod.ContextText(text, index), spec, 20) is False
+
+    # A keyword that spans the junction between the before & after parts
+    spec = mod.context_spec({"value": "number is", "width": [10, 10]})
+    text = mod.ContextText("the number 34512 is here", mod.context_keywords([spec]))
+    assert mod.context_check(text, spec, [11, 16]) is True
+    assert mod.context_check(text.raw, spec, [11, 16]) is True
+
+
+def test70_chunk_text():
+    """
+    Check the per-chunk derived text cache
+    """
+    chunk = DocumentChunk("1", "My Phone\nis 34512",
+                          context={"before": "Call  me. ", "after": " Thanks"})
+    text = mod.ChunkText(chunk)
+    assert text.full == "Call  me. My Phone\nis 34512 Thanks"
+    assert text.prefix == 10
+
+    ctx = text.context("en")
+    assert ctx.text == "call me. my phone is 34512 thanks"
+    assert text.context("en") is ctx
+
+    spec = mod.context_spec("my phone")
+    assert mod.context_check(ctx, spec, [text.prefix + 12, text.prefix + 17])
@@ -0,0 +1,71 @@
+"""
+Test the common support for on-disk caches
+"""
+
+import json
+from functools import partial
+
+import pytest
+
+import pii_extract.helper.diskcache as mod
+
+
+class ExampleCache(mod.DiskCache):
+    folder = "example"
+    suffix = ".json"
+
+
+def test100_atomic_write(tmp_path):
+    """
+    Test writing a file atomically
+    """
+    name = tmp_path / "sub" / "file.json"
+    mod.atomic_write(name, partial(json.dump, {"a": 1}))
+    assert json.loads(name.read_text()) == {"a": 1}
+
+    # A failed write leaves the file untouched, and no temporary files
+    with pytest.raises(TypeError):
+        mod.atomic_write(name, partial(json.dump, {"a": object()}))
+    assert json.loads(name.read_text()) == {"a": 1}
+    assert list(name.parent.iterdir()) == [name]
+
+
+def test110_cache(tmp_path):
+    """
+    Test the base cache class
+    """
+    cache = ExampleCache(tmp_path)
+    assert cache.size() == 0
+    assert cache._write(tmp_path / "a.json", partial(json.dump, 1))
+    assert cache._write(tmp_path / "b.json", partial(json.dump, 2))
+    (tmp_path / "c.txt").write_text("other")
+    assert cache.size() == 2
+    assert cache.clear() == 2
+    assert cache.size() == 0
+
+
+def test120_default_dir(monkeypatch, tmp_path):
+    """
+    Test the default cache location
+    """
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    assert ExampleCache().path == tmp_path / "pii-extract" / "example"
+
+
+def test200_env(monkeypatch, tmp_path):
+    """
+    Test activating a cache through the environment
+    """
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    for value in ("", "0", "off"):
+        monkeypatch.setenv("PII_EXAMPLE_CACHE", value)
+        assert mod.get_disk_cache(ExampleCache, "PII_EXAMPLE_CACHE") is None
+
+    monkeypatch.setenv("PII_EXAMPLE_CACHE", "on")
+    cache = mod.get_disk_cache(ExampleCache, "PII_EXAMPLE_CACHE")
+    assert cache.path == tmp_path / "pii-extract" / "example"
+
+    monkeypatch.setenv("PII_EXAMPLE_CACHE", str(tmp_path / "other"))
+    cache2 = mod.get_disk_cache(ExampleCache, "PII_EXAMPLE_CACHE")
+    assert cache2.path == tmp_path / "other"
+    assert mod.get_disk_cache(ExampleCache, "PII_EXAMPLE_CACHE") is cache2
@@ -0,0 +1,148 @@
+"""
+Test the overlap resolver
+"""
+
+import random
+
+import pytest
+
+from pii_data.types import PiiEnum, PiiEntity, PiiEntityInfo, PiiDetector
+from pii_data.helper.exception import InvArgException
+
+import pii_extract.helper.overlap as mod
+
+
+TEXT = "call 555-123-4567 or 555-1234 at id 12-555-123-4567-X"
+
+DET_WEAK = PiiDetector("unit-test", "weak", "0.1", method="weak-regex")
+DET_STRONG = PiiDetector("unit-test", "strong", "0.1",
+                         method="strong-regex,checksum")
+
+
+def _pii(ptype: PiiEnum, value: str, det: PiiDetector, start: int = 0):
+    pos = TEXT.index(value, start)
+    info = PiiEntityInfo(ptype, "en")
+    return PiiEntity(info, value, "0", pos), det
+
+
+def _list():
+    phone = PiiEnum.PHONE_NUMBER
+    return sorted([
+        _pii(phone, "555-123-4567", DET_WEAK),
+        _pii(phone, "555-123", DET_WEAK),
+        _pii(phone, "555-1234", DET_WEAK),
+        _pii(phone, "555-123-4567", DET_WEAK, 30),
+        _pii(PiiEnum.GOV_ID, "12-555-123", DET_STRONG)
+    ], key=lambda p: p[0].pos)
+
+
+def _values(piilist):
+    return [(p.fields["type"], p.fields["value"]) for p, _ in piilist]
+
+
+def test100_method_strength():
+    """
+    Test method strength computation
+    """
+    assert mod.method_strength(None) == 0
+    assert mod.method_strength("regex") == 3
+    assert mod.method_strength("regex,context") == 4
+    assert mod.method_strength("strong-regex, checksum") == 6
+    assert mod.method_strength("model") == 1
+    assert mod.method_strength("model", {"model": 5}) == 5
+
+
+def test110_invalid():
+    """
+    Test an invalid policy
+    """
+    with pytest.raises(InvArgException):
+        mod.OverlapResolver("shortest")
+
+
+def test120_no_overlap():
+    """
+    Test a list without overlaps
+    """
+    piilist = [_pii(PiiEnum.PHONE_NUMBER, "555-123-4567", DET_WEAK),
+               _pii(PiiEnum.PHONE_NUMBER, "555-1234", DET_WEAK)]
+    for policy in mod.POLICIES:
+        res = mod.OverlapResolver(policy)
+        assert res(piilist, TEXT) == piilist
+        assert dict(res.stats) == {}
+
+
+def test130_longest():
+    """
+    Test the "longest" policy
+    """
+    res = mod.OverlapResolver("longest")
+    got = res(_list(), TEXT)
+    assert _values(got) == [("PHONE_NUMBER", "555-123-4567"),
+                            ("PHONE_NUMBER", "555-1234"),
+                            ("PHONE_NUMBER", "555-123-4567")]
+    assert dict(res.stats) == {"removed": 2}
+
+
+def test140_method():
+    """
+    Test the "method" policy
+    """
+    res = mod.OverlapResolver("method")
+    got = res(_list(), TEXT)
+    assert _values(got) == [("PHONE_NUMBER", "555-123-4567"),
+                            ("PHONE_NUMBER", "555-1234"),
+                            ("GOV_ID", "12-555-123")]
+    assert dict(res.stats) == {"removed": 2}
+
+
+def test150_merge():
+    """
+    Test the "merge" policy
+    """
+    res = mod.OverlapResolver("merge")
+    got = res(_list(), TEXT)
+    assert _values(got) == [("PHONE_NUMBER", "555-123-4567"),
+                            ("PHONE_NUMBER", "555-1234"),
+                            ("GOV_ID", "12-555-123"),
+                            ("PHONE_NUMBER", "555-123-4567")]
+    assert [p.pos for p, _ in got] == [5, 21, 36, 39]
+    assert dict(res.stats) == {"merged": 1}
+
+    # A chain of overlapping entities is merged into a single one
+    piilist = [_pii(PiiEnum.PHONE_NUMBER, "555-123", DET_WEAK),
+               _pii(PiiEnum.PHONE_NUMBER, "123-4567", DET_WEAK),
+               _pii(PiiEnum.PHONE_NUMBER, "4567 or", DET_WEAK)]
+    got = res(piilist, TEXT)
+    assert _values(got) == [("PHONE_NUMBER", "555-123-4567 or")]
+
+
+def test160_select_large():
+    """
+    Test selection over a large group, against a quadratic reference
+    """
+    rnd = random.Random(42)
+    info = PiiEntityInfo(PiiEnum.PHONE_NUMBER, "en")
+    text = "x" * 2100
+    group = []
+    for _ in range(1000):
+        pos = rnd.randrange(2000)
+        group.append((PiiEntity(info, text[pos:pos+rnd.randint(1, 60)], "0",
+                                pos), DET_WEAK))
+    group.sort(key=lambda p: p[0].pos)
+
+    def key(p):
+        return len(p[0])
+
+    # Greedy selection, checking each candidate against all kept entities
+    order = sorted(range(len(group)), key=lambda i: (key(group[i]), -i),
+                   reverse=True)
+    ref = []
+    for i in order:
+        pii = group[i][0]
+        if all(pii.pos >= p.pos + len(p) or p.pos >= pii.pos + len(pii)
+               for p in (group[k][0] for k in ref)):
+            ref.append(i)
+    exp = [group[i] for i in sorted(ref)]
+
+    assert mod._select(group, key) == exp
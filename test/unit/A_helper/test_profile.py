@@ -0,0 +1,56 @@
+"""
+Test the chunk profile
+"""
+import pytest
+
+from pii_data.helper.exception import InvArgException
+
+import pii_extract.helper.profile as mod
+
+
+def test100_parse_requires():
+    """
+    Test parsing requirement specifications
+    """
+    assert mod.parse_requires(None) is None
+    assert mod.parse_requires("at") == {"at": True}
+    assert mod.parse_requires(["at", "plus"]) == {"at": True, "plus": True}
+    assert mod.parse_requires({"digit_run": 4, "ascii": False}) == {"digit_run": 4}
+
+
+def test110_parse_requires_error():
+    """
+    Test parsing invalid requirement specifications
+    """
+    with pytest.raises(InvArgException):
+        mod.parse_requires({"unknown": True})
+    with pytest.raises(InvArgException):
+        mod.parse_requires({"digit_run": True})
+    with pytest.raises(InvArgException):
+        mod.parse_requires({"at": 3})
+    with pytest.raises(InvArgException):
+        mod.parse_requires(3)
+
+
+def test200_profile():
+    """
+    Test building a profile
+    """
+    p = mod.ChunkProfile.build("call +34 123 45678 or me@example.com")
+    assert p == mod.ChunkProfile(length=36, digits=True, digit_run=5,
+                                 at=True, plus=True, ascii=True)
+
+    p = mod.ChunkProfile.build("sin números")
+    assert p == mod.ChunkProfile(length=11, digits=False, digit_run=0,
+                                 at=False, plus=False, ascii=False)
+
+
+def test210_satisfies():
+    """
+    Test checking requirements against a profile
+    """
+    p = mod.ChunkProfile.build("call 555 12345")
+    assert p.satisfies({"digits": True, "digit_run": 5})
+    assert not p.satisfies({"digit_run": 6})
+    assert not p.satisfies({"at": True})
+    assert p.satisfies({})
@@ -0,0 +1,59 @@
+"""
+Test the on-disk regex cache
+"""
+
+import regex
+
+import pii_extract.helper.regex_cache as mod
+
+
+def test100_cache(tmp_path):
+    """
+    Test storing & loading a compiled pattern
+    """
+    cache = mod.RegexCache(tmp_path)
+    assert cache.size() == 0
+
+    r1 = cache.compile(r"\d{3} - \d{4}", regex.X)
+    assert cache.size() == 1
+    r2 = cache.compile(r"\d{3} - \d{4}", regex.X)
+    assert r1.pattern == r2.pattern
+    assert r2.search("call 555-1234").group() == "555-1234"
+    assert dict(cache.stats) == {"miss": 1, "hit": 1}
+
+    # Different flags produce a different entry
+    cache.compile(r"\d{3} - \d{4}")
+    assert cache.size() == 2
+
+    assert cache.clear() == 2
+    assert cache.size() == 0
+
+
+def test110_cache_invalid(tmp_path):
+    """
+    Test a corrupted cache file
+    """
+    cache = mod.RegexCache(tmp_path)
+    cache.compile(r"\d+")
+    for name in tmp_path.iterdir():
+        name.write_bytes(b"not a pickle")
+
+    r = cache.compile(r"\d+")
+    assert r.pattern == r"\d+"
+    assert dict(cache.stats) == {"miss": 2, "error": 1}
+
+
+def test200_compile_regex(tmp_path, monkeypatch):
+    """
+    Test activating the cache through the environment
+    """
+    monkeypatch.delenv(mod.CACHE_ENV, raising=False)
+    assert mod.get_regex_cache() is None
+    assert mod.compile_regex(r"\d+").pattern == r"\d+"
+
+    monkeypatch.setenv(mod.CACHE_ENV, str(tmp_path))
+    cache = mod.get_regex_cache()
+    assert cache.path == tmp_path
+    mod.compile_regex(r"\d+")
+    mod.compile_regex(r"\d+")
+    assert mod.regex_cache_stats() == {"miss": 1, "hit": 1}
@@ -0,0 +1,84 @@
+"""
+Test splitting chunks into windows
+"""
+
+import pytest
+
+from pii_data.types.doc import DocumentChunk
+from pii_data.helper.exception import InvArgException
+
+import pii_extract.helper.window as mod
+
+
+TEXT = " ".join(f"word{n:03d}" for n in range(200))
+
+
+def test100_no_split():
+    """
+    Test a text that fits in a window
+    """
+    assert mod.window_spans("abc def", 10) == [(0, 7, 7)]
+    assert mod.window_spans("", 10) == [(0, 0, 0)]
+
+
+def test110_invalid():
+    """
+    Test invalid window parameters
+    """
+    for size, overlap in ((0, None), (10, 5), (10, -1)):
+        with pytest.raises(InvArgException):
+            mod.window_spans(TEXT, size, overlap)
+
+
+def test120_spans():
+    """
+    Test window spans
+    """
+    spans = mod.window_spans(TEXT, 100, 20)
+    assert spans[0][0] == 0
+    assert spans[-1][1:] == (len(TEXT), len(TEXT))
+    for (start, end, limit), nxt in zip(spans, spans[1:]):
+        assert end - start <= 100
+        # consecutive windows overlap at least by the requested size
+        assert limit == nxt[0]
+        assert end - limit >= 20
+        # windows do not cut words
+        assert TEXT[end - 1] == " "
+        assert TEXT[limit - 1] == " "
+
+
+def test130_spans_no_whitespace():
+    """
+    Test window spans for a text without whitespace
+    """
+    text = "x" * 250
+    assert mod.window_spans(text, 100, 20) == [(0, 100, 80), (80, 180, 160),
+                                               (160, 250, 250)]
+
+
+def test140_window_chunk():
+    """
+    Test creating the chunk for a window
+    """
+    chunk = DocumentChunk("c1", TEXT, context={"lang": "en", "after": "END"})
+    w = mod.window_chunk(chunk, 400, 500)
+    assert w.id == "c1"
+    assert w.data == TEXT[400:500]
+    assert w.context["lang"] == "en"
+    assert w.context["before"] == TEXT[400-mod.WINDOW_CONTEXT:400]
+    assert w.context["after"] == TEXT[500:500+mod.WINDOW_CONTEXT]
+
+    w = mod.window_chunk(chunk, 1500, len(TEXT))
+    assert w.context["after"] == "END"
+
+
+def test150_window_chunk_margin():
+    """
+    Test the context margin for a window
+    """
+    text = "a   b " * 100
+    chunk = DocumentChunk("c1", text)
+    w = mod.window_chunk(chunk, 300, 400, 10)
+    # (whitespace runs count as a single character)
+    assert w.context["before"] == text[286:300] == "b a   b a   b "
+    assert w.context["after"] == text[400:414] == "b a   b a   b "
@@ -281,6 +281,31 @@ def test36_subdict_regex_external():
     assert got["obj"] == {"class": "regex", "task": r"\d33"}
 
 
+def test40_requires():
+    """
+    Check task descriptor parsing, w/ chunk requirements
+    """
+    PII_TASK = {
+        "pii": [{"type": PiiEnum.EMAIL_ADDRESS}],
+        "class": "regex",
+        "task": r"\w+@\w+",
+        "requires": ["at", "ascii"]
+    }
+    got = mod.parse_task_descriptor(PII_TASK,
+                                    {"lang": "en", "country": COUNTRY_ANY})
+    assert got["obj"] == {"class": "regex", "task": r"\w+@\w+",
+                          "requires": {"at": True, "ascii": True}}
+
+    PII_TASK["requires"] = {"digit_run": 3}
+    got = mod.parse_task_descriptor(PII_TASK,
+                                    {"lang": "en", "country": COUNTRY_ANY})
+    assert got["obj"]["requires"] == {"digit_run": 3}
+
+    PII_TASK["requires"] = {"foo": True}
+    with pytest.raises(mod.InvPiiTask) as e:
+        mod.parse_task_descriptor(PII_TASK)
+    assert str(e.value) == "task descriptor error: invalid requires field: unknown required feature: foo"
+
 
 def test50_errors():
     """
@@ -359,3 +384,33 @@ def test50_errors():
     with pytest.raises(mod.InvPiiTask) as e:
         mod.parse_task_descriptor(PII_TASK)
     assert str(e.value) == "task descriptor error: invalid PII info set for CREDIT_CARD: missing lang"
+
+
+def test60_lazy():
+    """
+    Check lazy task descriptors
+    """
+    PII_TASK = {"class": "callable", "task": "no.valid.reference",
+                "pii": [{"type": "GOV_ID", "lang": ["en", "es"]}]}
+
+    # The implementation is not imported, and errors appear when parsing
+    taskd = mod.LazyTaskDescriptor(PII_TASK, {"country": "au"})
+    assert taskd.piid == [
+        {"pii": PiiEnum.GOV_ID, "lang": "en", "country": "au"},
+        {"pii": PiiEnum.GOV_ID, "lang": "es", "country": "au"}
+    ]
+    with pytest.raises(mod.InvPiiTask) as e:
+        taskd.parse()
+    assert str(e.value) == "task descriptor error: cannot import task object 'no.valid.reference': No module named 'no'"
+
+    # A valid descriptor
+    PII_TASK["task"] = "taux.modules.en.au.tfn_ex.tax_file_number_example"
+    taskd = mod.LazyTaskDescriptor(PII_TASK, {"country": "au"})
+    got = taskd.parse()
+    assert got == mod.parse_task_descriptor(PII_TASK, {"country": "au"})
+    assert callable(got["obj"]["task"])
+
+    # Errors in the PII metadata are detected immediately
+    with pytest.raises(mod.InvPiiTask) as e:
+        mod.LazyTaskDescriptor({"pii": [{"type": "GOV_ID"}]})
+    assert str(e.value) == "invalid PII info set for GOV_ID: missing lang"
@@ -2,10 +2,16 @@
 Test the FolderTaskCollector class
 """
 
+import os
+import sys
+from pathlib import Path
+
 from typing import Dict, Iterable
 
 from pii_data.types import PiiEnum
 from pii_extract.defs import LANG_ANY
+from pii_extract.gather.collection import PiiTaskCollection
+from pii_extract.gather.collection.sources import FolderTaskCollector
 
 from taux.task_collector_example import MyTestTaskCollector
 from taux.modules.any.credit_card_mock import CreditCardMock
@@ -175,3 +181,80 @@ def test180_lang_filter():
     assert [LANG_ANY] == got
     tasks = tc.gather_tasks()
     assert len(list(tasks)) == 1
+
+
+def test200_manifest(tmp_path, monkeypatch):
+    """
+    Gather tasks through a static manifest
+    """
+    mfile = tmp_path / "manifest.json"
+    tc = MyTestTaskCollector(manifest=str(mfile))
+    exp = list(tc.gather_tasks())
+    assert dict(tc._manifest.stats) == {"miss": 4}
+    assert mfile.is_file()
+    _check_tasklist(exp)
+
+    # Read the tasks from the manifest. Modules are not imported
+    modname = "taux.modules.en.au.abn_ex"
+    monkeypatch.delitem(sys.modules, modname)
+    tc = MyTestTaskCollector(manifest=str(mfile))
+    got = list(tc.gather_tasks())
+    assert dict(tc._manifest.stats) == {"hit": 4}
+    assert modname not in sys.modules
+    assert got[0]["task"] == "taux.modules.any.credit_card_mock.CreditCardMock"
+    for n, t in enumerate(exp):
+        if t["class"] != "regex":
+            exp[n] = {**t, "task": f"{t['task'].__module__}.{t['task'].__qualname__}"}
+    assert exp == got
+
+    # The module is imported when its task is built
+    coll = PiiTaskCollection()
+    coll.add_collector(tc)
+    tasks = list(coll.build_tasks("en", "au", pii=PiiEnum.CREDIT_CARD))
+    assert len(tasks) == 1
+    assert modname not in sys.modules
+    tasks = list(coll.build_tasks("en", "au", pii=PiiEnum.GOV_ID))
+    assert len(tasks) == 2
+    assert modname in sys.modules
+
+
+def test210_manifest_update(tmp_path):
+    """
+    Modules modified after the manifest was built are imported again
+    """
+    mfile = tmp_path / "manifest.json"
+    list(MyTestTaskCollector(manifest=str(mfile)).gather_tasks())
+
+    modpath = Path(sys.modules["taux.modules.en.au.abn_ex"].__file__)
+    st = modpath.stat()
+    try:
+        os.utime(modpath, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        tc = MyTestTaskCollector(manifest=str(mfile))
+        assert len(list(tc.gather_tasks())) == 4
+        assert dict(tc._manifest.stats) == {"hit": 3, "miss": 1}
+
+        tc = MyTestTaskCollector(manifest=str(mfile))
+        assert len(list(tc.gather_tasks())) == 4
+        assert dict(tc._manifest.stats) == {"hit": 4}
+    finally:
+        os.utime(modpath, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+    # A manifest built with different defaults is not used
+    basedir = Path(sys.modules["taux.modules"].__file__).parent
+    tc = FolderTaskCollector("taux.modules", basedir, "another-source",
+                             manifest=str(mfile))
+    assert len(list(tc.gather_tasks())) == 4
+    assert dict(tc._manifest.stats) == {"miss": 4}
+
+
+def test220_manifest_env(tmp_path, monkeypatch):
+    """
+    Use the manifest when the manifest cache is active
+    """
+    assert MyTestTaskCollector()._manifest is None
+    monkeypatch.setenv("PII_EXTRACT_MANIFEST_CACHE", str(tmp_path))
+    tc = MyTestTaskCollector()
+    assert tc._manifest.path.parent == tmp_path
+    assert len(list(tc.gather_tasks())) == 4
+    assert len(list(tmp_path.glob("folder-*.json"))) == 1
+    assert MyTestTaskCollector(manifest=False)._manifest is None
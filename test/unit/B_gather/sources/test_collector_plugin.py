@@ -2,6 +2,8 @@
 Test the PluginTaskCollector class
 """
 
+from importlib.metadata import EntryPoint
+
 import pytest
 
 from pii_data.types import PiiEnum
@@ -9,6 +11,9 @@ from pii_extract.defs import LANG_ANY
 
 from pii_extract.defs import FMT_CONFIG_PLUGIN
 
+from pii_extract.gather.collection.sources.defs import PII_EXTRACT_PLUGIN_ID
+from pii_extract.gather.parser import parse_task_descriptor
+import pii_extract.gather.collection.sources.manifest as manifest
 import pii_extract.gather.collection.sources.plugin as mod
 
 from taux import auxpatch
@@ -172,3 +177,107 @@ def test150_init_lang(fixture_entry_points):
 
     got = fetch("en")
     assert len(got) == 2
+
+
+def test200_manifest(monkeypatch, tmp_path, fixture_entry_points):
+    """
+    Use the manifest cache
+    """
+    monkeypatch.setenv(manifest.MANIFEST_ENV, str(tmp_path))
+    tc = mod.PluginTaskCollector()
+    exp = [parse_task_descriptor(t) for t in tc.gather_tasks()]
+    assert len(list(tmp_path.iterdir())) == 1
+
+    # The second time the plugin is not loaded
+    entry = mod.entry_points().select(group=PII_EXTRACT_PLUGIN_ID)[0]
+    entry.load.reset_mock()
+    tc = mod.PluginTaskCollector()
+    entry.load.assert_not_called()
+    pl = tc.list_plugins()
+    assert pl == [{"name": "piisa-detectors-mock-plugin-1",
+                   "source": "piisa-detectors-mock-plugin-1",
+                   "version": "0.999",
+                   "description": "A plugin mock description",
+                   "object": None}]
+    assert tc.language_list() == [LANG_ANY, "en"]
+    got = [parse_task_descriptor(t) for t in tc.gather_tasks()]
+    assert got == exp
+    assert len(list(tc.gather_tasks("en"))) == 2
+
+    # A different configuration does not use the same manifest
+    tc = mod.PluginTaskCollector(languages=["en"])
+    entry.load.assert_called_once()
+
+
+def test300_deferred(monkeypatch):
+    """
+    Plugins with a manifest are not instantiated
+    """
+    auxpatch.patch_entry_points(monkeypatch, manifest=True)
+    tc = mod.PluginTaskCollector()
+    pl = tc.list_plugins()
+    assert len(pl) == 1
+    assert pl[0]["name"] == "piisa-detectors-mock-plugin-1"
+    assert pl[0]["deferred"] is True
+    assert pl[0]["object"] is None
+    assert list(tc.gather_tasks()) == []
+
+    deferred = tc.deferred_tasks()
+    assert len(deferred) == 1
+    assert deferred[0].covers({"en"}, None, {"GOV_ID"})
+    assert not deferred[0].covers({"es"})
+    assert not deferred[0].covers(None, None, {"PERSON"})
+    assert auxpatch.PluginManifestMock.instances == 0
+
+    # Load it
+    tasks = deferred[0].load()
+    assert len(tasks) == 3
+    assert auxpatch.PluginManifestMock.instances == 1
+    assert len(tc.list_plugins()) == 1
+    assert tc.list_plugins()[0]["version"] == "0.999"
+    assert tc.list_plugins()[0]["object"] is not None
+    assert list(tc.gather_tasks()) == []
+
+
+def test310_deferred_config(monkeypatch):
+    """
+    A plugin manifest defined in the config, and a language restriction
+    """
+    auxpatch.patch_entry_points(monkeypatch)
+    entry = mod.entry_points().select(group=PII_EXTRACT_PLUGIN_ID)[0]
+    config = {
+        FMT_CONFIG_PLUGIN: {
+            "plugins": {
+                "piisa-detectors-mock-plugin-1": {
+                    "manifest": {"lang": "en"}
+                }
+            }
+        }
+    }
+    tc = mod.PluginTaskCollector(config=config)
+    assert len(tc.deferred_tasks()) == 1
+    entry.load.assert_not_called()
+
+    # The plugin does not cover the languages
+    tc = mod.PluginTaskCollector(config=config, languages=["es"])
+    assert len(tc.deferred_tasks()) == 0
+    entry.load.assert_not_called()
+
+
+def test210_manifest_entry_id(monkeypatch, tmp_path):
+    """
+    The plugin identification changes when its module file changes
+    """
+    modfile = tmp_path / "pii_plugin_example.py"
+    modfile.write_text("class Plugin:\n    pass\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    entry = EntryPoint("example", "pii_plugin_example:Plugin",
+                       PII_EXTRACT_PLUGIN_ID)
+
+    id1 = mod._entry_id(entry)
+    assert id1["value"] == "pii_plugin_example:Plugin"
+    assert id1["sig"] is not None
+    assert mod._entry_id(entry) == id1
+
+    modfile.write_text("class Plugin:\n    version = 2\n")
+    assert mod._entry_id(entry) != id1
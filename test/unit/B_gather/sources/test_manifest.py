@@ -0,0 +1,74 @@
+"""
+Test the manifest cache for plugin task descriptors
+"""
+
+from pii_data.types import PiiEnum
+
+from pii_extract.gather.collection.sources.utils import RawTaskDefaults
+import pii_extract.gather.collection.sources.manifest as mod
+
+import taux.examples_task_descriptor_raw as RAW
+from taux.modules.any.credit_card_mock import CreditCardMock
+
+
+def _tasks():
+    reformat = RawTaskDefaults(normalize=True)
+    return list(reformat([RAW.TASK_PHONE_NUMBER.copy(), RAW.TASK_GOVID.copy(),
+                          RAW.TASK_CREDIT_CARD.copy()]))
+
+
+def test100_encode():
+    """
+    Test encoding & decoding descriptor values
+    """
+    value = {"a": [1, "x", None], "b": PiiEnum.GOV_ID, "c": CreditCardMock}
+    enc = mod.encode_value(value)
+    assert enc == {"a": [1, "x", None], "b": {"__piienum__": "GOV_ID"},
+                   "c": {"__import__": "taux.modules.any.credit_card_mock.CreditCardMock"}}
+    assert mod.decode_value(enc) == {**value, "c": enc["c"]["__import__"]}
+
+    for v in (lambda x: x, object(), {1: 2}):
+        try:
+            mod.encode_value(v)
+            assert False, "not detected as uncacheable"
+        except mod.Uncacheable:
+            pass
+
+
+def test110_encode_taskd():
+    """
+    Test encoding a task descriptor, with no explicit class
+    """
+    taskd = {"task": CreditCardMock, "pii": [{"type": "CREDIT_CARD"}]}
+    assert mod.encode_taskd(taskd)["class"] == "piitask"
+
+
+def test120_store_load(tmp_path):
+    """
+    Test storing & loading a manifest
+    """
+    cache = mod.ManifestCache(tmp_path)
+    key = cache.key([{"name": "plugin1", "version": "1.0"}])
+    assert key != cache.key([{"name": "plugin1", "version": "1.1"}])
+    assert key != cache.key([{"name": "plugin1", "version": "1.0"}],
+                            languages=["en"])
+    assert cache.load(key) is None
+
+    plugins = [{"name": "plugin1", "version": "1.0", "tasks": _tasks()}]
+    assert cache.store(key, plugins)
+    got = cache.load(key)
+    assert len(got) == 1
+    assert got[0]["name"] == "plugin1"
+    assert [t["class"] for t in got[0]["tasks"]] == ["regex", "callable",
+                                                     "PiiTask"]
+    assert got[0]["tasks"][1]["task"] == "taux.modules.en.au.tfn_ex.tax_file_number_example"
+    assert got[0]["tasks"][1]["pii"][0]["type"] == PiiEnum.GOV_ID
+    assert dict(cache.stats) == {"hit": 1, "miss": 1}
+
+    # Unstorable plugins
+    plugins[0]["tasks"][0]["task"] = lambda x: x
+    assert not cache.store(cache.key([]), plugins)
+    assert cache.stats["uncacheable"] == 1
+
+    assert cache.clear() == 1
+    assert cache.load(key) is None
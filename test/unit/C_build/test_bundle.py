@@ -0,0 +1,58 @@
+"""
+Test the RegexTaskBundle class
+"""
+
+from pii_data.types import PiiEnum
+from pii_data.types.doc import DocumentChunk
+
+import pii_extract.build.task as mod
+
+
+PATTERN = r"\b \d{4} \b"
+SRC = "number 1234 and phone 3451, other 98765"
+
+
+def _task(pattern: str, name: str, context=None):
+    pii = {"pii": PiiEnum.PHONE_NUMBER, "lang": "es", "subtype": name}
+    if context:
+        pii["context"] = context
+    return mod.RegexPiiTask(pattern, task={"name": name}, pii=pii)
+
+
+def test100_bundle_constructor():
+    """
+    Create a bundle
+    """
+    tasks = [_task(PATTERN, "t1"), _task(PATTERN, "t2"),
+             _task(r"\d{5}", "t3")]
+    bundle = mod.RegexTaskBundle(tasks)
+    assert str(bundle) == "<RegexTaskBundle #2/1>"
+    assert len(bundle) == 2
+    assert tasks[0] in bundle
+    assert tasks[1] in bundle
+    assert tasks[2] not in bundle
+
+
+def test110_bundle_exec():
+    """
+    Execute bundled tasks, check that results equal standalone execution
+    """
+    context = {"value": "phone", "width": [8, 0]}
+    tasks = [_task(PATTERN, "t1"), _task(PATTERN, "t2", context)]
+    bundle = mod.RegexTaskBundle(tasks)
+    chunk = DocumentChunk("1", SRC)
+
+    scan = {}
+    for t in tasks:
+        exp = list(t(chunk))
+        got = list(bundle(t, chunk, scan))
+        assert exp == got
+        assert [p.info for p in exp] == [p.info for p in got]
+
+    # Both tasks shared the same scan
+    assert len(scan) == 1
+    assert [m.group() for m in next(iter(scan.values()))] == ["1234", "3451"]
+
+    # The context-bearing task filtered its candidates
+    got = list(bundle(tasks[1], chunk, scan))
+    assert [p.fields["value"] for p in got] == ["3451"]
@@ -0,0 +1,85 @@
+"""
+Test the derivation of prefilters from regex patterns
+"""
+
+from pii_extract.helper.coalesce import SEPARATOR
+import pii_extract.build.task.prefilter as mod
+
+from taux.modules.en.any.international_phone_number import PATTERN_INT_PHONE
+
+
+TEST_FILTER = [
+    (r"ES\d{2}", "<RegexPrefilter ES [\\d]>"),
+    (r"\b[\w.+-]+@[\w-]+\.[\w.-]+\b", "<RegexPrefilter @ [\\w\\.\\+\\-] [\\w\\-]>"),
+    (r"x{2,3}", "<RegexPrefilter x>"),
+    (r"\[abc\]", "<RegexPrefilter [abc]>"),
+    (r"a | \d", "<RegexPrefilter [a\\d]>"),
+    (r"(?i:es)\d{8}", "<RegexPrefilter [\\d]>"),
+    (r"(?: \+ | 00) \d+", "<RegexPrefilter [\\d] (+|00)>"),
+    (PATTERN_INT_PHONE, "<RegexPrefilter [\\d] (+|00)>"),
+]
+
+TEST_NONE = [
+    r".*",
+    r"(?i)abc",
+    r"[[:alpha:]]+\d",
+    r"(?:foo){e<=1}",
+    r"\p{L}+",
+]
+
+TEST_CHECK = [
+    (r"ES \d{2}", "account ES12", True),
+    (r"ES \d{2}", "account es12", False),
+    (r"ES \d{2}", "account ES", False),
+    (r"(?: \+ | 00) \d+", "call 0034", True),
+    (r"(?: \+ | 00) \d+", "call +34", True),
+    (r"(?: \+ | 00) \d+", "call 34", False),
+]
+
+TEST_SEPARABLE = [
+    (r"ES \d{2}", True),
+    (r"\b \d+ \b", True),
+    (PATTERN_INT_PHONE, True),
+    (r"(?m) ^ \d+ $", True),
+    (r"(?<! [\w-] ) \d+", True),
+    (r"^ID \d{4} $", False),
+    (r"\A \d+", False),
+    (r"\d+ \Z", False),
+    (r"(?<= \s) \d+", False),
+    (r"(?<! [^a-z] ) \d+", False),
+    (r"\d+ (?! .)", False),
+    (r"(\d) \1", False),
+    (r"[[:digit:]]+", False),
+]
+
+
+def test100_filter():
+    """
+    Check the derived prefilters
+    """
+    for pattern, exp in TEST_FILTER:
+        assert exp == repr(mod.regex_prefilter(pattern))
+
+
+def test110_filter_none():
+    """
+    Check patterns with no prefilter
+    """
+    for pattern in TEST_NONE:
+        assert mod.regex_prefilter(pattern) is None
+
+
+def test120_filter_check():
+    """
+    Check applying prefilters
+    """
+    for pattern, text, exp in TEST_CHECK:
+        assert mod.regex_prefilter(pattern)(text) is exp
+
+
+def test200_separable():
+    """
+    Check if patterns can be run over a buffer of chunks
+    """
+    for pattern, exp in TEST_SEPARABLE:
+        assert mod.regex_separable(pattern, SEPARATOR) is exp, pattern
@@ -2,6 +2,7 @@ import pytest
 
 from pii_data.types import PiiEnum, PiiEntity
 from pii_data.types.doc import DocumentChunk
+from pii_data.helper.exception import BuildException
 from pii_extract.helper.exception import PiiUnimplemented
 
 import pii_extract.build.task as mod
@@ -119,3 +120,89 @@ def test240_class():
     chunk = DocumentChunk("abc", "number 1234 and number 3451")
     got = list(task(chunk))
     assert exp == got
+
+
+def test250_regex_prefilter():
+    """
+    Test the regex prefilter
+    """
+    task_spec = {"name": "example"}
+    pii_spec = {"pii": PiiEnum.PHONE_NUMBER, "lang": "es"}
+    task = mod.RegexPiiTask(r"\+ \d{2} \s \d{9}", task=task_spec, pii=pii_spec)
+    assert task.prefilter is not None
+
+    # Skipped by the prefilter
+    chunk = DocumentChunk("1", "a chunk with no digits at all + (nor a phone)")
+    assert list(task(chunk)) == []
+    # Not skipped
+    chunk = DocumentChunk("2", "my phone is +34 912345678")
+    got = list(task(chunk))
+    assert [p.fields["value"] for p in got] == ["+34 912345678"]
+    assert task.stats["prefilter"] == {"hit": 1, "miss": 1}
+
+    # Deactivate it
+    task = mod.RegexPiiTask(r"\+ \d{2} \s \d{9}", task=task_spec, pii=pii_spec,
+                            config={"prefilter": False})
+    assert task.prefilter is None
+    assert [p.fields["value"] for p in task(chunk)] == ["+34 912345678"]
+
+
+def test260_regex_timeout():
+    """
+    Test the regex time budget
+    """
+    task_spec = {"name": "example"}
+    pii_spec = {"pii": PiiEnum.CREDIT_CARD, "lang": "es"}
+    task = mod.RegexPiiTask(r"(x+x+)+y", task=task_spec, pii=pii_spec,
+                            config={"timeout": 0.05})
+    assert task.timeout == 0.05
+
+    chunk = DocumentChunk("1", "x" * 5000)
+    with pytest.raises(TimeoutError):
+        list(task(chunk))
+
+    with pytest.raises(BuildException):
+        mod.RegexPiiTask(r"(x+x+)+y", task=task_spec, pii=pii_spec,
+                         config={"timeout": "fast"})
+
+
+def test270_check_context_override():
+    """
+    Test a task that redefines check_context()
+    """
+    class ExampleClass(mod.BasePiiTask):
+        def find(self, chunk):
+            yield PiiEntity.build(PiiEnum.CREDIT_CARD, "1234", chunk.id, 7)
+
+        def check_context(self, text, pii, prefix=0):
+            assert isinstance(text, str)
+            start = prefix + pii.pos
+            return text[start - 7:start].startswith("number")
+
+    pii = {"pii": PiiEnum.CREDIT_CARD, "lang": "en", "context": ["number"]}
+    task = ExampleClass(pii=pii, task=None)
+
+    assert len(list(task(DocumentChunk("1", "Number 1234")))) == 1
+    assert len(list(task(DocumentChunk("1", "digits 1234")))) == 0
+    assert task.context_rejected == 1
+
+
+def test280_counters_threads():
+    """
+    Test the task counters when the task runs in several threads
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    task_spec = {"name": "example"}
+    pii_spec = {"pii": PiiEnum.CREDIT_CARD, "lang": "en",
+                "context": ["card"]}
+    task = mod.RegexPiiTask(r"ES\d{4}", task=task_spec, pii=pii_spec)
+    chunks = [DocumentChunk(str(n), "number ES1234" if n % 2 else "nothing")
+              for n in range(2000)]
+
+    with ThreadPoolExecutor(8) as pool:
+        found = list(pool.map(lambda c: list(task(c)), chunks))
+
+    assert sum(map(len, found)) == 0
+    assert dict(task.stats["prefilter"]) == {"hit": 1000, "miss": 1000}
+    assert task.context_rejected == 1000
@@ -2,14 +2,22 @@
 Test the build_task callable & the PiiTaskCollection class
 """
 
+from pathlib import Path
 from typing import Dict
 
+import pytest
+
 from pii_data.types import PiiEnum
 from pii_extract.defs import LANG_ANY, COUNTRY_ANY
 from pii_extract.build.task import BasePiiTask, CallablePiiTask, RegexPiiTask
 
+from pii_extract.gather.collection.sources import (JsonTaskCollector,
+                                                   PluginTaskCollector)
+from pii_extract.gather.collection.utils import filter_piid
+from pii_extract.gather.parser.utils import InvPiiTask
 import pii_extract.gather.collection.task_collection as mod
 
+from taux import auxpatch
 from taux.task_collector_example import MyTestTaskCollector
 import taux.examples_task_descriptor_full as TASKD
 
@@ -142,6 +150,49 @@ def test230_task_all():
     assert got[3] == _add_defaults(TASKD.TASK_GOVID_2)
 
 
+def _linear_search(tc: mod.PiiTaskCollection, lang, country, pii):
+    """
+    Select task definitions by traversing all of them
+    """
+    out = []
+    for taskd in tc.taskdef_list():
+        piid = filter_piid(taskd["piid"], lang, country, pii)
+        if piid:
+            out.append(piid)
+    return out
+
+
+def test240_task_index():
+    """
+    Check the indexed search against a linear search, with multi-PII tasks
+    and several collectors
+    """
+    tc = mod.PiiTaskCollection()
+    tc.add_collector(MyTestTaskCollector())
+    assert tc.language_list() == [LANG_ANY, "en"]
+    assert tc.country_list() == [COUNTRY_ANY, "au"]
+
+    jtc = JsonTaskCollector()
+    jtc.add_tasks(Path(__file__).parents[2] / "data" / "tasklist-example-multi.json")
+    tc.add_collector(jtc)
+    assert len(tc) == 6
+    assert tc.language_list() == [LANG_ANY, "en", "es"]
+
+    for lang in (None, "en", "es", "zh", LANG_ANY, "xx"):
+        for country in (None, "au", "gb", COUNTRY_ANY):
+            for pii in (None, PiiEnum.CREDIT_CARD, PiiEnum.GOV_ID):
+                lset = {lang, LANG_ANY} if lang else None
+                cset = {country, COUNTRY_ANY} if country else None
+                exp = _linear_search(tc, lset, cset, {pii} if pii else None)
+                got = [t["piid"] for t in tc.taskdef_list(lang, country, pii)]
+                assert got == exp
+
+    # A multi-PII task is reduced to the PII descriptors selected
+    got = list(tc.taskdef_list("es", add_any=False))
+    assert len(got) == 1
+    assert [p["lang"] for p in got[0]["piid"]] == ["es"]
+
+
 def test300_task_build_all():
     """
     """
@@ -237,3 +288,59 @@ def test330_task_build_tasks():
     assert got[0].pii_info.pii == PiiEnum.CREDIT_CARD
     assert got[1].pii_info.pii == PiiEnum.GOV_ID
     assert got[2].pii_info.pii == PiiEnum.GOV_ID
+
+
+def test400_deferred_plugin(monkeypatch):
+    """
+    Load tasks from a deferred plugin only when needed
+    """
+    auxpatch.patch_entry_points(monkeypatch, manifest=True)
+    tc = mod.PiiTaskCollection()
+    tc.add_collector(MyTestTaskCollector())
+    tc.add_collector(PluginTaskCollector())
+    assert len(tc) == 4
+
+    # The plugin manifest provides the languages
+    assert tc.language_list() == [LANG_ANY, "en"]
+    assert auxpatch.PluginManifestMock.instances == 0
+
+    # Tasks not covered by the plugin
+    assert len(list(tc.build_tasks("es", add_any=False))) == 0
+    assert len(list(tc.build_tasks("en", pii="PERSON"))) == 0
+    assert auxpatch.PluginManifestMock.instances == 0
+
+    # Tasks covered by the plugin
+    got = list(tc.build_tasks("en", pii="GOV_ID"))
+    assert auxpatch.PluginManifestMock.instances == 1
+    assert len(tc) == 7
+    assert len(got) == 3
+    assert len(list(tc.build_tasks("en"))) == 7
+    assert auxpatch.PluginManifestMock.instances == 1
+
+
+def test410_lazy_import():
+    """
+    Task implementations are imported only when selected
+    """
+    tasks = {
+        "format": "piisa:config:pii-extract:tasks:v1",
+        "header": {"lang": "es"},
+        "tasklist": [
+            {"class": "callable", "task": "no.valid.reference",
+             "pii": "GOV_ID", "country": "es"}
+        ]
+    }
+    jtc = JsonTaskCollector()
+    jtc.add_tasks(tasks)
+    tc = mod.PiiTaskCollection()
+    tc.add_collector(MyTestTaskCollector())
+    tc.add_collector(jtc)
+    assert tc.language_list() == [LANG_ANY, "en", "es"]
+    assert tc.country_list() == [COUNTRY_ANY, "au", "es"]
+
+    # The invalid task is not imported unless selected
+    assert len(list(tc.build_tasks("en", "au"))) == 4
+    assert len(list(tc.build_tasks("es", pii=PiiEnum.CREDIT_CARD))) == 1
+    with pytest.raises(InvPiiTask) as e:
+        list(tc.build_tasks("es", pii=PiiEnum.GOV_ID))
+    assert "cannot import task object 'no.valid.reference'" in str(e.value)
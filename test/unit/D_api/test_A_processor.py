@@ -2,20 +2,30 @@
 Test the main classes in taskdict: TaskColllector & PiiTaskCollection
 """
 from pathlib import Path
+from typing import List, Dict
+from copy import deepcopy
+import io
+import json
+import asyncio
+import threading
+import time
+import re
 
 from unittest.mock import Mock
 import pytest
 
 from pii_data.types import PiiEnum, PiiCollection, PiiEntity
 from pii_data.types.doc import LocalSrcDocumentFile, DocumentChunk
+from pii_data.types.doc.localdoc import SequenceLocalSrcDocument
 from pii_data.helper.exception import ProcException, InvArgException
 from pii_data.helper.config import load_config
 
-from pii_extract.build.task import PiiTaskInfo
+from pii_extract.build.task import PiiTaskInfo, BasePiiTask
 import pii_extract.defs as defs
 import pii_extract.api.processor as mod
 
 from taux import auxpatch
+from taux.modules.en.any.international_phone_number import PATTERN_INT_PHONE
 
 
 DATADIR = Path(__file__).parents[2] / "data"
@@ -167,6 +177,31 @@ def test161_collectionbuilder():
     assert det.fields["method"] == "blurb1"
 
 
+def test163_collectionbuilder_dump_stream():
+    """
+    Test PiiCollectionBuilder streaming
+    """
+    det1 = mod.task_detector(PiiTaskInfo("unit test", "example1", "0.0.1"))
+    det2 = mod.task_detector(PiiTaskInfo("unit test", "example2", "0.0.1"))
+    ent = [PiiEntity.build(PiiEnum.CREDIT_CARD, "0101", "1", 23),
+           PiiEntity.build(PiiEnum.PHONE_NUMBER, "1234", "1", 40)]
+
+    pc = mod.PiiCollectionBuilder(lang="en")
+    pc.add_detectors([det1, det2])
+    out = io.StringIO()
+    assert pc.dump_stream(out, [(ent[0], det2), (ent[1], det1)]) == 2
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert list(lines[0]["detectors"]) == ["1", "2"]
+    assert [p["detector"] for p in lines[1:]] == [2, 1]
+    assert len(pc) == 0
+
+    # A detector not in the header
+    pc = mod.PiiCollectionBuilder(lang="en")
+    pc.add_detectors([det1])
+    with pytest.raises(ProcException):
+        pc.dump_stream(io.StringIO(), [(ent[0], det1), (ent[1], det2)])
+
+
 def test162_collectionbuilder_clone():
     """
     Test PiiCollectionBuilder cloning
@@ -586,4 +621,761 @@ def test400_tasks_stats(fixture_timestamp):
 
     stats = pd.get_stats()
     assert stats == {'num': {'calls': 1, 'entities': 2},
-                     'entities': {'PHONE_NUMBER': 1, 'CREDIT_CARD': 1}}
+                     'entities': {'PHONE_NUMBER': 1, 'CREDIT_CARD': 1},
+                     'prefilter': {'hit': 3, 'miss': 2}}
+
+
+# A second task using the same phone regex, but without context
+# (use a distinct string object, so that it is not recognized as the same task)
+TASKS_SHARED_REGEX = {
+    "format": "piisa:config:pii-extract:tasks:v1",
+    "header": {
+        "lang": "en",
+        "source": "piisa:pii-extract-base:test",
+        "version": "0.0.1"
+    },
+    "tasklist": [
+        {
+            "class": "regex",
+            "task": (PATTERN_INT_PHONE + " ")[:-1],
+            "name": "phone number without context",
+            "pii": {
+                "type": "PHONE_NUMBER",
+                "subtype": "no context",
+                "lang": "en"
+            }
+        }
+    ]
+}
+
+
+def test500_regex_bundle(fixture_timestamp):
+    """
+    Test detection with bundled regex tasks
+    """
+    config = load_config(CONFIGFILE)
+    doc = LocalSrcDocumentFile(DOCUMENT)
+
+    result = []
+    for bundle in (False, True):
+        pd = mod.PiiProcessor(skip_plugins=True, config=config,
+                              regex_bundle=bundle)
+        pd.add_json_tasks(TASKS_SHARED_REGEX)
+        pd.build_tasks("en")
+        r = pd.detect(doc)
+        result.append(([p.asdict() for p in r], r.header()))
+        if bundle:
+            assert len(pd._plans["en"].bundle) == 2
+
+    assert len(result[0][0]) == 4
+    assert result[0] == result[1]
+
+
+def test510_requires(fixture_timestamp):
+    """
+    Test task skipping due to chunk requirements
+    """
+    config = load_config(CONFIGFILE)
+    doc = LocalSrcDocumentFile(DOCUMENT)
+
+    tasks = deepcopy(TASKS_SHARED_REGEX)
+    tasks["tasklist"][0]["requires"] = {"digit_run": 3, "plus": True}
+    pd = mod.PiiProcessor(skip_plugins=True, config=config)
+    pd.add_json_tasks(tasks)
+    pd.build_tasks("en")
+    r = pd.detect(doc)
+
+    # Same results, but the new task has been skipped for chunks w/o phones
+    assert len(list(r)) == 4
+    assert pd.get_stats()["num"]["skipped"] == 3
+
+
+def test520_regex_timeout(fixture_timestamp):
+    """
+    Test a regex task exceeding its time budget
+    """
+    tasks = deepcopy(TASKS_SHARED_REGEX)
+    tasks["tasklist"][0].update(task=r"(x+x+)+y", name="slow regex")
+    taskcfg = {
+        defs.FMT_CONFIG_TASKCFG: {
+            "task_config": [{"name": "slow regex", "config": {"timeout": 0.05}}]
+        }
+    }
+    config = load_config([CONFIGFILE, taskcfg])
+    pd = mod.PiiProcessor(skip_plugins=True, config=config)
+    pd.add_json_tasks(tasks)
+    pd.build_tasks("en")
+
+    # The slow task is abandoned, the others still produce their results
+    chunk = DocumentChunk(id=0, data="x" * 5000 + " my phone is +34983453999")
+    piic = mod.PiiCollectionBuilder(lang="en")
+    assert pd.detect_chunk(chunk, piic) == 1
+    assert pd.get_stats()["timeout"] == {"slow regex": 1}
+
+
+class LegacyPhoneTask(BasePiiTask):
+    """
+    A task that redefines __call__ with the original signature
+    """
+    pii_name = "legacy phone"
+
+    def find(self, chunk: DocumentChunk):
+        for m in re.finditer(r"\+\d{11}", chunk.data):
+            yield PiiEntity(self.pii_info, m.group(), chunk.id, m.start())
+
+    def __call__(self, chunk: DocumentChunk):
+        return self.find_context(chunk)
+
+
+def test530_legacy_call(fixture_timestamp):
+    """
+    Test detection with a task that redefines __call__
+    """
+    tasks = {
+        "format": "piisa:config:pii-extract:tasks:v1",
+        "header": {"lang": "en", "source": "piisa:pii-extract-base:test"},
+        "tasklist": [
+            {
+                "class": "piitask",
+                "task": "unit.D_api.test_A_processor.LegacyPhoneTask",
+                "pii": {
+                    "type": "PHONE_NUMBER",
+                    "lang": "en",
+                    "context": ["phone"]
+                }
+            }
+        ]
+    }
+    pd = mod.PiiProcessor(skip_plugins=True)
+    pd.add_json_tasks(tasks)
+    pd.build_tasks("en")
+    r = pd.detect(_seqdoc("my phone is +34983453999", "fax +34983453000"))
+    assert [p.fields["value"] for p in r] == ["+34983453999"]
+
+
+def test600_workers(fixture_timestamp):
+    """
+    Test detection using a pool of worker processes
+    """
+    config = load_config(CONFIGFILE)
+    doc = LocalSrcDocumentFile(DOCUMENT)
+
+    result = []
+    for workers in (None, 2):
+        with mod.PiiProcessor(skip_plugins=True, config=config,
+                              workers=workers) as pd:
+            pd.add_json_tasks(TASKS_SHARED_REGEX)
+            pd.build_tasks("en")
+            r = pd.detect(doc)
+            result.append(([p.asdict() for p in r], r.header(), pd.get_stats()))
+            # Chunk contexts contain read-only document metadata
+            r = pd.detect(doc, chunk_context=True)
+            result[-1] += ([p.asdict() for p in r],)
+
+    assert len(result[0][0]) == 4
+    assert len(result[0][3]) == 4
+    assert result[0] == result[1]
+
+
+def test601_workers_in_flight(fixture_timestamp):
+    """
+    Test that the worker pool limits the number of chunks in flight
+    """
+    consumed = []
+
+    def chunks():
+        for n in range(50):
+            consumed.append(n)
+            yield DocumentChunk(str(n), "my phone number is +34983453999")
+
+    with mod.PiiProcessor(skip_plugins=True, workers=2) as pd:
+        pd.add_json_tasks(TASKS_SHARED_REGEX)
+        pd.build_tasks("en")
+        results = pd._detect_pool(chunks(), "en", batch_size=1)
+        assert len(next(results)) == 1
+        assert len(consumed) == 2*mod.MAX_POOL_BATCHES
+        assert len(list(results)) == 49
+        assert pd.get_stats()["num"]["entities"] == 50
+
+
+def test610_threads(fixture_timestamp):
+    """
+    Test detection executing the tasks for each chunk in a thread pool
+    """
+    config = load_config(CONFIGFILE)
+    doc = LocalSrcDocumentFile(DOCUMENT)
+
+    result = []
+    for threads, bundle in ((None, False), (4, False), (4, True)):
+        with mod.PiiProcessor(skip_plugins=True, config=config,
+                              threads=threads, regex_bundle=bundle) as pd:
+            pd.add_json_tasks(TASKS_SHARED_REGEX)
+            pd.build_tasks("en")
+            r = pd.detect(doc)
+            result.append(([p.asdict() for p in r], r.header(), pd.get_stats()))
+
+    assert len(result[0][0]) == 4
+    assert result[0] == result[1]
+    # (bundled tasks share their regex scans, so prefilter stats change)
+    assert result[0][:2] == result[2][:2]
+
+
+class AsyncPhoneTask(BasePiiTask):
+    """
+    A task with an async interface
+    """
+    pii_name = "async phone"
+
+    def find(self, chunk: DocumentChunk):
+        for m in re.finditer(r"\+\d{11}", chunk.data):
+            yield PiiEntity(self.pii_info, m.group(), chunk.id, m.start())
+
+    async def afind(self, chunk: DocumentChunk):
+        await asyncio.sleep(0)
+        return list(self.find(chunk))
+
+
+TASKS_ASYNC = {
+    "format": "piisa:config:pii-extract:tasks:v1",
+    "header": {
+        "lang": "en",
+        "source": "piisa:pii-extract-base:test",
+        "version": "0.0.1"
+    },
+    "tasklist": [
+        {
+            "class": "piitask",
+            "task": "unit.D_api.test_A_processor.AsyncPhoneTask",
+            "pii": {
+                "type": "PHONE_NUMBER",
+                "subtype": "async",
+                "lang": "en"
+            }
+        }
+    ]
+}
+
+
+def test620_async(fixture_timestamp):
+    """
+    Test detection in async mode
+    """
+    config = load_config(CONFIGFILE)
+    doc = LocalSrcDocumentFile(DOCUMENT)
+
+    pd = mod.PiiProcessor(skip_plugins=True, config=config, max_concurrency=2)
+    pd.add_json_tasks(TASKS_ASYNC)
+    pd.build_tasks("en")
+
+    r1 = pd.detect(doc)
+    assert len(r1) == 4
+
+    async def run():
+        return await asyncio.gather(pd.adetect(doc), pd.adetect(doc))
+
+    for r2 in asyncio.run(run()):
+        assert [p.asdict() for p in r1] == [p.asdict() for p in r2]
+        assert r1.header() == r2.header()
+    assert pd.get_stats()["num"]["calls"] == 3
+
+    # A new event loop can use the same processor
+    r3 = asyncio.run(pd.adetect(doc))
+    assert [p.asdict() for p in r1] == [p.asdict() for p in r3]
+
+
+def _count_in_flight(pd: mod.PiiProcessor) -> Dict:
+    """
+    Record the maximum number of task executions running at once
+    """
+    state = {"now": 0, "max": 0}
+    lock = threading.Lock()
+    run_task = pd._run_task
+
+    def counted(*args):
+        with lock:
+            state["now"] += 1
+            state["max"] = max(state["max"], state["now"])
+        try:
+            time.sleep(0.005)
+            return run_task(*args)
+        finally:
+            with lock:
+                state["now"] -= 1
+
+    pd._run_task = counted
+    return state
+
+
+def test621_async_concurrency(fixture_timestamp):
+    """
+    Test the concurrency limit in async mode, with bundled tasks
+    """
+    config = load_config(CONFIGFILE)
+    doc = LocalSrcDocumentFile(DOCUMENT)
+
+    with mod.PiiProcessor(skip_plugins=True, config=config, threads=4,
+                          regex_bundle=True, max_concurrency=1) as pd:
+        pd.add_json_tasks(TASKS_SHARED_REGEX)
+        pd.build_tasks("en")
+        state = _count_in_flight(pd)
+
+        async def run():
+            return await asyncio.gather(*[pd.adetect(doc) for _ in range(5)])
+
+        for r in asyncio.run(run()):
+            assert len(r) == 4
+        assert state["max"] == 1
+
+    # Windows of oversized chunks
+    text = "\n".join(f"{n}: my phone number is +34983453999" for n in range(40))
+    doc = _seqdoc(text)
+    with mod.PiiProcessor(skip_plugins=True, config=config, threads=4,
+                          window_size=300, window_overlap=80,
+                          max_concurrency=1) as pd:
+        pd.build_tasks("en")
+        exp = [p.asdict() for p in pd.detect(doc)]
+        state = _count_in_flight(pd)
+
+        async def run():
+            return await asyncio.gather(*[pd.adetect(doc) for _ in range(3)])
+
+        for r in asyncio.run(run()):
+            assert [p.asdict() for p in r] == exp
+        assert len(exp) == 40
+        assert state["max"] == 1
+
+
+class BatchPhoneTask(AsyncPhoneTask):
+    """
+    A task with a batch interface
+    """
+    pii_name = "batch phone"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.calls = []
+
+    def find_batch(self, chunks: List[DocumentChunk]):
+        self.calls.append(len(chunks))
+        return [list(self.find(c)) for c in chunks]
+
+
+def test630_batch(fixture_timestamp):
+    """
+    Test detection in batches of chunks
+    """
+    config = load_config(CONFIGFILE)
+    doc = LocalSrcDocumentFile(DOCUMENT)
+    tasks = deepcopy(TASKS_ASYNC)
+    tasks["tasklist"][0]["task"] = "unit.D_api.test_A_processor.BatchPhoneTask"
+
+    pd = mod.PiiProcessor(skip_plugins=True, config=config)
+    pd.add_json_tasks(tasks)
+    pd.build_tasks("en")
+    r1 = pd.detect(doc)
+    assert len(r1) == 4
+    assert pd._tasks["en"][-1].calls == []
+
+    pd = mod.PiiProcessor(skip_plugins=True, config=config, batch_size=4)
+    pd.add_json_tasks(tasks)
+    pd.build_tasks("en")
+    result = pd.detect_batch([doc, doc])
+
+    # Two documents with 5 chunks each
+    assert pd._tasks["en"][-1].calls == [4, 4, 2]
+    for r2 in result:
+        assert [p.asdict() for p in r1] == [p.asdict() for p in r2]
+        assert r1.header() == r2.header()
+
+
+def test640_iter_detect(fixture_timestamp):
+    """
+    Test streaming detection
+    """
+    config = load_config(CONFIGFILE)
+    doc = LocalSrcDocumentFile(DOCUMENT)
+    pd = mod.PiiProcessor(skip_plugins=True, config=config)
+    pd.add_json_tasks(TASKS_SHARED_REGEX)
+    pd.build_tasks("en")
+
+    r1 = pd.detect(doc)
+    r2 = list(pd.iter_detect(doc))
+    assert [p for p in r1] == [p for p, _ in r2]
+    assert [r1.get_detector(p.fields["detector"]) for p in r1] == \
+        [d for _, d in r2]
+
+    dets = pd.get_detectors("en")
+    assert [d.fields["name"] for d in dets] == [
+        "standard credit card",
+        "regex for PHONE_NUMBER:international phone number",
+        "phone number without context"
+    ]
+
+
+def test650_task_stats(fixture_timestamp):
+    """
+    Test per-task statistics
+    """
+    config = load_config(CONFIGFILE)
+    doc = LocalSrcDocumentFile(DOCUMENT)
+    pd = mod.PiiProcessor(skip_plugins=True, config=config, task_stats=True)
+    pd.add_json_tasks(TASKS_SHARED_REGEX)
+    pd.build_tasks("en")
+    pd.detect(doc)
+
+    stats = pd.get_stats()
+    assert stats["num"] == {"calls": 1, "entities": 4}
+
+    # Counters per task (the phone task with context rejects a candidate)
+    tstats = stats["task"]
+    assert list(tstats) == [
+        "standard credit card",
+        "regex for PHONE_NUMBER:international phone number",
+        "phone number without context"
+    ]
+    ctx = tstats["regex for PHONE_NUMBER:international phone number"]
+    nctx = tstats["phone number without context"]
+    assert ctx["chunks"] == nctx["chunks"] == 5
+    assert ctx["chars"] == nctx["chars"] == sum(len(c.data) for c in doc)
+    assert (ctx["candidates"], ctx["rejected"], ctx["entities"]) == (2, 1, 1)
+    assert (nctx["candidates"], nctx["rejected"], nctx["entities"]) == (2, 0, 2)
+    assert all(t["time"] > 0 for t in tstats.values())
+
+    # Latency histograms
+    assert all(sum(h.values()) == 5 for h in stats["task_latency"].values())
+    assert sum(stats["chunk_latency"].values()) == 5
+    assert set(stats["chunk_latency"]) <= set(mod.LATENCY_LABELS)
+
+    # Per-task stats are not collected by default
+    pd = mod.PiiProcessor(skip_plugins=True, config=config)
+    pd.build_tasks("en")
+    pd.detect(doc)
+    assert "task" not in pd.get_stats()
+
+
+def test660_task_stats_workers(fixture_timestamp):
+    """
+    Test per-task statistics aggregated from worker processes
+    """
+    config = load_config(CONFIGFILE)
+    doc = LocalSrcDocumentFile(DOCUMENT)
+
+    result = []
+    for workers in (None, 2):
+        with mod.PiiProcessor(skip_plugins=True, config=config,
+                              workers=workers, task_stats=True) as pd:
+            pd.add_json_tasks(TASKS_SHARED_REGEX)
+            pd.build_tasks("en")
+            pd.detect(doc)
+            stats = pd.get_stats()["task"]
+            for tstats in stats.values():
+                tstats.pop("time")
+            result.append(stats)
+
+    assert result[0] == result[1]
+
+
+def test661_task_stats_windows(fixture_timestamp):
+    """
+    Test per-task statistics when scanning in windows and coalescing chunks
+    """
+    config = load_config(CONFIGFILE)
+    tasks = deepcopy(TASKS_SHARED_REGEX)
+    tasks["tasklist"][0]["task"] = r"AB[^a-z]+CD"
+    parts = ["my phone number is +34983453999", "xx AB", "CD yy",
+             "the number +34983453000 is not a phone"]
+    text = "\n".join(f"{n}: {parts[n % 4]}" for n in range(120))
+
+    for doc, args in ((_seqdoc(text), {"window_size": 300, "window_overlap": 80}),
+                      (_seqdoc(*parts*5), {"coalesce": 200})):
+        result = []
+        for a in ({}, args):
+            pd = mod.PiiProcessor(skip_plugins=True, config=config,
+                                  task_stats=True, **a)
+            pd.add_json_tasks(tasks)
+            pd.build_tasks("en")
+            pd.detect(doc)
+            stats = pd.get_stats()["task"]
+            result.append({k: (v["candidates"], v["rejected"], v["entities"])
+                           for k, v in stats.items()})
+        assert result[0] == result[1]
+        phone = result[0]["regex for PHONE_NUMBER:international phone number"]
+        assert phone[1] > 0
+
+
+def test670_chunk_cache(fixture_timestamp):
+    """
+    Test the chunk cache
+    """
+    config = load_config(CONFIGFILE)
+    doc = LocalSrcDocumentFile(DOCUMENT)
+    pd = mod.PiiProcessor(skip_plugins=True, config=config)
+    pd.build_tasks("en")
+    exp = [p.asdict() for p in pd.detect(doc)]
+
+    pd = mod.PiiProcessor(skip_plugins=True, config=config, chunk_cache=10)
+    pd.build_tasks("en")
+    for n in range(2):
+        assert [p.asdict() for p in pd.detect(doc)] == exp
+    assert pd.get_stats()["chunk_cache"] == {"hit": 5, "miss": 5}
+    assert pd.get_stats()["num"] == {"calls": 2, "entities": 4}
+
+    # A repeated chunk, with a different id
+    chunk = next(c for c in doc.iter_full() if "+34983453999" in c.data)
+    piic = mod.PiiCollectionBuilder(lang="en")
+    assert pd.detect_chunk(DocumentChunk(id="new", data=chunk.data), piic) == 1
+    assert [p.fields["chunkid"] for p in piic] == ["new"]
+    assert pd.get_stats()["chunk_cache"]["hit"] == 6
+
+    # Batch & async modes also use the cache
+    pd = mod.PiiProcessor(skip_plugins=True, config=config, chunk_cache=10,
+                          batch_size=4)
+    pd.build_tasks("en")
+    result = pd.detect_batch([doc, doc])
+    assert [[p.asdict() for p in r] for r in result] == [exp, exp]
+    assert pd.get_stats()["chunk_cache"] == {"hit": 5, "miss": 5}
+    r = asyncio.run(pd.adetect(doc))
+    assert [p.asdict() for p in r] == exp
+    assert pd.get_stats()["chunk_cache"]["hit"] == 10
+
+    # Rebuilding tasks invalidates the cache
+    pd.build_tasks("en")
+    pd.detect(doc)
+    assert pd.get_stats()["chunk_cache"]["miss"] == 10
+
+
+def _seqdoc(*chunks: str) -> SequenceLocalSrcDocument:
+    return SequenceLocalSrcDocument(
+        chunks=[{"id": str(n), "data": c} for n, c in enumerate(chunks)],
+        metadata={"document": {"id": "doc1"}}
+    )
+
+
+def test680_redetect(fixture_timestamp):
+    """
+    Test incremental detection over a modified document
+    """
+    config = load_config(CONFIGFILE)
+    pd = mod.PiiProcessor(skip_plugins=True, config=config)
+    pd.build_tasks("en")
+
+    CHUNKS = ["my phone number is +34983453999",
+              "no pii here",
+              "my credit card number is 4273 9666 4581 5642"]
+
+    # First version: all chunks are processed
+    doc = _seqdoc(*CHUNKS)
+    exp = [p.asdict() for p in pd.detect(doc)]
+    piic, hashes = pd.redetect(doc)
+    assert [p.asdict() for p in piic] == exp
+    assert list(hashes) == ["0", "1", "2"]
+    assert pd.get_stats()["redetect"] == {"detected": 3}
+
+    # Second version: a chunk is edited, another one inserted, another removed
+    doc2 = _seqdoc(CHUNKS[0], "another phone: +34983453000",
+                   CHUNKS[2].replace("my", "our"), CHUNKS[1])
+    exp2 = [p.asdict() for p in pd.detect(doc2)]
+    pd = mod.PiiProcessor(skip_plugins=True, config=config)
+    pd.build_tasks("en")
+    piic2, hashes2 = pd.redetect(doc2, piic, hashes)
+    assert [p.asdict() for p in piic2] == exp2
+    assert hashes2["0"] == hashes["0"]
+    assert hashes2["3"] == hashes["1"]
+    assert pd.get_stats()["redetect"] == {"detected": 2, "reused": 2}
+    assert pd.get_stats()["num"]["entities"] == len(exp2)
+
+    # Hashes depend on the built tasks
+    pd.add_json_tasks(TASKS_SHARED_REGEX)
+    pd.build_tasks("en")
+    _, hashes3 = pd.redetect(doc2, piic2, hashes2)
+    assert not set(hashes2.values()) & set(hashes3.values())
+
+
+def test690_overlap(fixture_timestamp):
+    """
+    Test resolution of overlapping entities
+    """
+    config = load_config(CONFIGFILE)
+    doc = LocalSrcDocumentFile(DOCUMENT)
+
+    # Both phone tasks detect the same entity
+    pd = mod.PiiProcessor(skip_plugins=True, config=config)
+    pd.add_json_tasks(TASKS_SHARED_REGEX)
+    pd.build_tasks("en")
+    assert len(list(pd.detect(doc))) == 4
+
+    for policy in ("longest", "method", "merge"):
+        pd = mod.PiiProcessor(skip_plugins=True, config=config,
+                              overlap=policy)
+        pd.add_json_tasks(TASKS_SHARED_REGEX)
+        pd.build_tasks("en")
+        r = [p.asdict() for p in pd.detect(doc)]
+        assert len(r) == 3
+        stats = pd.get_stats()
+        assert stats["num"]["entities"] == 3
+        assert sum(stats["overlap"].values()) == 1
+
+    # The detection with context is preferred
+    assert r[0]["subtype"] == "international phone number"
+
+    with pytest.raises(InvArgException):
+        mod.PiiProcessor(skip_plugins=True, overlap="shortest")
+
+
+def test700_windows(fixture_timestamp):
+    """
+    Test scanning oversized chunks in windows
+    """
+    config = load_config(CONFIGFILE)
+    parts = ["my phone number is +34983453999", "nothing to see here",
+             "my credit card number is 4273 9666 4581 5642", "and more text",
+             "the number +34983453000 is not a phone"]
+    text = "\n".join(f"{n}: {parts[n % 5]}" for n in range(120))
+    doc = _seqdoc("a short chunk, phone +34983453999", text)
+
+    pd = mod.PiiProcessor(skip_plugins=True, config=config)
+    pd.build_tasks("en")
+    exp = [p.asdict() for p in pd.detect(doc)]
+    assert len(exp) == 49
+
+    for args in ({}, {"threads": 3}, {"batch_size": 2}):
+        pd = mod.PiiProcessor(skip_plugins=True, config=config,
+                              window_size=300, window_overlap=80, **args)
+        pd.build_tasks("en")
+        assert [p.asdict() for p in pd.detect(doc)] == exp
+        stats = pd.get_stats()
+        assert stats["num"]["windows"] == 19
+        assert stats["num"]["entities"] == 49
+        pd.close()
+
+    r = asyncio.run(pd.adetect(doc))
+    assert [p.asdict() for p in r] == exp
+
+    with pytest.raises(InvArgException):
+        mod.PiiProcessor(skip_plugins=True, window_size=100, window_overlap=50)
+
+
+def test701_windows_crossing(fixture_timestamp):
+    """
+    Test windows with matches crossing the window limits
+    """
+    tasks = deepcopy(TASKS_SHARED_REGEX)
+    tasks["tasklist"][0]["task"] = r"\d{4}\s\d{4}"
+    doc = _seqdoc("card " + "1234 "*200)
+
+    result = []
+    for args in ({}, {"window_size": 120, "window_overlap": 50}):
+        pd = mod.PiiProcessor(skip_plugins=True, **args)
+        pd.add_json_tasks(tasks)
+        pd.build_tasks("en")
+        result.append([(p.pos, p.fields["value"]) for p in pd.detect(doc)])
+    assert len(result[0]) == 100
+    assert result[0] == result[1]
+
+
+def test702_windows_context(fixture_timestamp):
+    """
+    Test windows for a task with a context wider than the default margin
+    """
+    tasks = deepcopy(TASKS_SHARED_REGEX)
+    tasks["tasklist"][0]["pii"] = {
+        "type": "PHONE_NUMBER",
+        "lang": "en",
+        "context": {"value": "phone", "width": [400, 0]}
+    }
+    doc = _seqdoc("my phone " + "and   more    text "*18 + "+34983453999")
+
+    result = []
+    for args in ({}, {"window_size": 120, "window_overlap": 50}):
+        pd = mod.PiiProcessor(skip_plugins=True, **args)
+        pd.add_json_tasks(tasks)
+        pd.build_tasks("en")
+        result.append([p.fields["value"] for p in pd.detect(doc)])
+    assert result[0] == result[1] == ["+34983453999"]
+
+
+def test710_coalesce(fixture_timestamp):
+    """
+    Test coalescing small chunks into scan buffers
+    """
+    config = load_config(CONFIGFILE)
+    parts = ["my phone number is +34983453999", "nothing to see here",
+             "my credit card number is 4273 9666 4581 5642", "ID",
+             "the number +34983453000 is not a phone", ""]
+    doc = _seqdoc(*(parts*10))
+
+    pd = mod.PiiProcessor(skip_plugins=True, config=config)
+    pd.build_tasks("en")
+    exp = [p.asdict() for p in pd.detect(doc)]
+    assert len(exp) == 20
+
+    for args in ({}, {"threads": 3}):
+        pd = mod.PiiProcessor(skip_plugins=True, config=config, coalesce=200,
+                              **args)
+        pd.build_tasks("en")
+        assert [p.asdict() for p in pd.detect(doc)] == exp
+        stats = pd.get_stats()
+        assert stats["num"]["coalesced"] == 60
+        assert stats["num"]["entities"] == 20
+        pd.close()
+
+    # Only the chunks not in the chunk cache are coalesced
+    pd = mod.PiiProcessor(skip_plugins=True, config=config, coalesce=200,
+                          chunk_cache=10)
+    pd.build_tasks("en")
+    for n in range(2):
+        assert [p.asdict() for p in pd.detect(doc)] == exp
+    stats = pd.get_stats()
+    assert stats["chunk_cache"] == {"hit": 113, "miss": 7}
+    assert stats["num"]["coalesced"] == 7
+    assert stats["num"]["entities"] == 40
+
+    # An entity matching across chunks makes them be processed on their own
+    tasks = deepcopy(TASKS_SHARED_REGEX)
+    tasks["tasklist"][0]["task"] = r"AB[^a-z]+CD"
+    pd = mod.PiiProcessor(skip_plugins=True, coalesce=200)
+    pd.add_json_tasks(tasks)
+    pd.build_tasks("en")
+    r = pd.detect(_seqdoc("xx AB", "CD yy", "AB--CD"))
+    assert [(p.fields["value"], p.fields["chunkid"]) for p in r] == [("AB--CD", "2")]
+    assert pd.get_stats()["num"]["coalesced"] == 1
+
+
+def test720_coalesce_per_chunk(fixture_timestamp):
+    """
+    Test coalescing with tasks that depend on the chunk edges, the chunk
+    context and the chunk profile
+    """
+    # An anchored pattern is executed over each chunk
+    tasks = deepcopy(TASKS_SHARED_REGEX)
+    tasks["tasklist"][0]["task"] = r"^ID\d{4}$"
+    doc = _seqdoc("ID1234", "ID5678")
+    for coalesce in (None, 200):
+        pd = mod.PiiProcessor(skip_plugins=True, coalesce=coalesce)
+        pd.add_json_tasks(tasks)
+        pd.build_tasks("en")
+        r = pd.detect(doc)
+        assert [p.fields["value"] for p in r] == ["ID1234", "ID5678"]
+    assert pd.get_stats()["num"]["coalesced"] == 0
+
+    # Context in neighbouring chunks, and per-chunk task requirements
+    config = load_config(CONFIGFILE)
+    tasks = deepcopy(TASKS_SHARED_REGEX)
+    tasks["tasklist"][0]["requires"] = {"plus": True}
+    doc = _seqdoc("call my phone", "+34983453999", "nothing", "+34983453000")
+    result = []
+    for coalesce in (None, 200):
+        pd = mod.PiiProcessor(skip_plugins=True, config=config,
+                              coalesce=coalesce)
+        pd.add_json_tasks(tasks)
+        pd.build_tasks("en")
+        r = pd.detect(doc, chunk_context=True)
+        result.append([p.asdict() for p in r])
+        stats = pd.get_stats()
+        assert stats["num"]["skipped"] == 2
+    assert result[0] == result[1]
+    assert [(p["subtype"], p["chunkid"]) for p in result[0]] == [
+        ("international phone number", "1"), ("no context", "1"),
+        ("no context", "3")
+    ]
+    assert stats["num"]["coalesced"] == 4
@@ -36,7 +36,8 @@ def test100_process_file():
                                configfile=CONFIGFILE)
 
     exp = {'num': {'calls': 1, 'entities': 2},
-           'entities': {'PHONE_NUMBER': 1, 'CREDIT_CARD': 1}}
+           'entities': {'PHONE_NUMBER': 1, 'CREDIT_CARD': 1},
+           'prefilter': {'hit': 3, 'miss': 2}}
     assert exp == got
 
 
@@ -59,6 +60,38 @@ def test110_process_file_result(fixture_timestamp):
     assert exp == got
 
 
+def _resolve_detectors(header, pii_list):
+    """
+    Replace detector indexes by the detector data
+    """
+    det = {str(k): v for k, v in header["detectors"].items()}
+    return [dict(p, detector=det[str(p["detector"])]) for p in pii_list]
+
+
+def test120_process_file_ndjson(fixture_timestamp):
+    """
+    Test streaming output in NDJSON format
+    """
+    with tempfile.NamedTemporaryFile(suffix=".ndjson") as f1:
+        f1.close()
+        stats = mod.process_file(DOCUMENT, f1.name, lang="en",
+                                 skip_plugins=True, configfile=CONFIGFILE)
+
+        with open(f1.name, encoding="utf-8") as f2:
+            header, *pii_list = [json.loads(line) for line in f2]
+
+    collection = Path(__file__).parents[2] / "data" / "collection-example.json"
+    with open(collection, encoding="utf-8") as f:
+        exp = json.load(f)
+
+    # Detectors are all declared in advance, so numbering can be different
+    assert header["format"] == exp["metadata"]["format"]
+    assert len(header["detectors"]) == 2
+    assert _resolve_detectors(exp["metadata"], exp["pii_list"]) == \
+        _resolve_detectors(header, pii_list)
+    assert stats["num"] == {'calls': 1, 'entities': 2}
+
+
 def test200_err():
     """
     Test error generation
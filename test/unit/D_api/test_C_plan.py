@@ -0,0 +1,123 @@
+"""
+Test the ExecutionPlan class
+"""
+from dataclasses import FrozenInstanceError
+
+import pytest
+
+from pii_data.types import PiiEnum, PiiEntityInfo
+from pii_data.types.doc import DocumentChunk
+from pii_data.helper.exception import InvArgException
+
+from pii_extract.build.task import RegexPiiTask
+from pii_extract.build.task.multi import BaseMultiPiiTask
+import pii_extract.api.plan as mod
+
+
+def _regex_task(name: str, pattern: str, context: str = None) -> RegexPiiTask:
+    task = {"source": "unit-test", "name": name, "version": "0.1",
+            "method": "regex"}
+    pii = {"pii": PiiEnum.PHONE_NUMBER, "lang": "en"}
+    if context:
+        pii["context"] = context
+    return RegexPiiTask(pattern, task=task, pii=pii)
+
+
+class MyMultiPiiTask(BaseMultiPiiTask):
+
+    def __init__(self):
+        tinfo = {"source": "unit-test", "name": "multitask", "version": "0.1"}
+        super().__init__(tinfo)
+        self.add_pii_info({"pii": PiiEnum.BLOCKCHAIN_ADDRESS, "lang": "any",
+                           "method": "regex"})
+        self.add_pii_info({"pii": PiiEnum.CREDIT_CARD, "lang": "any",
+                           "method": "regex,checksum"})
+        self.add_pii_info({"pii": PiiEnum.EMAIL_ADDRESS, "lang": "any"})
+
+    def find(self, chunk: DocumentChunk):
+        return []
+
+
+# --------------------------------------------------------------------------
+
+
+def test10_build():
+    """
+    Build a plan
+    """
+    t1 = _regex_task("task1", r"\d+", context="phone")
+    t2 = _regex_task("task2", r"\d+")
+    plan = mod.ExecutionPlan.build("en", [t1, t2, t1])
+
+    assert plan.tasks == (t1, t2)
+    assert plan.bundle is None
+    assert plan.keywords.covers(["phone"])
+    assert str(plan) == "<ExecutionPlan en #2>"
+
+    # The plan is immutable
+    with pytest.raises(FrozenInstanceError):
+        plan.tasks = ()
+    with pytest.raises(TypeError):
+        plan.detectors[t1] = None
+
+    plan = mod.ExecutionPlan.build("en", [t1, t2], bundle=True)
+    assert len(plan.bundle) == 2
+
+
+def test20_detectors():
+    """
+    Check the precomputed detectors
+    """
+    t1 = _regex_task("task1", r"\d+")
+    t2 = _regex_task("task1", r"\d\d+")
+    t3 = _regex_task("task3", r"\d+")
+    plan = mod.ExecutionPlan.build("en", [t1, t2, t3])
+
+    # Tasks with the same info share the same detector object
+    d1 = plan.detector(t1, t1.pii_info)
+    assert d1.asdict() == {"source": "unit-test", "name": "task1",
+                           "version": "0.1", "method": "regex"}
+    assert plan.detector(t2, t2.pii_info) is d1
+    assert plan.detector(t3, t3.pii_info) is not d1
+
+    assert [d.fields["name"] for d in plan.detector_list()] == ["task1", "task3"]
+
+
+def test30_detectors_multi():
+    """
+    Check the precomputed detectors for a multi-task
+    """
+    task = MyMultiPiiTask()
+    plan = mod.ExecutionPlan.build("any", [task])
+
+    bc, cc, email = task.pii_info
+    assert plan.detector(task, bc).fields["method"] == "regex"
+    assert plan.detector(task, cc).fields["method"] == "regex,checksum"
+    assert plan.detector(task, bc) is plan.detector(task, PiiEntityInfo(**{
+        "pii": PiiEnum.BLOCKCHAIN_ADDRESS, "lang": "any"}))
+
+    # All the PII types share the detector id (source/name/version)
+    assert len(plan.detector_list()) == 1
+
+    # The entity type with no defined method fails only when used
+    with pytest.raises(InvArgException):
+        plan.detector(task, email)
+
+
+def test40_detectors_no_method():
+    """
+    Check a single-type task whose method cannot be obtained
+    """
+    class NoMethodTask(RegexPiiTask):
+        def get_method(self, pii, **kwargs):
+            raise InvArgException("no method")
+
+    t1 = _regex_task("task1", r"\d+")
+    task = NoMethodTask(r"\d+", task={"name": "nomethod"},
+                        pii={"pii": PiiEnum.PHONE_NUMBER, "lang": "en"})
+    plan = mod.ExecutionPlan.build("en", [t1, task])
+
+    assert plan.detectors[task] is None
+    assert [d.fields["name"] for d in plan.detector_list()] == ["task1"]
+    with pytest.raises(InvArgException):
+        plan.detector(task, task.pii_info)
@@ -46,3 +46,29 @@ def test100_app_info(capfd):
     captured = capfd.readouterr()
     #print("*** CAPTURED", captured.out, sep="\n")
     assert captured.out == INFO
+
+
+def test200_app_regex_cache(capfd, tmp_path, monkeypatch):
+    """
+    Test warming up & clearing the regex cache
+    """
+    monkeypatch.setenv("PII_EXTRACT_REGEX_CACHE", "")
+    base = ["--config", str(CONFIGFILE), "--skip-plugins",
+            "--cache-dir", str(tmp_path)]
+
+    mod.main(["regex-cache", "warm"] + base)
+    captured = capfd.readouterr()
+    assert captured.out == f". Regex cache at {tmp_path}: 4 patterns (4 added)\n"
+
+    mod.main(["regex-cache", "clear"] + base)
+    captured = capfd.readouterr()
+    assert captured.out == f". Removed 4 cached patterns from {tmp_path}\n"
+
+    # Without a folder, use the one defined in the environment
+    envdir = tmp_path / "env"
+    monkeypatch.setenv("PII_EXTRACT_REGEX_CACHE", str(envdir))
+    base = ["--config", str(CONFIGFILE), "--skip-plugins"]
+    mod.main(["regex-cache", "warm"] + base)
+    captured = capfd.readouterr()
+    assert captured.out == f". Regex cache at {envdir}: 4 patterns (4 added)\n"
+    assert len(list(envdir.iterdir())) == 4